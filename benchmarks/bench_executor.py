@@ -0,0 +1,102 @@
+"""Range-query benchmark: FunctionExecutor over millions of seeded records.
+
+Bulk-loads synthetic daily records, then times get/compare/predict over
+random day, month, quarter and year windows. The same aggregate is also run
+with the index disabled (NOT INDEXED) to show what a full scan costs.
+
+  python benchmarks/bench_executor.py --days 3650 --per-day 25   # 10M records
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import config
+from core.function_executor import FunctionExecutor, seed_rows
+from utils.date_utils import VietnamDateUtils
+
+SCHEMA_PATH = Path(__file__).parent.parent / config.SCHEMA_PATH
+
+def time_calls(call: Callable[[], object], repeat: int) -> Dict[str, float]:
+  samples = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    call()
+    samples.append(time.perf_counter() - start)
+  samples.sort()
+  return {
+    'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+    'p95_ms': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 3),
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+  parser.add_argument('--days', type = int, default = 3650, help = 'Days of history to seed')
+  parser.add_argument('--per-day', type = int, default = 25, help = 'Records per day per department and content type')
+  parser.add_argument('--db', default = ':memory:', help = 'SQLite file (relative to the project root) or :memory:')
+  parser.add_argument('--repeat', type = int, default = 50)
+  parser.add_argument('--seed', type = int, default = 0)
+  args = parser.parse_args()
+
+  with open(SCHEMA_PATH, 'r', encoding = 'utf-8') as f:
+    schema = json.load(f)
+
+  executor = FunctionExecutor(schema, path = args.db, seed = False)
+  today = VietnamDateUtils.today()
+  start = time.perf_counter()
+  loaded = executor.bulk_load(seed_rows(executor.departments, executor.contents, today, args.days, args.per_day, args.seed))
+  load_seconds = time.perf_counter() - start
+
+  rng = random.Random(args.seed)
+  windows = {
+    'day': ('day', lambda day: day.isoformat()),
+    'month': ('month', lambda day: day.replace(day = 1).isoformat()),
+    'quarter': ('quarter', lambda day: day.replace(month = (day.month - 1) // 3 * 3 + 1, day = 1).isoformat()),
+    'year': ('year', lambda day: day.replace(month = 1, day = 1).isoformat()),
+  }
+
+  def random_call(window: str) -> Dict[str, str]:
+    type_of_time, specific_time = windows[window]
+    # Leave a year of history in front of the window for compare/predict
+    day = today - timedelta(days = rng.randrange(365, max(366, args.days)))
+    return {
+      'departments': rng.choice(executor.departments),
+      'content': rng.choice(executor.contents),
+      'type_of_time': type_of_time,
+      'specific_time': specific_time(day),
+    }
+
+  results: Dict[str, Dict[str, Dict[str, float]]] = {}
+  for window in windows:
+    results[window] = {
+      name: time_calls(lambda: executor.execute(name, random_call(window)), args.repeat)
+      for name in ('get', 'compare', 'predict')
+    }
+
+  # Same aggregate as get/compare, forced to scan the table
+  scan_sql = ('SELECT COUNT(*), TOTAL(value) FROM records NOT INDEXED'
+              ' WHERE departments = ? AND content = ? AND specific_time BETWEEN ? AND ?')
+
+  def full_scan():
+    call = random_call('month')
+    month_start = call['specific_time']
+    executor._conn.execute(scan_sql, (call['departments'], call['content'], month_start, month_start[:8] + '31')).fetchone()
+
+  results['month']['full_scan'] = time_calls(full_scan, max(3, args.repeat // 10))
+
+  print(json.dumps({
+    'benchmark': 'executor',
+    'records': loaded,
+    'bulk_load_seconds': round(load_seconds, 2),
+    'records_per_second': round(loaded / load_seconds) if load_seconds else None,
+    'latency': results,
+  }, indent = 2))
+
+if __name__ == "__main__":
+  main()
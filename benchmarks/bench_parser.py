@@ -0,0 +1,130 @@
+"""Micro-benchmark: FunctionCallParser vs the previous regex/char-loop parser.
+
+Replays the `function_call` column of the 10k dataset, plain and wrapped the
+way LLM responses usually look (preamble text, markdown fences), checks that
+both parsers agree and reports the time per response.
+
+  python benchmarks/bench_parser.py [--repeat 5]
+"""
+import argparse
+import csv
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.parsers import FunctionCallParser
+
+DATASET_PATH = Path(__file__).parent.parent / 'data' / 'function_calling_dataset_10k_natural_time.csv'
+
+def legacy_parse_function_call(llm_response: str) -> Dict[str, Any]:
+  """LLMHandler.parse_function_call before the single-pass parser (print removed)"""
+  response = llm_response.strip()
+
+  patterns = [
+    r"```(?:\w+)?\s*((?:add|get|delete|compare|predict)\s*\([^)]*\))\s*```",
+    r"(?:Function call syntax:|Function call:|Output:)?\s*((?:add|get|delete|compare|predict)\s*\([^)]*\))",
+    r"((?:add|get|delete|compare|predict)\s*\([^)]*\))",
+  ]
+
+  function_call_text = None
+  for pattern in patterns:
+    match = re.search(pattern, response, re.IGNORECASE | re.DOTALL)
+    if match:
+      function_call_text = match.group(1).strip()
+      break
+
+  if not function_call_text:
+    raise ValueError(f"Could not parse function call: {response}")
+
+  func_match = re.search(r"(\w+)\s*\(\s*(.*?)\s*\)$", function_call_text)
+  if not func_match:
+    raise ValueError(f"Could not parse function call format: {function_call_text}")
+
+  function_name = func_match.group(1)
+  params_str = func_match.group(2)
+
+  parameters = {}
+  if params_str:
+    param_parts = []
+    current_param = ""
+    in_quotes = False
+    quote_char = None
+
+    for char in params_str:
+      if char in ['"', "'"] and not in_quotes:
+        in_quotes = True
+        quote_char = char
+        current_param += char
+      elif char == quote_char and in_quotes:
+        in_quotes = False
+        quote_char = None
+        current_param += char
+      elif char == ',' and not in_quotes:
+        param_parts.append(current_param.strip())
+        current_param = ""
+      else:
+        current_param += char
+
+    if current_param.strip():
+      param_parts.append(current_param.strip())
+
+    for param_part in param_parts:
+      param_match = re.match(r"(\w+)\s*=\s*(.+)", param_part.strip())
+      if param_match:
+        param_name = param_match.group(1)
+        param_value = param_match.group(2).strip()
+        if param_value.startswith('"') and param_value.endswith('"'):
+          param_value = param_value[1:-1]
+        elif param_value.startswith("'") and param_value.endswith("'"):
+          param_value = param_value[1:-1]
+        parameters[param_name] = param_value
+
+  return {"name": function_name, "parameters": parameters}
+
+def load_responses() -> List[str]:
+  with open(DATASET_PATH, 'r', encoding = 'utf-8') as f:
+    calls = [row['function_call'] for row in csv.DictReader(f)]
+
+  responses = []
+  for i, call in enumerate(calls):
+    if i % 3 == 0:
+      responses.append(call)
+    elif i % 3 == 1:
+      responses.append(f"Function call: {call}\n\nThis retrieves the requested records.")
+    else:
+      responses.append(f"Sure! Here is the function call:\n```python\n{call}\n```\nLet me know if you need anything else.")
+  return responses
+
+def time_parser(parse, responses: List[str], repeat: int) -> float:
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    for response in responses:
+      parse(response)
+    best = min(best, time.perf_counter() - start)
+  return best
+
+def main():
+  arg_parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+  arg_parser.add_argument('--repeat', type = int, default = 5)
+  args = arg_parser.parse_args()
+
+  responses = load_responses()
+  parser = FunctionCallParser()
+
+  mismatches = sum(1 for r in responses if parser.parse(r) != legacy_parse_function_call(r))
+  legacy = time_parser(legacy_parse_function_call, responses, args.repeat)
+  current = time_parser(parser.parse, responses, args.repeat)
+
+  n = len(responses)
+  print(f"responses:   {n} (mismatches: {mismatches})")
+  print(f"legacy:      {legacy * 1e6 / n:8.2f} us/response")
+  print(f"single-pass: {current * 1e6 / n:8.2f} us/response")
+  print(f"speedup:     {legacy / current:8.2f}x")
+
+if __name__ == "__main__":
+  main()
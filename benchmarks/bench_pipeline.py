@@ -0,0 +1,214 @@
+"""End-to-end throughput, latency and accuracy benchmark against a mock Ollama server.
+
+Replays data/function_calling_dataset_10k_natural_time.csv and
+data/test_queries.json through BusinessAnalystChatbot and writes a JSON
+report (queries/sec, p50/p95/p99 per stage, exact-match accuracy) that can
+be diffed between runs:
+
+  python benchmarks/bench_pipeline.py --limit 2000 --concurrency 8 --latency-ms 100 --out run.json
+
+Dataset labels were generated on a fixed date, so time fields of relative
+expressions drift from the labels; field-level accuracy is reported next to
+exact match for that reason.
+"""
+import argparse
+import csv
+import json
+import platform
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.mock_ollama import DATASET_PATH, TEST_QUERIES_PATH, start_mock_server
+from config.settings import config
+from utils.parsers import FunctionCallParser
+
+STAGES = ('translate', 'generate', 'parse', 'validate', 'total')
+FIELDS = ('departments', 'content', 'id', 'type_of_time', 'specific_time')
+
+def load_cases(dataset: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+  parser = FunctionCallParser()
+  cases = []
+  if dataset in ('test_queries', 'all'):
+    with open(TEST_QUERIES_PATH, 'r', encoding = 'utf-8') as f:
+      for group in json.load(f)['test_cases'].values():
+        for case in group:
+          cases.append({'query': case['vietnamese_query'], 'expected': case['expected_function_call']})
+  if dataset in ('csv', 'all'):
+    with open(DATASET_PATH, 'r', encoding = 'utf-8') as f:
+      for row in csv.DictReader(f):
+        cases.append({'query': row['query'], 'expected': parser.parse(row['function_call'])})
+  return cases[:limit] if limit else cases
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+  if not samples:
+    return {'count': 0, 'mean_ms': None, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+  ordered = sorted(samples)
+
+  def pick(p: float) -> float:
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+  return {
+    'count': len(ordered),
+    'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+    'p50_ms': pick(0.50),
+    'p95_ms': pick(0.95),
+    'p99_ms': pick(0.99),
+    'max_ms': round(ordered[-1] * 1000, 3),
+  }
+
+class StageTimer:
+  """Wraps pipeline components to time each stage of the query running on the current thread"""
+
+  def __init__(self):
+    self._local = threading.local()
+
+  def reset(self) -> Dict[str, float]:
+    self._local.timings = defaultdict(float)
+    return self._local.timings
+
+  def wrap(self, stage: str, func, label: Optional[str] = None):
+    """Time calls to `func`; with `label`, only calls made with that transport label"""
+    def timed(*args, **kwargs):
+      if label is not None and kwargs.get('label', args[1] if len(args) > 1 else None) != label:
+        return func(*args, **kwargs)
+      start = time.perf_counter()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+          timings[stage] += time.perf_counter() - start
+    return timed
+
+  def instrument(self, bot):
+    bot.translator.vietnamese_to_english = self.wrap('translate', bot.translator.vietnamese_to_english)
+    # The transport is shared with the translator, so only time function calling requests
+    bot.llm_handler.transport.generate = self.wrap('generate', bot.llm_handler.transport.generate, label = 'generate')
+    bot.llm_handler.parse_function_call = self.wrap('parse', bot.llm_handler.parse_function_call)
+    bot.validator.validate_function_call = self.wrap('validate', bot.validator.validate_function_call)
+
+def run(args) -> Dict[str, Any]:
+  servers = [
+    start_mock_server(latency_ms = args.latency_ms, jitter_ms = args.jitter_ms, seed = args.seed + i, max_parallel = args.mock_parallel)
+    for i in range(args.backends)
+  ]
+
+  config.LLM_BASE_URL = servers[0].base_url
+  config.LLM_BASE_URLS = [server.base_url for server in servers]
+  config.SCHEDULER_ENABLED = args.scheduler
+  if args.mock_parallel:
+    config.SCHEDULER_MAX_IN_FLIGHT = args.mock_parallel
+  config.LLM_STREAM = False
+  config.LLM_STRUCTURED_OUTPUT = args.structured
+  config.LOG_LEVEL = 'CRITICAL'
+  config.RULE_ENGINE_ENABLED = not args.no_rules
+  config.RESULT_CACHE_ENABLED = not args.no_cache
+  config.TRANSLATION_CACHE_ENABLED = not args.no_cache
+  config.LLM_POOL_SIZE = max(config.LLM_POOL_SIZE, args.concurrency)
+
+  from core.chatbot import BusinessAnalystChatbot
+  bot = BusinessAnalystChatbot()
+  timer = StageTimer()
+  timer.instrument(bot)
+
+  cases = load_cases(args.dataset, args.limit)
+
+  def run_case(case: Dict[str, Any]):
+    timings = timer.reset()
+    start = time.perf_counter()
+    result = bot.process_vietnamese_query(case['query'], args.mode)
+    timings['total'] = time.perf_counter() - start
+    return result, dict(timings)
+
+  wall_start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers = args.concurrency) as executor:
+    outcomes = list(executor.map(run_case, cases))
+  wall = time.perf_counter() - wall_start
+  for server in servers:
+    server.shutdown()
+
+  stage_samples = defaultdict(list)
+  exact = function_match = successes = 0
+  field_hits = Counter()
+  resolved_by = Counter()
+  for case, (result, timings) in zip(cases, outcomes):
+    for stage, seconds in timings.items():
+      stage_samples[stage].append(seconds)
+    resolved_by[result.get('resolved_by') or 'error'] += 1
+    if not result['success']:
+      continue
+    successes += 1
+    call, expected = result['function_call'], case['expected']
+    exact += call == expected
+    function_match += call['name'] == expected['name']
+    for field in FIELDS:
+      field_hits[field] += call['parameters'].get(field) == expected['parameters'].get(field)
+
+  n = len(cases)
+  return {
+    'benchmark': 'pipeline',
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'python': platform.python_version(),
+    'settings': {
+      'dataset': args.dataset,
+      'queries': n,
+      'concurrency': args.concurrency,
+      'mode': args.mode,
+      'structured': args.structured,
+      'scheduler': args.scheduler,
+      'backends': args.backends,
+      'mock_parallel': args.mock_parallel,
+      'latency_ms': args.latency_ms,
+      'jitter_ms': args.jitter_ms,
+      'rules': not args.no_rules,
+      'cache': not args.no_cache,
+    },
+    'throughput': {
+      'wall_seconds': round(wall, 4),
+      'queries_per_second': round(n / wall, 2) if wall else None,
+    },
+    'latency': {stage: percentiles(stage_samples[stage]) for stage in STAGES},
+    'accuracy': {
+      'success_rate': round(successes / n, 4) if n else None,
+      'exact_match': round(exact / n, 4) if n else None,
+      'function_match': round(function_match / n, 4) if n else None,
+      'fields': {field: round(field_hits[field] / n, 4) if n else None for field in FIELDS},
+    },
+    'resolved_by': dict(resolved_by),
+    'llm': bot.get_llm_stats().get('scheduler') if args.scheduler else None,
+    'mock_requests': sum(server.requests_served for server in servers),
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description = 'Pipeline benchmark against a mock Ollama server')
+  parser.add_argument('--dataset', choices = ('csv', 'test_queries', 'all'), default = 'all')
+  parser.add_argument('--limit', type = int, default = None, help = 'Replay only the first N queries')
+  parser.add_argument('--concurrency', type = int, default = 8)
+  parser.add_argument('--mode', choices = ('translate', 'direct'), default = 'translate')
+  parser.add_argument('--structured', action = 'store_true', help = 'Request JSON structured output (LLM_STRUCTURED_OUTPUT)')
+  parser.add_argument('--latency-ms', type = float, default = 50.0, help = 'Mock latency per LLM call')
+  parser.add_argument('--jitter-ms', type = float, default = 10.0)
+  parser.add_argument('--seed', type = int, default = 0)
+  parser.add_argument('--scheduler', action = 'store_true', help = 'Route LLM calls through the micro-batching scheduler')
+  parser.add_argument('--backends', type = int, default = 1, help = 'Mock Ollama servers to start')
+  parser.add_argument('--mock-parallel', type = int, default = None, help = 'Concurrent generations per mock server (OLLAMA_NUM_PARALLEL)')
+  parser.add_argument('--no-rules', action = 'store_true', help = 'Disable the rule-based fast path')
+  parser.add_argument('--no-cache', action = 'store_true', help = 'Disable translation and result caches')
+  parser.add_argument('--out', help = 'Write the JSON report here instead of stdout')
+  args = parser.parse_args()
+
+  report = json.dumps(run(args), indent = 2, ensure_ascii = False)
+  if args.out:
+    Path(args.out).write_text(report + '\n', encoding = 'utf-8')
+  else:
+    print(report)
+
+if __name__ == "__main__":
+  main()
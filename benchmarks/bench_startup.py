@@ -0,0 +1,92 @@
+"""Startup benchmark: import, construction and first-query cost in fresh interpreters.
+
+Every sample runs in a new Python process, so module imports, schema
+loading and component construction are all measured cold. Compares the
+eager constructor, the lazy one with a warm startup artifact and the lazy
+one compiling the schema without an artifact.
+
+  python benchmarks/bench_startup.py --repeat 10
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).parent.parent
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from config.settings import config
+config.LOG_LEVEL = 'CRITICAL'
+config.STARTUP_ARTIFACT_DIR = {artifact_dir!r}
+from core.chatbot import BusinessAnalystChatbot
+imported = time.perf_counter()
+bot = BusinessAnalystChatbot(lazy = {lazy!r})
+constructed = time.perf_counter()
+result = bot.process_vietnamese_query({query!r})
+answered = time.perf_counter()
+if result['success'] and config.EXECUTOR_ENABLED:
+  bot.execute_function_call(result['function_call'])
+executed = time.perf_counter()
+print(json.dumps({{
+  'import_ms': (imported - start) * 1000,
+  'construct_ms': (constructed - imported) * 1000,
+  'first_query_ms': (answered - constructed) * 1000,
+  'first_execute_ms': (executed - answered) * 1000,
+  'resolved_by': result.get('resolved_by'),
+  'modules': len(sys.modules),
+}}))
+'''
+
+def run_child(lazy: bool, artifact_dir: str, query: str) -> Dict[str, Any]:
+  code = CHILD.format(root = str(ROOT), artifact_dir = artifact_dir, lazy = lazy, query = query)
+  start = time.perf_counter()
+  output = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True).stdout
+  sample = json.loads(output.strip().splitlines()[-1])
+  # Interpreter startup included
+  sample['process_ms'] = (time.perf_counter() - start) * 1000
+  return sample
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+  summary: Dict[str, Any] = {}
+  for field in ('process_ms', 'import_ms', 'construct_ms', 'first_query_ms', 'first_execute_ms'):
+    values = sorted(sample[field] for sample in samples)
+    summary[field] = {'p50': round(values[len(values) // 2], 2), 'min': round(values[0], 2)}
+  summary['resolved_by'] = samples[0]['resolved_by']
+  summary['modules'] = samples[0]['modules']
+  return summary
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+  parser.add_argument('--repeat', type = int, default = 10, help = 'Fresh processes per scenario')
+  parser.add_argument('--query', default = 'xem báo cáo tài chính hôm nay', help = 'First query; the default is answered by the rule engine')
+  args = parser.parse_args()
+
+  artifact_dir = tempfile.mkdtemp(prefix = 'bench-startup-')
+  try:
+    # (lazy, artifact dir); an empty dir disables the artifact
+    scenarios = {
+      'eager': (False, artifact_dir),
+      'lazy': (True, artifact_dir),
+      'lazy_no_artifact': (True, ''),
+    }
+    # Writes the artifact, so every timed sample below starts from a warm one
+    run_child(True, artifact_dir, args.query)
+
+    results = {}
+    for name, (lazy, directory) in scenarios.items():
+      results[name] = summarize([run_child(lazy, directory, args.query) for _ in range(args.repeat)])
+  finally:
+    shutil.rmtree(artifact_dir, ignore_errors = True)
+
+  print(json.dumps({'benchmark': 'startup', 'repeat': args.repeat, 'query': args.query, 'results': results}, indent = 2, ensure_ascii = False))
+
+if __name__ == "__main__":
+  main()
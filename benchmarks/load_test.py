@@ -0,0 +1,286 @@
+"""Load test: throughput vs latency curves of BusinessAnalystChatbot against a mock Ollama server.
+
+Queries are drawn at random from data/function_calling_dataset_10k_natural_time.csv.
+Each point of a curve runs for --duration seconds with a fresh chatbot:
+
+  closed loop  N users, each sending its next query when the previous one is answered
+  open loop    queries arrive at a fixed rate (or Poisson with --poisson) whether or
+               not earlier ones are done; latency counts from the scheduled arrival,
+               so client-side queueing is included
+
+The report gives throughput and p50/p95/p99 per point, and the point where each
+curve saturates, for every --modes entry:
+
+  python benchmarks/load_test.py --closed-loop --users 1,2,4,8,16,32 --latency-ms 200 --max-parallel 4
+  python benchmarks/load_test.py --open-loop --rates 2,5,10,20 --modes translate,direct --no-rules --no-cache
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_pipeline import percentiles
+from benchmarks.mock_ollama import DATASET_PATH, add_mock_arguments, mock_options, start_mock_server
+from config.settings import config
+
+# (latency seconds, resolved_by or 'error')
+Sample = Tuple[float, str]
+
+# A point saturates when it achieves less than this share of the offered rate (open loop)
+# or gains less than this share of throughput over the previous point (closed loop)
+SATURATION_THROUGHPUT = 0.9
+SATURATION_GAIN = 0.1
+
+def load_queries() -> List[str]:
+  with open(DATASET_PATH, 'r', encoding = 'utf-8') as f:
+    return [row['query'] for row in csv.DictReader(f)]
+
+class QueryPicker:
+  """Thread-safe seeded random draws from the dataset"""
+
+  def __init__(self, queries: List[str], seed: int):
+    self.queries = queries
+    self.random = random.Random(seed)
+    self._lock = threading.Lock()
+
+  def __call__(self) -> str:
+    with self._lock:
+      return self.random.choice(self.queries)
+
+def run_closed_loop(process: Callable[[str], Dict[str, Any]], pick: QueryPicker, users: int, duration: float, think: float) -> Tuple[List[Sample], float]:
+  samples: List[Sample] = []
+  lock = threading.Lock()
+  start = time.perf_counter()
+  deadline = start + duration
+
+  def user():
+    while time.perf_counter() < deadline:
+      query = pick()
+      sent = time.perf_counter()
+      result = process(query)
+      sample = (time.perf_counter() - sent, result.get('resolved_by') or 'error')
+      with lock:
+        samples.append(sample)
+      if think:
+        time.sleep(think)
+
+  threads = [threading.Thread(target = user, name = f"load-user-{i}") for i in range(users)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return samples, time.perf_counter() - start
+
+def run_open_loop(
+  process: Callable[[str], Dict[str, Any]],
+  pick: QueryPicker,
+  rate: float,
+  duration: float,
+  max_in_flight: int,
+  poisson: bool,
+  seed: int,
+) -> Tuple[List[Sample], float, int]:
+  """Returns the samples, the wall time and the arrivals dropped because max_in_flight was reached"""
+  samples: List[Sample] = []
+  lock = threading.Lock()
+  in_flight = threading.BoundedSemaphore(max_in_flight)
+  arrivals = random.Random(seed)
+  dropped = 0
+
+  def run(query: str, arrival: float):
+    try:
+      result = process(query)
+      sample = (time.perf_counter() - arrival, result.get('resolved_by') or 'error')
+      with lock:
+        samples.append(sample)
+    finally:
+      in_flight.release()
+
+  start = time.perf_counter()
+  offset = 0.0
+  with ThreadPoolExecutor(max_workers = max_in_flight, thread_name_prefix = 'load-open') as executor:
+    while offset < duration:
+      arrival = start + offset
+      wait = arrival - time.perf_counter()
+      if wait > 0:
+        time.sleep(wait)
+      if in_flight.acquire(blocking = False):
+        executor.submit(run, pick(), arrival)
+      else:
+        dropped += 1
+      offset += arrivals.expovariate(rate) if poisson else 1 / rate
+  return samples, time.perf_counter() - start, dropped
+
+def summarize(samples: List[Sample], wall: float, load: float) -> Dict[str, Any]:
+  outcomes = Counter(resolved_by for _, resolved_by in samples)
+  latency = percentiles([seconds for seconds, _ in samples])
+  return {
+    'load': load,
+    'completed': len(samples),
+    'throughput_qps': round(len(samples) / wall, 2) if wall else None,
+    'error_rate': round(outcomes['error'] / len(samples), 4) if samples else None,
+    'p50_ms': latency['p50_ms'],
+    'p95_ms': latency['p95_ms'],
+    'p99_ms': latency['p99_ms'],
+    'max_ms': latency['max_ms'],
+    'resolved_by': dict(outcomes),
+  }
+
+def find_saturation(points: List[Dict[str, Any]], open_loop: bool) -> Optional[Dict[str, Any]]:
+  """First point past which more load no longer buys throughput"""
+  for previous, point in zip([None] + points, points):
+    throughput = point['throughput_qps'] or 0.0
+    if open_loop and throughput < SATURATION_THROUGHPUT * point['load']:
+      return {'load': point['load'], 'throughput_qps': throughput, 'reason': 'throughput below offered rate'}
+    if not open_loop and previous is not None and throughput < (1 + SATURATION_GAIN) * (previous['throughput_qps'] or 0.0):
+      return {'load': previous['load'], 'throughput_qps': previous['throughput_qps'], 'reason': 'throughput stopped growing with users'}
+  return None
+
+def configure(args, base_urls: List[str]):
+  config.LLM_BASE_URL = base_urls[0]
+  config.LLM_BASE_URLS = base_urls
+  config.SCHEDULER_ENABLED = args.scheduler
+  if args.max_parallel:
+    config.SCHEDULER_MAX_IN_FLIGHT = args.max_parallel
+  config.LLM_STREAM = args.stream
+  config.LLM_STRUCTURED_OUTPUT = args.structured
+  config.LOG_LEVEL = 'CRITICAL'
+  config.RULE_ENGINE_ENABLED = not args.no_rules
+  config.ANSWER_REUSE_ENABLED = not args.no_rules
+  config.RESULT_CACHE_ENABLED = not args.no_cache
+  config.TRANSLATION_CACHE_ENABLED = not args.no_cache
+  config.BREAKER_ENABLED = not args.no_breaker
+  config.EXECUTOR_ENABLED = False
+  config.LLM_POOL_SIZE = max(config.LLM_POOL_SIZE, max(args.users or [0]), args.max_in_flight)
+
+def run(args) -> Dict[str, Any]:
+  servers = []
+  if args.mock_url:
+    base_urls = args.mock_url.split(',')
+  else:
+    servers = [start_mock_server(seed = args.seed + i, **mock_options(args)) for i in range(args.backends)]
+    base_urls = [server.base_url for server in servers]
+  configure(args, base_urls)
+
+  from core.chatbot import BusinessAnalystChatbot
+  from core.circuit_breaker import get_breaker
+  pick = QueryPicker(load_queries(), args.seed)
+  open_loop = args.open_loop
+  loads = args.rates if open_loop else args.users
+
+  curves = {}
+  for mode in args.modes:
+    points = []
+    for load in loads:
+      # Fresh caches and closed circuits, so every point starts from the same state
+      bot = BusinessAnalystChatbot(lazy = True)
+      bot.warmup(load_model = False)
+      if config.BREAKER_ENABLED:
+        for url in base_urls:
+          get_breaker(url.rstrip('/')).reset()
+      mock_before = [server.stats() for server in servers]
+
+      process = lambda query: bot.process_vietnamese_query(query, mode)
+      if open_loop:
+        samples, wall, dropped = run_open_loop(process, pick, load, args.duration, args.max_in_flight, args.poisson, args.seed)
+      else:
+        samples, wall = run_closed_loop(process, pick, int(load), args.duration, args.think_ms / 1000)
+        dropped = 0
+
+      point = summarize(samples, wall, load)
+      point['dropped'] = dropped
+      if servers:
+        point['mock'] = {
+          key: sum(after[key] - before[key] for before, after in zip(mock_before, (server.stats() for server in servers)))
+          for key in ('requests', 'errors_injected', 'rejected')
+        }
+      points.append(point)
+      print(
+        f"{mode:>9} {'rate' if open_loop else 'users'}={load:<6g} {point['throughput_qps']:>8} q/s"
+        f"  p50 {point['p50_ms']} ms  p95 {point['p95_ms']} ms  p99 {point['p99_ms']} ms  errors {point['error_rate']}",
+        file = sys.stderr,
+      )
+    curves[mode] = {'points': points, 'saturation': find_saturation(points, open_loop)}
+
+  for server in servers:
+    server.shutdown()
+
+  return {
+    'benchmark': 'load',
+    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'settings': {
+      'loop': 'open' if open_loop else 'closed',
+      'duration_s': args.duration,
+      'poisson': args.poisson if open_loop else None,
+      'think_ms': None if open_loop else args.think_ms,
+      'structured': args.structured,
+      'stream': args.stream,
+      'scheduler': args.scheduler,
+      'rules': not args.no_rules,
+      'cache': not args.no_cache,
+      'breaker': not args.no_breaker,
+      'backends': base_urls,
+      'mock': None if args.mock_url else mock_options(args),
+    },
+    'curves': curves,
+  }
+
+def write_csv(path: str, report: Dict[str, Any]):
+  fields = ('mode', 'load', 'throughput_qps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate', 'dropped')
+  with open(path, 'w', newline = '', encoding = 'utf-8') as f:
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    for mode, curve in report['curves'].items():
+      for point in curve['points']:
+        writer.writerow([mode] + [point[field] for field in fields[1:]])
+
+def number_list(value: str) -> List[float]:
+  return [float(item) for item in value.split(',') if item]
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+  loop = parser.add_mutually_exclusive_group(required = True)
+  loop.add_argument('--closed-loop', action = 'store_true', help = 'N concurrent users per point')
+  loop.add_argument('--open-loop', action = 'store_true', help = 'Fixed arrival rate per point')
+  parser.add_argument('--users', type = number_list, default = [1, 2, 4, 8, 16, 32], help = 'Closed loop: users per point, comma separated')
+  parser.add_argument('--rates', type = number_list, default = [1, 2, 5, 10, 20, 50], help = 'Open loop: queries/s per point, comma separated')
+  parser.add_argument('--duration', type = float, default = 10.0, help = 'Seconds per point')
+  parser.add_argument('--think-ms', type = float, default = 0.0, help = 'Closed loop: pause between a user\'s queries')
+  parser.add_argument('--poisson', action = 'store_true', help = 'Open loop: exponential inter-arrival times instead of a fixed interval')
+  parser.add_argument('--max-in-flight', type = int, default = 256, help = 'Open loop: queries in flight before arrivals are dropped')
+  parser.add_argument('--modes', type = lambda value: value.split(','), default = ['translate'], help = 'Pipeline modes to compare, comma separated')
+  parser.add_argument('--structured', action = 'store_true', help = 'Request JSON structured output (LLM_STRUCTURED_OUTPUT)')
+  parser.add_argument('--stream', action = 'store_true', help = 'Stream generations (LLM_STREAM)')
+  parser.add_argument('--scheduler', action = 'store_true', help = 'Route LLM calls through the micro-batching scheduler')
+  parser.add_argument('--no-rules', action = 'store_true', help = 'Disable the rule engine and answer reuse')
+  parser.add_argument('--no-cache', action = 'store_true', help = 'Disable translation and result caches')
+  parser.add_argument('--no-breaker', action = 'store_true', help = 'Disable the circuit breaker')
+  parser.add_argument('--backends', type = int, default = 1, help = 'Mock Ollama servers to start')
+  parser.add_argument('--mock-url', help = 'Use running mock servers (comma separated) instead of starting them in-process')
+  parser.add_argument('--seed', type = int, default = 0)
+  parser.add_argument('--out', help = 'Write the JSON report here instead of stdout')
+  parser.add_argument('--csv', help = 'Also write the curve points as CSV')
+  add_mock_arguments(parser)
+  parser.set_defaults(latency_ms = 200.0, jitter_ms = 50.0, max_parallel = 1)
+  args = parser.parse_args()
+
+  report = run(args)
+  if args.csv:
+    write_csv(args.csv, report)
+  text = json.dumps(report, indent = 2, ensure_ascii = False)
+  if args.out:
+    Path(args.out).write_text(text + '\n', encoding = 'utf-8')
+  else:
+    print(text)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,357 @@
+"""Local stand-in for the Ollama /api/generate endpoint.
+
+Answers translation and function calling prompts from the bundled datasets
+after an injected delay, so the whole pipeline can be exercised offline.
+Supports streaming, latency distributions, error injection and the
+parallelism/queue limits of a single-GPU Ollama:
+
+  python benchmarks/mock_ollama.py --port 11435 --latency-ms 150 --jitter-ms 50
+  python benchmarks/mock_ollama.py --latency-dist lognormal --latency-ms 300 --jitter-ms 150 --ms-per-token 20 --max-parallel 4 --max-queue 32
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.cache import normalize_query
+from utils.parsers import FunctionCallParser
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DATASET_PATH = DATA_DIR / 'function_calling_dataset_10k_natural_time.csv'
+TEST_QUERIES_PATH = DATA_DIR / 'test_queries.json'
+
+_TRANSLATION_RE = re.compile(r'<\|im_start\|>user\n"(.*)"\n<\|im_end\|>', re.DOTALL)
+_QUERY_RE = re.compile(r'USER QUERY(?: \(Vietnamese\))?: (.*?)\n', re.DOTALL)
+
+def format_function_call(call: Dict) -> str:
+  params = ', '.join(f"{k}='{v}'" for k, v in call['parameters'].items())
+  return f"{call['name']}({params})"
+
+class MockAnswers:
+  """Lookup tables mapping queries to translations and function calls"""
+
+  def __init__(self):
+    self.translations: Dict[str, str] = {}
+    self.function_calls: Dict[str, str] = {}
+    self.parser = FunctionCallParser()
+
+    with open(TEST_QUERIES_PATH, 'r', encoding = 'utf-8') as f:
+      test_cases = json.load(f)['test_cases']
+    for cases in test_cases.values():
+      for case in cases:
+        call = format_function_call(case['expected_function_call'])
+        self.translations[normalize_query(case['vietnamese_query'])] = case['english_translation']
+        self.function_calls.setdefault(normalize_query(case['vietnamese_query']), call)
+        self.function_calls.setdefault(normalize_query(case['english_translation']), call)
+
+    # Queries without an English translation are "translated" to themselves
+    with open(DATASET_PATH, 'r', encoding = 'utf-8') as f:
+      for row in csv.DictReader(f):
+        self.function_calls.setdefault(normalize_query(row['query']), row['function_call'])
+
+  def respond_structured(self, prompt: str) -> str:
+    """Answer a prompt sent with a `format` schema: the call as a JSON object"""
+    call = self.parser.find(self.respond(prompt))
+    if call is None:
+      # Constrained decoding always yields an object; fall back to something schema-shaped
+      call = {'name': 'get', 'parameters': {}}
+    return json.dumps(call, ensure_ascii = False)
+
+  def respond(self, prompt: str) -> str:
+    match = _TRANSLATION_RE.search(prompt)
+    if match:
+      text = match.group(1)
+      return self.translations.get(normalize_query(text), text)
+
+    query_start = prompt.rfind('USER QUERY')
+    match = _QUERY_RE.match(prompt, query_start) if query_start != -1 else None
+    if match is None:
+      return "I'm sorry, I don't understand."
+
+    query = match.group(1).strip()
+    call = self.function_calls.get(normalize_query(query))
+    if call is None:
+      return "I'm sorry, I could not map this query to a function."
+    if prompt.rstrip().endswith('ENGLISH TRANSLATION:'):
+      return f"{self.translations.get(normalize_query(query), query)}\n{call}"
+    return call
+
+LATENCY_DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'exponential', 'constant')
+
+class MockOllamaServer(ThreadingHTTPServer):
+  """Mock /api/generate with injected latency, errors and the admission limits of a single-GPU Ollama.
+
+  Each request takes a base delay drawn from `latency_dist` around
+  `latency_ms` (spread `jitter_ms`) plus `ms_per_token` per response token.
+  At most `max_parallel` requests generate at once (OLLAMA_NUM_PARALLEL),
+  each slowed by `parallel_slowdown` per other request sharing the GPU.
+  At most `max_queue` wait for a slot (OLLAMA_MAX_QUEUE), and beyond that
+  the server answers 503. A share `error_rate` of requests fail with 500.
+  """
+
+  daemon_threads = True
+
+  def __init__(
+    self,
+    address: Tuple[str, int],
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    seed: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+    latency_dist: str = 'uniform',
+    ms_per_token: float = 0.0,
+    error_rate: float = 0.0,
+    max_queue: Optional[int] = None,
+    parallel_slowdown: float = 0.0,
+  ):
+    if latency_dist not in LATENCY_DISTRIBUTIONS:
+      raise ValueError(f"Unknown latency distribution: {latency_dist}")
+    super().__init__(address, MockOllamaHandler)
+    self.answers = MockAnswers()
+    self.latency_ms = latency_ms
+    self.jitter_ms = jitter_ms
+    self.latency_dist = latency_dist
+    self.ms_per_token = ms_per_token
+    self.error_rate = error_rate
+    self.max_queue = max_queue
+    self.parallel_slowdown = parallel_slowdown
+    self.random = random.Random(seed)
+    self.requests_served = 0
+    self.errors_injected = 0
+    self.rejected = 0
+    self.active = 0
+    self.waiting = 0
+    self._lock = threading.Lock()
+    # Like OLLAMA_NUM_PARALLEL: requests beyond the limit queue inside the server
+    self.max_parallel = max_parallel
+    self.slots = threading.BoundedSemaphore(max_parallel) if max_parallel else None
+
+  def delay(self) -> float:
+    """Base delay in seconds, before per-token time and GPU sharing"""
+    with self._lock:
+      self.requests_served += 1
+      mean, spread = self.latency_ms, self.jitter_ms
+      if self.latency_dist == 'uniform':
+        value = mean + (self.random.uniform(-spread, spread) if spread else 0.0)
+      elif self.latency_dist == 'normal':
+        value = self.random.gauss(mean, spread)
+      elif self.latency_dist == 'lognormal':
+        # Median `mean`; a long right tail like real generation times
+        value = mean * self.random.lognormvariate(0.0, spread / mean) if mean and spread else mean
+      elif self.latency_dist == 'exponential':
+        value = self.random.expovariate(1 / mean) if mean else 0.0
+      else:
+        value = mean
+    return max(0.0, value) / 1000
+
+  def inject_error(self) -> bool:
+    if not self.error_rate:
+      return False
+    with self._lock:
+      failed = self.random.random() < self.error_rate
+      self.errors_injected += failed
+    return failed
+
+  @contextmanager
+  def slot(self) -> Iterator[Optional[float]]:
+    """Hold a generation slot; yields the GPU-sharing slowdown factor, or None when the queue is full"""
+    if self.slots is None:
+      yield 1.0
+      return
+    with self._lock:
+      if self.max_queue is not None and self.active + self.waiting >= self.max_parallel + self.max_queue:
+        self.rejected += 1
+        full = True
+      else:
+        self.waiting += 1
+        full = False
+    if full:
+      yield None
+      return
+    with self.slots:
+      with self._lock:
+        self.waiting -= 1
+        self.active += 1
+        factor = 1.0 + self.parallel_slowdown * (self.active - 1)
+      try:
+        yield factor
+      finally:
+        with self._lock:
+          self.active -= 1
+
+  def stats(self) -> Dict[str, int]:
+    with self._lock:
+      return {
+        'requests': self.requests_served,
+        'errors_injected': self.errors_injected,
+        'rejected': self.rejected,
+        'active': self.active,
+        'waiting': self.waiting,
+      }
+
+  @property
+  def base_url(self) -> str:
+    host, port = self.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def handle_error(self, request, client_address):
+    # Clients dropping pooled keep-alive connections is expected under load
+    if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+      return
+    super().handle_error(request, client_address)
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  # Headers and body go out as separate writes; without this Nagle + delayed ACK add ~40ms
+  disable_nagle_algorithm = True
+
+  def log_message(self, format, *args):
+    pass
+
+  def _send_json(self, status: int, body: Dict):
+    data = json.dumps(body).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def do_POST(self):
+    length = int(self.headers.get('Content-Length', 0))
+    payload = json.loads(self.rfile.read(length) or b'{}')
+    if self.path != '/api/generate':
+      self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+      return
+
+    server = self.server
+    if payload.get('format'):
+      response = server.answers.respond_structured(payload.get('prompt', ''))
+    else:
+      response = server.answers.respond(payload.get('prompt', ''))
+    # Whitespace tokens stand in for real tokens
+    tokens = re.findall(r'\S+\s*', response) or ['']
+    delay = server.delay()
+
+    with server.slot() as factor:
+      if factor is None:
+        self._send_json(503, {'error': 'server busy, please try again. maximum pending requests exceeded'})
+        return
+      if server.inject_error():
+        time.sleep(delay * factor)
+        self._send_json(500, {'error': 'injected failure'})
+        return
+      token_delay = server.ms_per_token / 1000 * factor
+      if payload.get('stream'):
+        self._stream(payload, tokens, delay * factor, token_delay)
+        return
+      time.sleep(delay * factor + token_delay * len(tokens))
+
+    self._send_json(200, {
+      'model': payload.get('model'),
+      'response': response,
+      'done': True,
+      **self._usage(payload, tokens, delay * factor, token_delay),
+    })
+
+  @staticmethod
+  def _usage(payload: Dict, tokens: List[str], delay: float, token_delay: float) -> Dict[str, int]:
+    return {
+      'total_duration': int((delay + token_delay * len(tokens)) * 1e9),
+      'prompt_eval_count': len(payload.get('prompt', '').split()),
+      'prompt_eval_duration': int(delay * 1e9),
+      'eval_count': len(tokens),
+      'eval_duration': int(token_delay * len(tokens) * 1e9),
+    }
+
+  def _stream(self, payload: Dict, tokens: List[str], delay: float, token_delay: float):
+    """NDJSON over chunked encoding: the first token after `delay`, then one every `token_delay`"""
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/x-ndjson')
+    self.send_header('Transfer-Encoding', 'chunked')
+    self.end_headers()
+    time.sleep(delay)
+    try:
+      for i, token in enumerate(tokens):
+        if i:
+          time.sleep(token_delay)
+        self._write_chunk({'model': payload.get('model'), 'response': token, 'done': False})
+      self._write_chunk({'model': payload.get('model'), 'response': '', 'done': True, **self._usage(payload, tokens, delay, token_delay)})
+      self.wfile.write(b'0\r\n\r\n')
+    except (BrokenPipeError, ConnectionResetError):
+      # The client stopped reading early, as the streaming pipeline does once it has a complete answer
+      self.close_connection = True
+
+  def _write_chunk(self, body: Dict):
+    data = json.dumps(body).encode('utf-8') + b'\n'
+    self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+    self.wfile.flush()
+
+def start_mock_server(
+  host: str = '127.0.0.1',
+  port: int = 0,
+  latency_ms: float = 0.0,
+  jitter_ms: float = 0.0,
+  seed: Optional[int] = None,
+  max_parallel: Optional[int] = None,
+  **options,
+) -> MockOllamaServer:
+  """Start a mock server on a background thread; port 0 picks a free port.
+
+  `options` are the remaining MockOllamaServer arguments (latency_dist, error_rate, ...).
+  """
+  server = MockOllamaServer((host, port), latency_ms, jitter_ms, seed, max_parallel, **options)
+  threading.Thread(target = server.serve_forever, name = 'mock-ollama', daemon = True).start()
+  return server
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+  """Mock server options shared by the benchmarks"""
+  parser.add_argument('--latency-ms', type = float, default = 0.0, help = 'Mean (median for lognormal) base latency per LLM call')
+  parser.add_argument('--jitter-ms', type = float, default = 0.0, help = 'Spread of the latency distribution')
+  parser.add_argument('--latency-dist', choices = LATENCY_DISTRIBUTIONS, default = 'uniform')
+  parser.add_argument('--ms-per-token', type = float, default = 0.0, help = 'Generation time per response token')
+  parser.add_argument('--error-rate', type = float, default = 0.0, help = 'Share of requests answered with 500')
+  parser.add_argument('--max-parallel', type = int, default = None, help = 'Requests generated concurrently, the rest queue (OLLAMA_NUM_PARALLEL)')
+  parser.add_argument('--max-queue', type = int, default = None, help = 'Requests allowed to queue before 503 (OLLAMA_MAX_QUEUE)')
+  parser.add_argument('--parallel-slowdown', type = float, default = 0.0, help = 'Extra latency factor per other request sharing the GPU')
+
+def mock_options(args: argparse.Namespace) -> Dict:
+  return {
+    'latency_ms': args.latency_ms,
+    'jitter_ms': args.jitter_ms,
+    'max_parallel': args.max_parallel,
+    'latency_dist': args.latency_dist,
+    'ms_per_token': args.ms_per_token,
+    'error_rate': args.error_rate,
+    'max_queue': args.max_queue,
+    'parallel_slowdown': args.parallel_slowdown,
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description = 'Mock Ollama /api/generate server')
+  parser.add_argument('--host', default = '127.0.0.1')
+  parser.add_argument('--port', type = int, default = 11435)
+  parser.add_argument('--seed', type = int, default = None)
+  add_mock_arguments(parser)
+  args = parser.parse_args()
+
+  server = MockOllamaServer((args.host, args.port), seed = args.seed, **mock_options(args))
+  print(f"Mock Ollama listening on {server.base_url}")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+
+if __name__ == "__main__":
+  main()
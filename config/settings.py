@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from utils.date_utils import VietnamDateUtils
 
 @dataclass
 class Config:
@@ -8,13 +10,131 @@ class Config:
   LLM_MODEL: str = "llama2:7b"
   LLM_TEMPERATURE: float = 0.05
   LLM_MAX_TOKENS: int = 500
+  # How long Ollama keeps the model (and the cached prompt prefix) loaded
+  LLM_KEEP_ALIVE: str = "30m"
+
+  # Stream responses and stop once a complete answer has arrived
+  LLM_STREAM: bool = False
+
+  # Constrain function calling output to a JSON object derived from config/schema.json
+  # (Ollama `format` option); the bounded output needs far fewer tokens
+  LLM_STRUCTURED_OUTPUT: bool = False
+  LLM_STRUCTURED_MAX_TOKENS: int = 128
+
+  # Pipeline mode: "translate" (translate, then generate) or "direct" (one generation)
+  PIPELINE_MODE: str = "translate"
+
+  # LLM Transport Settings
+  LLM_CONNECT_TIMEOUT: float = 3.05
+  LLM_READ_TIMEOUT: float = 60.0
+  LLM_MAX_RETRIES: int = 2
+  LLM_RETRY_BACKOFF: float = 0.5
+  LLM_POOL_SIZE: int = 16
+
+  # Circuit Breaker Settings (one breaker per Ollama server)
+  BREAKER_ENABLED: bool = True
+  # The failure and slow-call rates are computed over the outcomes of the last BREAKER_WINDOW calls
+  BREAKER_WINDOW: int = 20
+  BREAKER_MIN_CALLS: int = 5
+  BREAKER_FAILURE_RATE: float = 0.5
+  BREAKER_SLOW_CALL_SECONDS: float = 30.0
+  BREAKER_SLOW_CALL_RATE: float = 0.8
+  # Open time before half-open probes; doubles after each failed probe up to the max
+  BREAKER_OPEN_SECONDS: float = 5.0
+  BREAKER_MAX_OPEN_SECONDS: float = 60.0
+  BREAKER_HALF_OPEN_PROBES: int = 1
+  # Relaxed rule engine / answer reuse thresholds used while the LLM is unavailable
+  BREAKER_FALLBACK_RULE_CONFIDENCE: float = 0.6
+  BREAKER_FALLBACK_REUSE_SIMILARITY: float = 0.75
+
+  # Micro-batching Scheduler Settings
+  SCHEDULER_ENABLED: bool = False
+  SCHEDULER_MAX_BATCH_SIZE: int = 8
+  SCHEDULER_MAX_WAIT_MS: float = 5.0
+  # Concurrent generations per Ollama server, match its OLLAMA_NUM_PARALLEL
+  SCHEDULER_MAX_IN_FLIGHT: int = 4
+  # Ollama servers to spread generations over; empty means [LLM_BASE_URL]
+  LLM_BASE_URLS: List[str] = field(default_factory = list)
+
+  # Translation Cache Settings
+  TRANSLATION_CACHE_ENABLED: bool = True
+  TRANSLATION_CACHE_SIZE: int = 10000
+  TRANSLATION_CACHE_TTL: float = 7 * 24 * 3600
+  TRANSLATION_CACHE_PATH: Optional[str] = None  # e.g. "data/cache/translations.sqlite3"
+
+  # Result Cache Settings
+  RESULT_CACHE_ENABLED: bool = True
+  RESULT_CACHE_SIZE: int = 10000
+
+  # Rule-based Fast Path Settings
+  RULE_ENGINE_ENABLED: bool = True
+  RULE_ENGINE_MIN_CONFIDENCE: float = 0.8
+  RULE_ENGINE_DEFAULT_DEPARTMENT: str = "finance"
+
+  # Few-shot Retrieval Settings
+  # Nearest dataset examples put into the prompt instead of the fixed ones; 0 disables
+  FEW_SHOT_EXAMPLES: int = 3
+  # Built offline with `python -m prompts.examples`
+  FEW_SHOT_INDEX_PATH: str = "data/index/examples"
+
+  # Answer Reuse Settings
+  # Reuse the function call of a near-duplicate dataset query (needs the few-shot index)
+  ANSWER_REUSE_ENABLED: bool = True
+  ANSWER_REUSE_MIN_SIMILARITY: float = 0.9
+
+  # Validation Settings
+  # Map near-miss values ("revenue" -> "cash_flow") onto the schema before rejecting a call
+  VALIDATOR_REPAIR_ENABLED: bool = True
+
+  # Function Executor Settings
+  EXECUTOR_ENABLED: bool = True
+  # SQLite file relative to the project root, or ":memory:"
+  EXECUTOR_DB_PATH: str = ":memory:"
+  # Seed an empty store with synthetic daily records at startup
+  EXECUTOR_SEED: bool = True
+  EXECUTOR_SEED_DAYS: int = 730
+  EXECUTOR_SEED_RECORDS_PER_DAY: int = 2
+  EXECUTOR_MAX_ROWS: int = 100
+  # Completed periods predict() forecasts from
+  EXECUTOR_PREDICT_HISTORY: int = 6
+
+  # Analytics Settings
+  # Forecast reported by predict(): moving_average, exponential_smoothing or linear_trend
+  ANALYTICS_FORECAST_METHOD: str = "linear_trend"
+  ANALYTICS_MOVING_AVERAGE_WINDOW: int = 3
+  ANALYTICS_SMOOTHING_ALPHA: float = 0.5
+
+  # Startup Settings
+  # Build components on first use instead of in the constructor; warmup() builds them all
+  STARTUP_LAZY: bool = False
+  # Schema and prompt parts compiled once per schema file hash; None compiles on every start
+  STARTUP_ARTIFACT_DIR: Optional[str] = "data/cache/startup"
+  # warmup() asks every Ollama server to load LLM_MODEL
+  STARTUP_WARMUP_MODEL: bool = True
+
+  # Batch Settings
+  BATCH_CONCURRENCY: int = 4
+
+  # Metrics Settings
+  METRICS_ENABLED: bool = True
+  # Sample the stacks of queries and keep a report of those slower than this; 0 disables
+  METRICS_SLOW_REQUEST_MS: float = 0.0
+  METRICS_PROFILE_INTERVAL_MS: float = 5.0
+  METRICS_SLOW_REQUESTS_KEPT: int = 20
+
+  # HTTP Server Settings (serve.py)
+  SERVER_HOST: str = "127.0.0.1"
+  SERVER_PORT: int = 8080
+  SERVER_WORKERS: int = 4
+  SERVER_QUEUE_SIZE: int = 64
+  SERVER_MAX_BATCH_SIZE: int = 100
+  SERVER_REQUEST_TIMEOUT: float = 120.0
+  SERVER_SHUTDOWN_TIMEOUT: float = 30.0
 
   @property
   def CURRENT_DATE(self) -> str:
     """Get current date in Vietnam timezone (UTC+7)"""
-    utc_now = datetime.utcnow()
-    vietnam_time = utc_now + timedelta(hours=7)
-    return vietnam_time.strftime('%Y-%m-%d')
+    return VietnamDateUtils.get_current_data()
   
   # Schema Settings
   SCHEMA_PATH: str = "config/schema.json"
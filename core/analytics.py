@@ -0,0 +1,154 @@
+import threading
+from datetime import date
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import config
+
+FORECAST_METHODS = ('moving_average', 'exponential_smoothing', 'linear_trend')
+
+# Days allocated beyond the newest bucket so that adds for the near future do not reallocate
+_GROWTH_DAYS = 366
+
+class BucketedSeries:
+  """Daily sum/count buckets of one (departments, content) pair with lazily rebuilt prefix sums.
+
+  add/remove touch a single bucket; the prefix sums are recomputed once on
+  the next read after a change, so any period total is two array lookups.
+  """
+
+  def __init__(self, first_day: int, last_day: int):
+    self.origin = first_day
+    size = last_day - first_day + 1 + _GROWTH_DAYS
+    self.sums = np.zeros(size, dtype = np.float64)
+    self.counts = np.zeros(size, dtype = np.int64)
+    self._prefix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+  def _ensure(self, day: int):
+    """Grow the buckets so that `day` (an ordinal) is covered"""
+    if day < self.origin:
+      pad = self.origin - day + _GROWTH_DAYS
+      self.sums = np.concatenate([np.zeros(pad), self.sums])
+      self.counts = np.concatenate([np.zeros(pad, dtype = np.int64), self.counts])
+      self.origin -= pad
+    elif day - self.origin >= len(self.sums):
+      pad = day - self.origin - len(self.sums) + 1 + _GROWTH_DAYS
+      self.sums = np.concatenate([self.sums, np.zeros(pad)])
+      self.counts = np.concatenate([self.counts, np.zeros(pad, dtype = np.int64)])
+
+  def load(self, days: np.ndarray, counts: np.ndarray, sums: np.ndarray):
+    """Accumulate pre-aggregated buckets (ordinals, counts, sums)"""
+    self._ensure(int(days.min()))
+    self._ensure(int(days.max()))
+    np.add.at(self.counts, days - self.origin, counts)
+    np.add.at(self.sums, days - self.origin, sums)
+    self._prefix = None
+
+  def add(self, day: int, value: float, count: int = 1):
+    self._ensure(day)
+    self.sums[day - self.origin] += value
+    self.counts[day - self.origin] += count
+    self._prefix = None
+
+  def prefix(self) -> Tuple[np.ndarray, np.ndarray]:
+    prefix = self._prefix
+    if prefix is None:
+      # Leading zero so that total(start, end) = prefix[end + 1] - prefix[start]
+      prefix = self._prefix = (
+        np.concatenate([[0.0], np.cumsum(self.sums)]),
+        np.concatenate([[0], np.cumsum(self.counts)]),
+      )
+    return prefix
+
+  def totals(self, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(counts, sums) of many inclusive ordinal ranges at once"""
+    sums, counts = self.prefix()
+    size = len(self.sums)
+    lo = np.clip(starts - self.origin, 0, size)
+    hi = np.clip(ends - self.origin + 1, 0, size)
+    hi = np.maximum(hi, lo)
+    return counts[hi] - counts[lo], sums[hi] - sums[lo]
+
+def moving_average(history: np.ndarray, window: int) -> float:
+  return float(history[-window:].mean())
+
+def exponential_smoothing(history: np.ndarray, alpha: float) -> float:
+  """Simple exponential smoothing level after the last period, as one weighted sum"""
+  n = len(history)
+  weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1, dtype = np.float64)
+  # The first observation seeds the level and keeps the remaining weight
+  weights[0] = (1 - alpha) ** (n - 1)
+  return float(weights @ history)
+
+def linear_trend(history: np.ndarray, steps_ahead: int) -> Tuple[float, float]:
+  """Least-squares line through the history, evaluated `steps_ahead` periods after the last one"""
+  x = np.arange(len(history), dtype = np.float64)
+  x_centered = x - x.mean()
+  variance = float(x_centered @ x_centered)
+  slope = float(x_centered @ (history - history.mean())) / variance if variance else 0.0
+  return float(history.mean() + slope * (len(history) - 1 + steps_ahead - x.mean())), slope
+
+def forecast(history: np.ndarray, steps_ahead: int = 1) -> Dict[str, float]:
+  """Every forecast of the next period, clipped at zero, plus the fitted slope"""
+  window = min(config.ANALYTICS_MOVING_AVERAGE_WINDOW, len(history))
+  trend, slope = linear_trend(history, steps_ahead)
+  return {
+    'moving_average': max(0.0, moving_average(history, window)),
+    'exponential_smoothing': max(0.0, exponential_smoothing(history, config.ANALYTICS_SMOOTHING_ALPHA)),
+    'linear_trend': max(0.0, trend),
+    'slope': slope,
+  }
+
+def period_over_period(current: float, previous: float) -> Dict[str, Optional[float]]:
+  change = current - previous
+  return {'change': change, 'change_pct': round(change / previous * 100, 2) if previous else None}
+
+class AnalyticsIndex:
+  """Daily buckets per (departments, content) that answer period totals without touching raw rows"""
+
+  def __init__(self):
+    self._series: Dict[Tuple[str, str], BucketedSeries] = {}
+    self._lock = threading.Lock()
+
+  def rebuild(self, buckets: Iterable[Tuple[str, str, str, int, float]]):
+    """Replace every series from (departments, content, YYYY-MM-DD, count, sum) rows, e.g. a GROUP BY"""
+    grouped: Dict[Tuple[str, str], List[Tuple[int, int, float]]] = {}
+    for department, content, day, count, total in buckets:
+      grouped.setdefault((department, content), []).append((date.fromisoformat(day).toordinal(), count, total or 0.0))
+
+    series = {}
+    for key, rows in grouped.items():
+      days, counts, sums = (np.array(column) for column in zip(*rows))
+      series[key] = BucketedSeries(int(days.min()), int(days.max()))
+      series[key].load(days.astype(np.int64), counts.astype(np.int64), sums.astype(np.float64))
+    with self._lock:
+      self._series = series
+
+  def add(self, departments: str, content: str, day: date, value: Optional[float], count: int = 1):
+    """Record (count > 0) or remove (count < 0, negated value) records of one day"""
+    with self._lock:
+      series = self._series.get((departments, content))
+      if series is None:
+        series = self._series[(departments, content)] = BucketedSeries(day.toordinal(), day.toordinal())
+      series.add(day.toordinal(), value or 0.0, count)
+
+  def remove(self, departments: str, content: str, day: date, value: Optional[float]):
+    self.add(departments, content, day, -(value or 0.0), -1)
+
+  def period_totals(self, departments: str, content: str, periods: List[Tuple[date, date]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(counts, sums) per period, in the order given"""
+    starts = np.array([start.toordinal() for start, _ in periods], dtype = np.int64)
+    ends = np.array([end.toordinal() for _, end in periods], dtype = np.int64)
+    with self._lock:
+      series = self._series.get((departments, content))
+      if series is None:
+        return np.zeros(len(periods), dtype = np.int64), np.zeros(len(periods))
+      return series.totals(starts, ends)
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      return {
+        'series': len(self._series),
+        'buckets': sum(len(series.sums) for series in self._series.values()),
+      }
@@ -0,0 +1,72 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from config.settings import config
+from core.rule_engine import RuleBasedIntentEngine
+from prompts.examples import ExampleIndex
+from utils.cache import normalize_query
+from utils.parsers import FunctionCallParser
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReuseMatch:
+  function_call: Dict[str, Any]
+  similarity: float
+  example_query: str
+
+class AnswerReuse:
+  """Answers queries that (nearly) repeat a dataset query with that query's function call.
+
+  Lookup is a normalized exact match first, then the n-gram TF-IDF nearest
+  neighbour from the few-shot index. Dataset labels carry the dates of the
+  day they were generated, so the time fields are re-resolved from the
+  incoming query, defaulting to today like the rule engine when it names no
+  time. A query whose time words cannot be resolved is not reused.
+  """
+
+  def __init__(self, index: ExampleIndex, rule_engine: RuleBasedIntentEngine, min_similarity: Optional[float] = None):
+    self.index = index
+    self.rule_engine = rule_engine
+    self.min_similarity = config.ANSWER_REUSE_MIN_SIMILARITY if min_similarity is None else min_similarity
+    self.parser = FunctionCallParser()
+    self._exact = {normalize_query(query): row for row, query in enumerate(index.queries)}
+    self._calls: Dict[int, Optional[Dict[str, Any]]] = {}
+    self._lock = threading.Lock()
+
+  def _call_for(self, row: int) -> Optional[Dict[str, Any]]:
+    """Parsed dataset call for a row, parsed once"""
+    with self._lock:
+      if row not in self._calls:
+        self._calls[row] = self.parser.find(self.index.function_calls[row])
+      call = self._calls[row]
+    return {'name': call['name'], 'parameters': dict(call['parameters'])} if call is not None else None
+
+  def lookup(self, vietnamese_text: str, min_similarity: Optional[float] = None) -> Optional[ReuseMatch]:
+    """`min_similarity` overrides the configured threshold"""
+    row = self._exact.get(normalize_query(vietnamese_text))
+    similarity = 1.0
+    if row is None:
+      hits = self.index.search(vietnamese_text, 1)
+      if not hits or hits[0][0] < (self.min_similarity if min_similarity is None else min_similarity):
+        return None
+      similarity, row = hits[0]
+
+    function_call = self._call_for(row)
+    if function_call is None:
+      return None
+
+    time, resolved = self.rule_engine.resolve_time(vietnamese_text)
+    if not resolved:
+      logger.debug(f"Not reusing '{self.index.queries[row]}': unresolved time expression")
+      return None
+    parameters = function_call['parameters']
+    parameters['type_of_time'], parameters['specific_time'] = time
+
+    record_id = self.rule_engine.extract_id(vietnamese_text)
+    if record_id is not None and 'id' in parameters:
+      parameters['id'] = record_id
+
+    return ReuseMatch(function_call, round(similarity, 4), self.index.queries[row])
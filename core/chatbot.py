@@ -1,28 +1,153 @@
-import json
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Deque, Iterable, Iterator, List, Optional, Tuple
 
-from core.translator import Translator
-from core.llm_handler import LLMHandler
+from core.circuit_breaker import is_llm_unavailable
+from core.metrics import metrics
+from core.result_cache import FunctionCallCache
+from core.rule_engine import RuleBasedIntentEngine
+from core.startup import load_compiled_schema
 from config.settings import config
 from utils.validators import SchemaValidator
 
+PIPELINE_MODES = ('translate', 'direct')
+
+# Queries process_stream reads ahead per worker, so a slow query does not idle the others
+STREAM_READ_AHEAD = 4
+
+class _Component:
+  """Chatbot attribute built by the owner's `_build_<name>` method on first access.
+
+  The built value is stored in the instance dict, which shadows this
+  (non-data) descriptor, so later accesses are plain attribute lookups.
+  """
+
+  def __set_name__(self, owner, name: str):
+    self.name = name
+
+  def __get__(self, bot, owner = None):
+    if bot is None:
+      return self
+    with bot._init_lock:
+      if self.name not in bot.__dict__:
+        start = time.perf_counter()
+        bot.__dict__[self.name] = getattr(bot, f"_build_{self.name}")()
+        bot.init_timings[self.name] = round((time.perf_counter() - start) * 1000, 3)
+      return bot.__dict__[self.name]
+
 class BusinessAnalystChatbot:
-  def __init__(self):
+  COMPONENTS = ('validator', 'rule_engine', 'result_cache', 'translator', 'llm_handler', 'answer_reuse', 'executor')
+
+  translator = _Component()
+  llm_handler = _Component()
+  validator = _Component()
+  rule_engine = _Component()
+  result_cache = _Component()
+  answer_reuse = _Component()
+  executor = _Component()
+
+  def __init__(self, lazy: Optional[bool] = None):
+    """With `lazy` (default config.STARTUP_LAZY) components are built on first use; warmup() builds them all"""
     # Setup logging
     self.logger = self._setup_logging()
+    self._init_lock = threading.RLock()
+    self.init_timings: Dict[str, float] = {}
 
-    # Load schema
-    self.schema = self._load_schema()
+    # Load schema and the prompt parts compiled from it
+    self.schema, self._compiled_prompt, self.schema_version = load_compiled_schema(self._schema_path())
 
-    # Initialize components
-    self.translator = Translator()
-    self.llm_handler = LLMHandler()
-    self.validator = SchemaValidator(self.schema)
+    if not (config.STARTUP_LAZY if lazy is None else lazy):
+      for name in self.COMPONENTS:
+        getattr(self, name)
 
     self.logger.info("BusinessAnalystChatbot initialized")
 
+  def _build_translator(self):
+    from core.translator import Translator
+    return Translator(transport = self._transport())
+
+  def _build_llm_handler(self):
+    from core.llm_handler import LLMHandler
+    from prompts.templates import get_prompt_builder
+    # Registers the builder for this schema from the compiled parts, so nothing is re-rendered
+    get_prompt_builder(self.schema, self._compiled_prompt)
+    return LLMHandler(transport = self._transport())
+
+  def _build_validator(self) -> SchemaValidator:
+    return SchemaValidator(self.schema)
+
+  def _build_rule_engine(self) -> Optional[RuleBasedIntentEngine]:
+    return RuleBasedIntentEngine(self.schema) if config.RULE_ENGINE_ENABLED else None
+
+  def _build_result_cache(self) -> Optional[FunctionCallCache]:
+    return FunctionCallCache(self.schema_version) if config.RESULT_CACHE_ENABLED else None
+
+  def _build_answer_reuse(self):
+    if not config.ANSWER_REUSE_ENABLED:
+      return None
+    from core.answer_reuse import AnswerReuse
+    from prompts.examples import get_example_index
+    index = get_example_index()
+    if index is None:
+      return None
+    return AnswerReuse(index, self.rule_engine or RuleBasedIntentEngine(self.schema))
+
+  def _build_executor(self):
+    if not config.EXECUTOR_ENABLED:
+      return None
+    from core.function_executor import FunctionExecutor
+    # Bulk-loads the seed data, the slowest part of startup
+    return FunctionExecutor(self.schema)
+
+  @staticmethod
+  def _transport():
+    if not config.SCHEDULER_ENABLED:
+      return None
+    from core.scheduler import get_scheduler
+    return get_scheduler()
+
+  def warmup(self, load_model: Optional[bool] = None) -> Dict[str, Any]:
+    """Build every component and render the per-day prompt parts ahead of the first query.
+
+    With `load_model` (default config.STARTUP_WARMUP_MODEL) every Ollama
+    server is also asked to load the model and keep it for LLM_KEEP_ALIVE.
+    A server that cannot be reached is logged, not raised.
+    """
+    for name in self.COMPONENTS:
+      getattr(self, name)
+
+    from prompts.templates import get_prompt_builder
+    get_prompt_builder(self.schema, self._compiled_prompt).prefix()
+    if self.rule_engine is not None:
+      self.rule_engine.match("xem báo cáo hôm nay")
+    if self.result_cache is not None:
+      self.result_cache.get('', config.PIPELINE_MODE)
+
+    report: Dict[str, Any] = {'components_ms': dict(self.init_timings), 'models': {}}
+    if config.STARTUP_WARMUP_MODEL if load_model is None else load_model:
+      report['models'] = self._load_model()
+    self.logger.info(f"Warmed up: {report}")
+    return report
+
+  def _load_model(self) -> Dict[str, Optional[float]]:
+    """Ollama loads the model on a generate request without a prompt; None marks an unreachable server"""
+    from core.transport import get_transport
+    payload = {'model': config.LLM_MODEL, 'keep_alive': config.LLM_KEEP_ALIVE}
+    loaded = {}
+    for base_url in config.LLM_BASE_URLS or [config.LLM_BASE_URL]:
+      start = time.perf_counter()
+      try:
+        get_transport(base_url).generate(payload, label = 'warmup')
+        loaded[base_url] = round((time.perf_counter() - start) * 1000, 3)
+      except Exception as e:
+        self.logger.warning(f"Could not load {config.LLM_MODEL} on {base_url}: {e}")
+        loaded[base_url] = None
+    return loaded
+
   def _setup_logging(self):
     logging.basicConfig(
       level = getattr(logging, config.LOG_LEVEL),
@@ -30,43 +155,293 @@ class BusinessAnalystChatbot:
     )
     return logging.getLogger(__name__)
     
-  def _load_schema(self) -> list:
-    schema_path = Path(__file__).parent.parent / config.SCHEMA_PATH
-    with open(schema_path, 'r', encoding = 'utf-8') as f:
-      return json.load(f)
-    
-  def process_vietnamese_query(self, vietnamese_input: str) -> Dict[str, Any]:
-    """Main processing pipeline"""
+  def _schema_path(self) -> Path:
+    return Path(__file__).parent.parent / config.SCHEMA_PATH
+
+  def process_vietnamese_query(self, vietnamese_input: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Main processing pipeline.
+
+    `mode` selects the LLM pipeline: 'translate' (translate, then generate)
+    or 'direct' (one generation from the Vietnamese query). Defaults to
+    config.PIPELINE_MODE.
+    """
+    with metrics.track_request(vietnamese_input) as outcome:
+      outcome['result'] = self._process_query(vietnamese_input, mode)
+    return outcome['result']
+
+  def _process_query(self, vietnamese_input: str, mode: Optional[str]) -> Dict[str, Any]:
+    mode = mode or config.PIPELINE_MODE
     try:
       self.logger.info(f"Processing query: {vietnamese_input}")
+      if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode: {mode}")
 
-      # Step 1: Translate to English
-      english_query = self.translator.vietnamese_to_english(vietnamese_input)
-      self.logger.debug(f"Translated: {english_query}")
+      # Step 0: Result cache, valid for the current Vietnam day and schema
+      if self.result_cache is not None:
+        with metrics.stage('cache'):
+          cached = self.result_cache.get(vietnamese_input, mode)
+        if cached is not None:
+          cached['vietnamese_query'] = vietnamese_input
+          cached['resolved_by'] = 'cache'
+          return cached
 
-      # Step 2: Generate function call
-      function_call = self.llm_handler.generate_function_call(
-        english_query,
-        self.schema
-      )
+      # Rule-based fast path, skips both LLM calls for common queries
+      with metrics.stage('rules'):
+        fast_result = self._try_rule_engine(vietnamese_input)
+      if fast_result is not None:
+        self._cache_result(vietnamese_input, mode, fast_result)
+        return fast_result
+
+      # Near-duplicate of a dataset query: reuse its function call
+      with metrics.stage('reuse'):
+        reuse_result = self._try_answer_reuse(vietnamese_input)
+      if reuse_result is not None:
+        self._cache_result(vietnamese_input, mode, reuse_result)
+        return reuse_result
+
+      try:
+        function_call, english_query = self._generate_call(vietnamese_input, mode)
+      except Exception as e:
+        if not is_llm_unavailable(e):
+          raise
+        return self._fallback_result(vietnamese_input, e)
       self.logger.debug(f"Function call: {function_call}")
 
-      # Step 3: Validate function call
-      self.validator.validate_function_call(function_call)
+      # Step 3: Repair near-miss values, then validate function call
+      with metrics.stage('validate'):
+        if config.VALIDATOR_REPAIR_ENABLED:
+          function_call, repairs = self.validator.repair_function_call(function_call)
+          if repairs:
+            self.logger.debug(f"Repaired function call: {', '.join(repairs)}")
+        self.validator.validate_function_call(function_call)
 
-      return {
+      result = {
         'success': True,
         'vietnamese_query': vietnamese_input,
         'english_query': english_query,
         'function_call': function_call,
+        'resolved_by': 'llm',
       }
+      self._cache_result(vietnamese_input, mode, result)
+      return result
     
     except Exception as e:
       self.logger.error(f"Error processing query: {e}")
-      return {
-        'success': False,
-        'error': str(e),
-        'vietnamese_query': vietnamese_input,
-        'english_query': None,
-        'function_call': None,
-      }
\ No newline at end of file
+      return self._failure_result(vietnamese_input, e)
+
+  def _generate_call(self, vietnamese_input: str, mode: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """(function call, English query) from the LLM"""
+    if mode == 'direct':
+      # Steps 1+2 in a single generation; the translation is only requested for debugging
+      return self.llm_handler.generate_direct_function_call(
+        vietnamese_input,
+        self.schema,
+        with_translation = config.DEBUG
+      )
+
+    # Step 1: Translate to English
+    with metrics.stage('translate'):
+      english_query = self.translator.vietnamese_to_english(vietnamese_input)
+    self.logger.debug(f"Translated: {english_query}")
+
+    # Step 2: Generate function call
+    function_call = self.llm_handler.generate_function_call(
+      english_query,
+      self.schema,
+      vietnamese_query = vietnamese_input
+    )
+    return function_call, english_query
+
+  def _fallback_result(self, vietnamese_input: str, error: Exception) -> Dict[str, Any]:
+    """The LLM is unavailable: retry the rule engine and answer reuse with relaxed thresholds, else fail at once.
+
+    Fallback answers are not cached, so the query gets a full answer once the LLM is back.
+    """
+    self.logger.warning(f"LLM unavailable, falling back: {error}")
+    with metrics.stage('fallback'):
+      result = (
+        self._try_rule_engine(vietnamese_input, config.BREAKER_FALLBACK_RULE_CONFIDENCE)
+        or self._try_answer_reuse(vietnamese_input, config.BREAKER_FALLBACK_REUSE_SIMILARITY)
+      )
+    if result is None:
+      return self._failure_result(vietnamese_input, error)
+    result['resolved_by'] += '_fallback'
+    return result
+
+  def _cache_result(self, vietnamese_input: str, mode: str, result: Dict[str, Any]):
+    if self.result_cache is not None:
+      self.result_cache.set(vietnamese_input, mode, result)
+
+  def _try_rule_engine(self, vietnamese_input: str, min_confidence: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Resolve the query without the LLM when the rule engine is confident enough"""
+    if self.rule_engine is None:
+      return None
+
+    match = self.rule_engine.match(vietnamese_input)
+    min_confidence = config.RULE_ENGINE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    if match is None or match.confidence < min_confidence:
+      return None
+
+    try:
+      self.validator.validate_function_call(match.function_call)
+    except ValueError as e:
+      self.logger.debug(f"Rule engine result rejected, falling back to LLM: {e}")
+      return None
+
+    self.logger.debug(f"Rule engine function call ({match.confidence}): {match.function_call}")
+    return {
+      'success': True,
+      'vietnamese_query': vietnamese_input,
+      'english_query': None,
+      'function_call': match.function_call,
+      'resolved_by': 'rules',
+    }
+
+  def _try_answer_reuse(self, vietnamese_input: str, min_similarity: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Resolve the query from the closest dataset example when it is similar enough"""
+    if self.answer_reuse is None:
+      return None
+
+    match = self.answer_reuse.lookup(vietnamese_input, min_similarity)
+    if match is None:
+      return None
+
+    function_call = match.function_call
+    if config.VALIDATOR_REPAIR_ENABLED:
+      function_call, _ = self.validator.repair_function_call(function_call)
+    if not self.validator.is_valid(function_call):
+      self.logger.debug(f"Reused function call rejected, falling back to LLM: {function_call}")
+      return None
+
+    self.logger.debug(f"Reused function call of '{match.example_query}' ({match.similarity}): {function_call}")
+    return {
+      'success': True,
+      'vietnamese_query': vietnamese_input,
+      'english_query': None,
+      'function_call': function_call,
+      'resolved_by': 'reuse',
+    }
+
+  def execute_function_call(self, function_call: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a function call from a successful result against the local store"""
+    if self.executor is None:
+      raise RuntimeError("Function executor is disabled (EXECUTOR_ENABLED)")
+    with metrics.stage('execute'):
+      return self.executor.execute_call(function_call)
+
+  def get_llm_stats(self) -> Dict[str, Dict[str, Any]]:
+    """Per-call latency statistics of the LLM transport"""
+    return self.llm_handler.transport.stats()
+
+  def get_cache_stats(self) -> Dict[str, Any]:
+    """Hit/miss/eviction counters of the pipeline caches"""
+    stats = {}
+    if self.translator.cache is not None:
+      stats['translation'] = self.translator.cache.stats()
+    if self.result_cache is not None:
+      stats['result'] = self.result_cache.stats()
+    return stats
+
+  def get_metrics(self) -> Dict[str, Any]:
+    """Snapshot of the in-process pipeline metrics"""
+    return metrics.snapshot()
+
+  def _failure_result(self, vietnamese_input: str, error: Exception) -> Dict[str, Any]:
+    """Build the result returned for a failed query"""
+    return {
+      'success': False,
+      'error': str(error),
+      'vietnamese_query': vietnamese_input,
+      'english_query': None,
+      'function_call': None,
+      'resolved_by': None,
+    }
+
+  def process_isolated(self, vietnamese_input: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Process one query, returning a failure result instead of raising; for batches and worker pools"""
+    try:
+      return self.process_vietnamese_query(vietnamese_input, mode)
+    except Exception as e:
+      self.logger.error(f"Error processing batch query: {e}")
+      return self._failure_result(vietnamese_input, e)
+
+  def process_batch(
+    self,
+    queries: Iterable[str],
+    concurrency: Optional[int] = None,
+    mode: Optional[str] = None,
+  ) -> List[Dict[str, Any]]:
+    """Process many queries concurrently, results are returned in input order"""
+    queries = list(queries)
+    if not queries:
+      return []
+
+    concurrency = max(1, min(concurrency or config.BATCH_CONCURRENCY, len(queries)))
+    if concurrency == 1:
+      return [self.process_isolated(query, mode) for query in queries]
+
+    with ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = 'chatbot-batch') as executor:
+      return list(executor.map(lambda query: self.process_isolated(query, mode), queries))
+
+  def process_stream(
+    self,
+    queries: Iterable[str],
+    concurrency: Optional[int] = None,
+    mode: Optional[str] = None,
+  ) -> Iterator[Dict[str, Any]]:
+    """Process queries concurrently as they are read, yielding results in input order.
+
+    At most STREAM_READ_AHEAD x `concurrency` queries are in flight, so
+    memory stays flat however long the input is.
+    """
+    concurrency = max(1, concurrency or config.BATCH_CONCURRENCY)
+    if concurrency == 1:
+      for query in queries:
+        yield self.process_isolated(query, mode)
+      return
+
+    window = concurrency * STREAM_READ_AHEAD
+    pending: Deque[Future] = deque()
+    executor = ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = 'chatbot-stream')
+    try:
+      for query in queries:
+        pending.append(executor.submit(self.process_isolated, query, mode))
+        if len(pending) >= window:
+          yield pending.popleft().result()
+      while pending:
+        yield pending.popleft().result()
+    finally:
+      # The consumer may stop early; drop the queries that have not started
+      for future in pending:
+        future.cancel()
+      executor.shutdown(wait = True)
+
+  async def aprocess_vietnamese_query(self, vietnamese_input: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Asyncio variant of process_vietnamese_query"""
+    import asyncio
+    return await asyncio.to_thread(self.process_isolated, vietnamese_input, mode)
+
+  async def aprocess_batch(
+    self,
+    queries: Iterable[str],
+    concurrency: Optional[int] = None,
+    mode: Optional[str] = None,
+  ) -> List[Dict[str, Any]]:
+    """Asyncio variant of process_batch with at most `concurrency` queries in flight"""
+    import asyncio
+    queries = list(queries)
+    if not queries:
+      return []
+
+    concurrency = max(1, min(concurrency or config.BATCH_CONCURRENCY, len(queries)))
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    # Dedicated pool so the bound is not capped by the loop's default executor
+    with ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = 'chatbot-abatch') as executor:
+      async def run_one(query: str) -> Dict[str, Any]:
+        async with semaphore:
+          return await loop.run_in_executor(executor, self.process_isolated, query, mode)
+
+      # gather keeps input order; each query is already isolated from the others
+      return list(await asyncio.gather(*(run_one(query) for query in queries)))
\ No newline at end of file
@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+from config.settings import config
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitOpenError(RuntimeError):
+  """Raised instead of calling a backend whose circuit is open"""
+
+  def __init__(self, name: str, retry_in: float):
+    super().__init__(f"LLM backend {name} is unavailable (circuit open), retry in {retry_in:.1f}s")
+    self.name = name
+    self.retry_in = retry_in
+
+def is_llm_unavailable(error: BaseException) -> bool:
+  """Whether a failed LLM call means the server cannot answer right now.
+
+  That is an open circuit, a refused or timed out connection, or a 5xx/429
+  response. Other HTTP errors (404 unknown model, 400 bad payload) and
+  malformed responses are configuration bugs and must surface instead.
+  """
+  if isinstance(error, CircuitOpenError):
+    return True
+  # Imported here so that importing the chatbot does not pull in requests
+  import requests
+  if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+    return True
+  if isinstance(error, requests.HTTPError) and error.response is not None:
+    status = error.response.status_code
+    return status >= 500 or status == 429
+  return False
+
+class CircuitBreaker:
+  """Error-rate and latency circuit breaker for one Ollama server.
+
+  Closed: calls pass, and the outcomes of the last `window` calls are kept.
+  The circuit opens when at least `min_calls` outcomes are recorded and
+  either the failure rate or the rate of calls slower than
+  `slow_call_seconds` reaches its threshold.
+
+  Open: calls fail at once with CircuitOpenError for `open_seconds`.
+
+  Half-open: up to `half_open_probes` calls go through. If they all succeed
+  the circuit closes with a fresh window. A failed probe reopens it for
+  twice as long as before, up to `max_open_seconds`.
+  """
+
+  def __init__(
+    self,
+    name: str,
+    window: Optional[int] = None,
+    min_calls: Optional[int] = None,
+    failure_rate: Optional[float] = None,
+    slow_call_seconds: Optional[float] = None,
+    slow_call_rate: Optional[float] = None,
+    open_seconds: Optional[float] = None,
+    max_open_seconds: Optional[float] = None,
+    half_open_probes: Optional[int] = None,
+  ):
+    self.name = name
+    self.min_calls = config.BREAKER_MIN_CALLS if min_calls is None else min_calls
+    self.failure_rate = config.BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+    self.slow_call_seconds = config.BREAKER_SLOW_CALL_SECONDS if slow_call_seconds is None else slow_call_seconds
+    self.slow_call_rate = config.BREAKER_SLOW_CALL_RATE if slow_call_rate is None else slow_call_rate
+    self.base_open_seconds = config.BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+    self.max_open_seconds = config.BREAKER_MAX_OPEN_SECONDS if max_open_seconds is None else max_open_seconds
+    self.half_open_probes = config.BREAKER_HALF_OPEN_PROBES if half_open_probes is None else half_open_probes
+
+    self._lock = threading.Lock()
+    # (failed, slow) per call
+    self._outcomes: deque = deque(maxlen = window or config.BREAKER_WINDOW)
+    self._state = CLOSED
+    self._open_seconds = self.base_open_seconds
+    self._opened_at = 0.0
+    self._probes_in_flight = 0
+    self._probes_passed = 0
+    self.rejected = 0
+    self.opened = 0
+
+  def _transition(self, state: str):
+    """Caller holds the lock"""
+    if state == self._state:
+      return
+    logger.warning(f"Circuit of {self.name}: {self._state} -> {state}")
+    self._state = state
+    if state == OPEN:
+      self._opened_at = time.monotonic()
+      self.opened += 1
+    elif state == HALF_OPEN:
+      self._probes_in_flight = self._probes_passed = 0
+    else:
+      self._outcomes.clear()
+      self._open_seconds = self.base_open_seconds
+    metrics.inc('chatbot_llm_breaker_transitions_total', backend = self.name, state = state)
+
+  def _refresh(self) -> str:
+    """Caller holds the lock; moves an expired open circuit to half-open"""
+    if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+      self._transition(HALF_OPEN)
+    return self._state
+
+  @property
+  def state(self) -> str:
+    with self._lock:
+      return self._refresh()
+
+  def _retry_in(self) -> float:
+    return max(0.0, self._opened_at + self._open_seconds - time.monotonic()) if self._state == OPEN else 0.0
+
+  @property
+  def retry_in(self) -> float:
+    """Seconds until an open circuit lets a probe through"""
+    with self._lock:
+      self._refresh()
+      return self._retry_in()
+
+  @property
+  def available(self) -> bool:
+    """Whether a call would be let through now; does not reserve a probe"""
+    with self._lock:
+      state = self._refresh()
+      return state == CLOSED or (state == HALF_OPEN and self._probes_in_flight < self.half_open_probes)
+
+  def before_call(self):
+    """Admit a call or raise CircuitOpenError; every admitted call must be followed by record()"""
+    with self._lock:
+      state = self._refresh()
+      if state == CLOSED:
+        return
+      if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+        self._probes_in_flight += 1
+        return
+      self.rejected += 1
+      retry_in = self._retry_in()
+    metrics.inc('chatbot_llm_breaker_rejected_total', backend = self.name)
+    raise CircuitOpenError(self.name, retry_in)
+
+  def record(self, seconds: float, error: bool):
+    with self._lock:
+      if self._state == HALF_OPEN:
+        self._probes_in_flight = max(0, self._probes_in_flight - 1)
+        if error:
+          self._open_seconds = min(self._open_seconds * 2, self.max_open_seconds)
+          self._transition(OPEN)
+        else:
+          self._probes_passed += 1
+          if self._probes_passed >= self.half_open_probes:
+            self._transition(CLOSED)
+        return
+      if self._state == OPEN:
+        # A call admitted before the circuit opened
+        return
+
+      self._outcomes.append((error, seconds >= self.slow_call_seconds))
+      if len(self._outcomes) < self.min_calls:
+        return
+      failures = sum(failed for failed, _ in self._outcomes)
+      slow = sum(is_slow for _, is_slow in self._outcomes)
+      if failures >= self.failure_rate * len(self._outcomes) or slow >= self.slow_call_rate * len(self._outcomes):
+        self._transition(OPEN)
+
+  def reset(self):
+    with self._lock:
+      self._transition(CLOSED)
+      self._outcomes.clear()
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      state = self._refresh()
+      outcomes = list(self._outcomes)
+      return {
+        'state': state,
+        'calls': len(outcomes),
+        'failure_rate': sum(failed for failed, _ in outcomes) / len(outcomes) if outcomes else None,
+        'slow_call_rate': sum(is_slow for _, is_slow in outcomes) / len(outcomes) if outcomes else None,
+        'open_seconds': self._open_seconds,
+        'opened': self.opened,
+        'rejected': self.rejected,
+      }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+  """Return the process-wide breaker of a backend (its base URL), creating it on first use"""
+  with _breakers_lock:
+    if name not in _breakers:
+      _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+  with _breakers_lock:
+    breakers = dict(_breakers)
+  return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -1,33 +1,314 @@
-# from typing import Dict, Any, Optional
-
-# class FunctionExecutor:
-#   def __init__(self):
-#     self.functions = {
-#       'add': self.add_record,
-#       'get': self.get_record,
-#       'delete': self.delete_record,
-#       'compare': self.compare_records,
-#       'predict': self.predict_trends
-#     }
-
-#   def execute(self, function_name: str, parameters: Dict[str, Any]) -> str:
-#     """Execute the specified function with parameters"""
-#     if function_name in self.functions:
-#       return self.functions[function_name](**parameters)
-#     else:
-#       raise ValueError(f"Unknown function: {function_name}")
-    
-#   def add_record(self, departments: str, content: str, id: str, type_of_time: str, specific_time: str) -> str:
-#           return f"✅ Added {content} (ID: {id}) to {departments} department for {type_of_time}: {specific_time}"
-    
-#   def get_record(self, departments: str, content: str, id: str, type_of_time: str, specific_time: str) -> str:
-#       return f"📊 Retrieved {content} (ID: {id}) from {departments} department for {type_of_time}: {specific_time}"
-  
-#   def delete_record(self, departments: str, content: str, id: str, type_of_time: str, specific_time: str) -> str:
-#       return f"🗑️ Deleted {content} (ID: {id}) from {departments} department for {type_of_time}: {specific_time}"
-  
-#   def compare_records(self, departments: str, content: str, id: Optional[str] = None, type_of_time: Optional[str] = None, specific_time: Optional[str] = None) -> str:
-#       return f"🔍 Compared {content} in {departments} department for {type_of_time}: {specific_time}"
-  
-#   def predict_trends(self, departments: str, content: str, id: Optional[str] = None, type_of_time: Optional[str] = None, specific_time: Optional[str] = None) -> str:
-#       return f"🔮 Predicted {content} trends for {departments} department for {type_of_time}: {specific_time}"
\ No newline at end of file
+import random
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import config
+from core.analytics import AnalyticsIndex, FORECAST_METHODS, forecast, period_over_period
+from utils.date_utils import VietnamDateUtils, period_bounds, periods_back_to_elapsed, shift_period
+
+_COLUMNS = ('id', 'departments', 'content', 'type_of_time', 'specific_time', 'value')
+
+# Daily magnitude of the seeded values per content type
+_SEED_SCALE = {
+  'cash_flow': 50_000_000.0,
+  'invoice': 20_000_000.0,
+  'report': 10.0,
+  'employee': 40.0,
+  'task': 25.0,
+  'performance': 80.0,
+  'project': 5.0,
+  'leave_request': 3.0,
+}
+
+def seed_rows(
+  departments: List[str],
+  contents: List[str],
+  end: date,
+  days: int,
+  per_day: int,
+  seed: int = 0,
+) -> Iterator[Tuple[str, str, str, str, str, float]]:
+  """Synthetic daily records: a per-series level with a slow trend, weekly seasonality and noise"""
+  rng = random.Random(seed)
+  start = end - timedelta(days=days - 1)
+  serial = 0
+  for department in departments:
+    for content in contents:
+      level = _SEED_SCALE.get(content, 10.0) * rng.uniform(0.5, 1.5)
+      trend = rng.uniform(-0.3, 0.6) / days
+      for offset in range(days):
+        day = start + timedelta(days=offset)
+        daily = level * (1 + trend * offset) * (0.6 if day.weekday() >= 5 else 1.0)
+        specific_time = day.strftime('%Y-%m-%d')
+        for _ in range(per_day):
+          serial += 1
+          value = round(max(0.0, rng.gauss(daily / per_day, daily / per_day * 0.2)), 2)
+          # Own id scheme so seeded records never collide with ids the bot generates ({content}_123)
+          yield f"{content}_s{serial}", department, content, 'day', specific_time, value
+
+class FunctionExecutor:
+  """Runs parsed function calls against an embedded SQLite store.
+
+  Every record is stored at the first day of its period (`specific_time`),
+  and (departments, content, specific_time) is indexed, so `get` is an
+  index range scan. compare/predict read period totals from daily buckets
+  in an AnalyticsIndex that add/delete keep up to date.
+  """
+
+  def __init__(self, schema: List[Dict], path: Optional[str] = None, seed: Optional[bool] = None):
+    self.path = path if path is not None else config.EXECUTOR_DB_PATH
+    if self.path != ':memory:':
+      self.path = str(Path(__file__).parent.parent / self.path)
+      Path(self.path).parent.mkdir(parents = True, exist_ok = True)
+
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(self.path, check_same_thread = False)
+    self._conn.execute('PRAGMA journal_mode=WAL')
+    self._conn.execute('PRAGMA synchronous=NORMAL')
+    self._conn.execute(
+      'CREATE TABLE IF NOT EXISTS records ('
+      ' id TEXT NOT NULL, departments TEXT NOT NULL, content TEXT NOT NULL,'
+      ' type_of_time TEXT NOT NULL, specific_time TEXT NOT NULL, value REAL)'
+    )
+    self._conn.commit()
+
+    properties = schema[0]['parameters']['properties'] if schema else {}
+    self.departments = properties.get('departments', {}).get('enum', [])
+    self.contents = properties.get('content', {}).get('enum', [])
+
+    self.analytics = AnalyticsIndex()
+    self.functions = {
+      'add': self.add_record,
+      'get': self.get_records,
+      'delete': self.delete_records,
+      'compare': self.compare_records,
+      'predict': self.predict_trends,
+    }
+
+    if (config.EXECUTOR_SEED if seed is None else seed) and self.count() == 0:
+      self.bulk_load(seed_rows(
+        self.departments,
+        self.contents,
+        VietnamDateUtils.today(),
+        config.EXECUTOR_SEED_DAYS,
+        config.EXECUTOR_SEED_RECORDS_PER_DAY,
+      ))
+    else:
+      self._create_indexes()
+      self._rebuild_analytics()
+
+  def _create_indexes(self):
+    with self._lock:
+      self._conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_records_scope ON records (departments, content, specific_time)'
+      )
+      self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_id ON records (id)')
+      self._conn.commit()
+
+  def bulk_load(self, rows: Iterable[Tuple[str, str, str, str, str, Optional[float]]]) -> int:
+    """Insert many (id, departments, content, type_of_time, specific_time, value) rows in one transaction.
+
+    Indexes are dropped for the load and rebuilt afterwards, which is much
+    faster than maintaining them row by row.
+    """
+    def normalized():
+      for record_id, department, content, type_of_time, specific_time, value in rows:
+        start, _ = period_bounds(type_of_time, specific_time)
+        yield record_id, department, content, type_of_time, start.isoformat(), value
+
+    with self._lock:
+      self._conn.execute('DROP INDEX IF EXISTS idx_records_scope')
+      self._conn.execute('DROP INDEX IF EXISTS idx_records_id')
+      before = self._conn.total_changes
+      self._conn.executemany('INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)', normalized())
+      self._conn.commit()
+      loaded = self._conn.total_changes - before
+    self._create_indexes()
+    self._rebuild_analytics()
+    return loaded
+
+  def _rebuild_analytics(self):
+    with self._lock:
+      buckets = self._conn.execute(
+        'SELECT departments, content, specific_time, COUNT(*), TOTAL(value) FROM records GROUP BY 1, 2, 3'
+      ).fetchall()
+    self.analytics.rebuild(buckets)
+
+  def count(self) -> int:
+    with self._lock:
+      return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+  def execute(self, function_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute the specified function with parameters"""
+    if function_name not in self.functions:
+      raise ValueError(f"Unknown function: {function_name}")
+    return self.functions[function_name](**parameters)
+
+  def execute_call(self, function_call: Dict[str, Any]) -> Dict[str, Any]:
+    return self.execute(function_call['name'], function_call.get('parameters', {}))
+
+  @staticmethod
+  def _period(type_of_time: Optional[str], specific_time: Optional[str]) -> Tuple[date, date]:
+    if not specific_time:
+      today = VietnamDateUtils.today()
+      return today, today
+    return period_bounds(type_of_time or 'day', specific_time)
+
+  def _totals(self, departments: str, content: str, start: date, end: date, record_id: Optional[str] = None) -> Tuple[int, float]:
+    sql = 'SELECT COUNT(*), TOTAL(value) FROM records WHERE departments = ? AND content = ? AND specific_time BETWEEN ? AND ?'
+    args = [departments, content, start.isoformat(), end.isoformat()]
+    if record_id is not None:
+      sql += ' AND id = ?'
+      args.append(record_id)
+    with self._lock:
+      count, total = self._conn.execute(sql, args).fetchone()
+    return count, total
+
+  def add_record(
+    self,
+    departments: str,
+    content: str,
+    id: str,
+    type_of_time: str,
+    specific_time: str,
+    value: Optional[float] = None,
+  ) -> Dict[str, Any]:
+    start, _ = period_bounds(type_of_time, specific_time)
+    with self._lock:
+      self._conn.execute(
+        'INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)',
+        (id, departments, content, type_of_time, start.isoformat(), value),
+      )
+      self._conn.commit()
+      self.analytics.add(departments, content, start, value)
+    return {
+      'message': f"✅ Added {content} (ID: {id}) to {departments} department for {type_of_time}: {specific_time}",
+      'added': 1,
+    }
+
+  def get_records(
+    self,
+    departments: str,
+    content: str,
+    id: Optional[str] = None,
+    type_of_time: Optional[str] = None,
+    specific_time: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    start, end = self._period(type_of_time, specific_time)
+    # Generated ids ({content}_{number}) rarely name a stored record; only filter on existing ones
+    record_id = id if id is not None and self._has_id(id) else None
+    count, total = self._totals(departments, content, start, end, record_id)
+
+    sql = ('SELECT ' + ', '.join(_COLUMNS) + ' FROM records'
+           ' WHERE departments = ? AND content = ? AND specific_time BETWEEN ? AND ?')
+    args = [departments, content, start.isoformat(), end.isoformat()]
+    if record_id is not None:
+      sql += ' AND id = ?'
+      args.append(record_id)
+    sql += ' ORDER BY specific_time LIMIT ?'
+    args.append(config.EXECUTOR_MAX_ROWS)
+    with self._lock:
+      rows = [dict(zip(_COLUMNS, row)) for row in self._conn.execute(sql, args)]
+
+    return {
+      'message': f"📊 Retrieved {count} {content} records from {departments} department for {start} to {end}",
+      'period': f"{start} to {end}",
+      'count': count,
+      'total': total,
+      'records': rows,
+    }
+
+  def delete_records(
+    self,
+    departments: str,
+    content: str,
+    id: str,
+    type_of_time: Optional[str] = None,
+    specific_time: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    with self._lock:
+      where, args = 'WHERE id = ? AND departments = ? AND content = ?', (id, departments, content)
+      # The buckets need the deleted rows' days and values
+      deleted = self._conn.execute(f'SELECT specific_time, value FROM records {where}', args).fetchall()
+      self._conn.execute(f'DELETE FROM records {where}', args)
+      self._conn.commit()
+      for day, value in deleted:
+        self.analytics.remove(departments, content, date.fromisoformat(day), value)
+    return {
+      'message': f"🗑️ Deleted {len(deleted)} {content} records (ID: {id}) from {departments} department",
+      'deleted': len(deleted),
+    }
+
+  def compare_records(
+    self,
+    departments: str,
+    content: str,
+    id: Optional[str] = None,
+    type_of_time: Optional[str] = None,
+    specific_time: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    """Totals of the period against the preceding one (previous month/quarter/year for calendar periods)"""
+    start, end = self._period(type_of_time, specific_time)
+    previous_start, previous_end = shift_period(start, end, -1)
+
+    (count, previous_count), (total, previous_total) = self.analytics.period_totals(
+      departments, content, [(start, end), (previous_start, previous_end)]
+    )
+    delta = period_over_period(float(total), float(previous_total))
+    days, previous_days = (end - start).days + 1, (previous_end - previous_start).days + 1
+
+    trend = 'n/a' if delta['change_pct'] is None else f"{delta['change_pct']:+.2f}%"
+    return {
+      'message': f"🔍 Compared {content} in {departments} department: {start} to {end} vs {previous_start} to {previous_end} ({trend})",
+      'current': {'period': f"{start} to {end}", 'count': int(count), 'total': float(total), 'daily_mean': float(total) / days},
+      'previous': {
+        'period': f"{previous_start} to {previous_end}",
+        'count': int(previous_count),
+        'total': float(previous_total),
+        'daily_mean': float(previous_total) / previous_days,
+      },
+      **delta,
+    }
+
+  def predict_trends(
+    self,
+    departments: str,
+    content: str,
+    id: Optional[str] = None,
+    type_of_time: Optional[str] = None,
+    specific_time: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    """Forecast the period from the totals of the completed periods before it"""
+    start, end = self._period(type_of_time, specific_time)
+    # The trend is fitted on periods that have fully elapsed; a partial current period would drag it down
+    today = VietnamDateUtils.today()
+    gap = periods_back_to_elapsed(start, end, today)
+    periods = [shift_period(start, end, -(gap + k)) for k in range(config.EXECUTOR_PREDICT_HISTORY - 1, -1, -1)]
+    _, history = self.analytics.period_totals(departments, content, periods)
+
+    forecasts = forecast(history, steps_ahead = gap)
+    slope = forecasts.pop('slope')
+    method = config.ANALYTICS_FORECAST_METHOD
+    if method not in FORECAST_METHODS:
+      raise ValueError(f"Unknown forecast method: {method}")
+
+    return {
+      'message': f"🔮 Predicted {content} for {departments} department, {start} to {end}: {forecasts[method]:,.2f}",
+      'period': f"{start} to {end}",
+      'forecast': round(forecasts[method], 2),
+      'method': method,
+      'forecasts': {name: round(value, 2) for name, value in forecasts.items()},
+      'slope': round(slope, 4),
+      'history': [round(float(total), 2) for total in history],
+    }
+
+  def _has_id(self, record_id: str) -> bool:
+    with self._lock:
+      return self._conn.execute('SELECT 1 FROM records WHERE id = ? LIMIT 1', (record_id,)).fetchone() is not None
+
+  def close(self):
+    with self._lock:
+      self._conn.close()
@@ -1,112 +1,136 @@
-import requests
-import re
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, List, Optional, Tuple
 from config.settings import config
-from prompts.templates import create_function_calling_prompt
+from core.metrics import metrics
+from core.transport import LLMTransport, get_transport
+from prompts.templates import get_prompt_builder
+from utils.parsers import FunctionCallParser, IncrementalCallParser
+from utils.validators import SchemaValidator
+
+logger = logging.getLogger(__name__)
 
 class LLMHandler:
-  def __init__(self, base_url: 'Optional[str]' = None):
+  def __init__(self, base_url: 'Optional[str]' = None, transport: 'Optional[LLMTransport]' = None):
     self.base_url = base_url or config.LLM_BASE_URL
+    self.transport = transport or get_transport(self.base_url)
+    self.parser = FunctionCallParser()
+    self._validators: Dict[int, SchemaValidator] = {}
+
+  def generate_function_call(
+    self,
+    english_query: str,
+    schema: List[Dict],
+    stream: Optional[bool] = None,
+    vietnamese_query: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    """Generate function call from English query; `vietnamese_query` selects the few-shot examples"""
+
+    with metrics.stage('prompt'):
+      prompt = get_prompt_builder(schema).build(
+        english_query,
+        structured = config.LLM_STRUCTURED_OUTPUT,
+        examples_query = vietnamese_query or english_query,
+      )
+    function_call, _ = self._generate(prompt, schema, stream)
+    return function_call
+
+  def generate_direct_function_call(
+    self,
+    vietnamese_query: str,
+    schema: List[Dict],
+    stream: Optional[bool] = None,
+    with_translation: bool = False,
+  ) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Generate a function call straight from the Vietnamese query in a single LLM call.
 
-  def generate_function_call(self, english_query: str, schema: List[Dict]) -> Dict[str, Any]:
-    """Generate function call from English query"""
+    Returns the call and, when `with_translation` is set, the English
+    translation the model wrote before it.
+    """
+    structured = config.LLM_STRUCTURED_OUTPUT
+    with metrics.stage('prompt'):
+      prompt = get_prompt_builder(schema).build_direct(vietnamese_query, with_translation, structured = structured)
+    function_call, response = self._generate(prompt, schema, stream)
 
-    prompt = create_function_calling_prompt(english_query, schema)
+    translation = None
+    if with_translation and not structured:
+      translation = self._extract_translation(response)
+    return function_call, translation
 
+  def _generate(self, prompt: str, schema: List[Dict], stream: Optional[bool]) -> Tuple[Dict[str, Any], str]:
+    """Run one generation and return the parsed call with the raw response text"""
     payload = {
       "model": config.LLM_MODEL,
       "prompt": prompt,
       "stream": False,
+      "keep_alive": config.LLM_KEEP_ALIVE,
       "options": {
         "temperature": config.LLM_TEMPERATURE,
         "max_tokens": config.LLM_MAX_TOKENS,
+        "num_predict": config.LLM_MAX_TOKENS,
       }
     }
 
-    response = requests.post(f"{self.base_url}/api/generate", json=payload)
-    result = response.json()
+    if config.LLM_STRUCTURED_OUTPUT:
+      # The grammar bounds the output and ends it with the object, so streaming cannot stop any earlier
+      payload["format"] = get_prompt_builder(schema).output_format
+      payload["options"]["max_tokens"] = payload["options"]["num_predict"] = config.LLM_STRUCTURED_MAX_TOKENS
+      with metrics.stage('generate'):
+        result = self.transport.generate(payload, label='generate')
+      return self.parse_function_call(result['response'], structured = True), result['response']
 
-    return self.parse_function_call(result['response'])
-  
-  def parse_function_call(self, llm_response: str) -> Dict[str, Any]:
-    """Parse function call from LLM response"""
+    if config.LLM_STREAM if stream is None else stream:
+      # Incremental parsing is interleaved with the stream and counted as generation
+      with metrics.stage('generate'):
+        return self._generate_streaming(payload, schema)
+
+    with metrics.stage('generate'):
+      result = self.transport.generate(payload, label='generate')
+
+    return self.parse_function_call(result['response']), result['response']
 
-    print(f"LLM Response: {llm_response}")
-    response = llm_response.strip()
-
-    # Try multiple patterns to extract function call
-    patterns = [
-      # Pattern 1: Inside markdown code block
-      r"```(?:\w+)?\s*((?:add|get|delete|compare|predict)\s*\([^)]*\))\s*```",
-      # Pattern 2: After "Function call syntax:" or similar
-      r"(?:Function call syntax:|Function call:|Output:)?\s*((?:add|get|delete|compare|predict)\s*\([^)]*\))",
-      # Pattern 3: Standalone function call
-      r"((?:add|get|delete|compare|predict)\s*\([^)]*\))",
-    ]
-
-    function_call_text = None
-    for pattern in patterns:
-      match = re.search(pattern, response, re.IGNORECASE | re.DOTALL)
-      if match:
-        function_call_text = match.group(1).strip()
-        break
-
-    if not function_call_text:
-      raise ValueError(f"Could not parse function call: {response}")
-
-    # Extract function name and parameters
-    func_pattern = r"(\w+)\s*\(\s*(.*?)\s*\)$"
-    func_match = re.search(func_pattern, function_call_text)
-
-    if not func_match:
-      raise ValueError(f"Could not parse function call format: {function_call_text}")
-
-    function_name = func_match.group(1)
-    params_str = func_match.group(2)
-
-    # Parse Parameters - improved regex
-    parameters = {}
-    if params_str:
-      # Split by comma but respect quotes
-      param_parts = []
-      current_param = ""
-      in_quotes = False
-      quote_char = None
-      
-      for char in params_str:
-        if char in ['"', "'"] and not in_quotes:
-          in_quotes = True
-          quote_char = char
-          current_param += char
-        elif char == quote_char and in_quotes:
-          in_quotes = False
-          quote_char = None
-          current_param += char
-        elif char == ',' and not in_quotes:
-          param_parts.append(current_param.strip())
-          current_param = ""
-        else:
-          current_param += char
-      
-      if current_param.strip():
-        param_parts.append(current_param.strip())
-
-      # Parse each parameter
-      for param_part in param_parts:
-        param_match = re.match(r"(\w+)\s*=\s*(.+)", param_part.strip())
-        if param_match:
-          param_name = param_match.group(1)
-          param_value = param_match.group(2).strip()
-          
-          # Remove quotes if present
-          if param_value.startswith('"') and param_value.endswith('"'):
-            param_value = param_value[1:-1]
-          elif param_value.startswith("'") and param_value.endswith("'"):
-            param_value = param_value[1:-1]
-          
-          parameters[param_name] = param_value
-    
-    return {
-      "name": function_name,
-      "parameters": parameters
-    }
\ No newline at end of file
+  def _generate_streaming(self, payload: Dict[str, Any], schema: List[Dict]) -> Tuple[Dict[str, Any], str]:
+    """Stream the generation and stop as soon as a complete, schema-valid call is seen"""
+    validator = self._validator_for(schema)
+    accept = validator.is_valid
+    if config.VALIDATOR_REPAIR_ENABLED:
+      # The chatbot repairs the call afterwards, so a repairable call is complete too
+      accept = lambda call: validator.is_valid(validator.repair_function_call(call)[0])
+    incremental = IncrementalCallParser(self.parser, accept=accept)
+
+    chunks = self.transport.stream_generate(payload, label='generate')
+    try:
+      for chunk in chunks:
+        function_call = incremental.feed(chunk.get('response', ''))
+        if function_call is not None:
+          logger.debug(f"LLM Response (stopped early): {incremental.text}")
+          return function_call, incremental.text
+    finally:
+      # Closing the stream drops the connection, so Ollama stops generating
+      chunks.close()
+
+    return self.parse_function_call(incremental.text), incremental.text
+
+  def _extract_translation(self, response: str) -> Optional[str]:
+    """The translation is whatever precedes the function call"""
+    calls = self.parser.parse_all(response)
+    head = response[:calls[0][0]] if calls else response
+    for line in head.splitlines():
+      line = line.strip().strip('"')
+      if line and not line.upper().startswith('FUNCTION CALL'):
+        return line
+    return None
+
+  def _validator_for(self, schema: List[Dict]) -> SchemaValidator:
+    validator = self._validators.get(id(schema))
+    if validator is None or validator.schema is not schema:
+      validator = SchemaValidator(schema)
+      self._validators[id(schema)] = validator
+    return validator
+
+  def parse_function_call(self, llm_response: str, structured: bool = False) -> Dict[str, Any]:
+    """Parse function call from LLM response"""
+    logger.debug(f"LLM Response: {llm_response}")
+    with metrics.stage('parse'):
+      if structured:
+        return self.parser.parse_json(llm_response)
+      return self.parser.parse(llm_response)
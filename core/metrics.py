@@ -0,0 +1,303 @@
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+# Ollama reports durations in nanoseconds
+_OLLAMA_DURATIONS = {
+  'prompt_eval_duration': 'chatbot_llm_prompt_eval_seconds',
+  'eval_duration': 'chatbot_llm_eval_seconds',
+  'load_duration': 'chatbot_llm_load_seconds',
+  'total_duration': 'chatbot_llm_total_seconds',
+}
+_OLLAMA_TOKENS = {'prompt_eval_count': 'prompt', 'eval_count': 'completion'}
+
+_HELP = {
+  'chatbot_requests_total': ('counter', 'Processed queries by answering path and outcome'),
+  'chatbot_request_seconds': ('histogram', 'End-to-end query latency by answering path'),
+  'chatbot_stage_seconds': ('histogram', 'Latency of each pipeline stage'),
+  'chatbot_llm_tokens_total': ('counter', 'Tokens evaluated by the LLM'),
+  'chatbot_llm_tokens': ('histogram', 'Tokens per LLM call'),
+  'chatbot_llm_prompt_eval_seconds': ('histogram', 'Prompt evaluation time reported by Ollama'),
+  'chatbot_llm_eval_seconds': ('histogram', 'Generation time reported by Ollama'),
+  'chatbot_llm_load_seconds': ('histogram', 'Model load time reported by Ollama'),
+  'chatbot_llm_total_seconds': ('histogram', 'Total call time reported by Ollama'),
+  'chatbot_slow_requests_total': ('counter', 'Queries slower than METRICS_SLOW_REQUEST_MS'),
+  'chatbot_llm_breaker_transitions_total': ('counter', 'Circuit breaker state changes per Ollama server'),
+  'chatbot_llm_breaker_rejected_total': ('counter', 'LLM calls rejected by an open circuit'),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+  """Fixed-bucket histogram; not thread-safe on its own, the registry locks around it"""
+
+  def __init__(self, buckets: Tuple[float, ...]):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+
+  def observe(self, value: float):
+    self.counts[bisect_left(self.buckets, value)] += 1
+    self.count += 1
+    self.sum += value
+
+  def quantile(self, q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile"""
+    if not self.count:
+      return None
+    rank = q * self.count
+    seen = 0
+    for bound, count in zip(self.buckets, self.counts):
+      seen += count
+      if seen >= rank:
+        return bound
+    return float('inf')
+
+class RequestTrace:
+  """Per-query record of stage timings, LLM usage and, when profiling, stack samples"""
+
+  def __init__(self, query: str):
+    self.query = query
+    self.thread_id = threading.get_ident()
+    self.start = time.perf_counter()
+    self.stages: Dict[str, float] = defaultdict(float)
+    self.tokens: Dict[str, int] = defaultdict(int)
+    self.samples: Counter = Counter()
+
+  @property
+  def elapsed(self) -> float:
+    return time.perf_counter() - self.start
+
+  def report(self, elapsed: float, result: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    return {
+      'query': self.query,
+      'elapsed_ms': round(elapsed * 1000, 3),
+      'resolved_by': result.get('resolved_by'),
+      'success': result.get('success'),
+      'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+      'tokens': dict(self.tokens),
+      # Collapsed stacks ("outer;inner count"), the input format of flamegraph tools
+      'stacks': [f"{stack} {count}" for stack, count in self.samples.most_common(top)],
+    }
+
+class MetricsRegistry:
+  """In-process counters and histograms with JSON and Prometheus text export"""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._counters: Dict[Tuple[str, LabelKey], float] = {}
+    self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+    self._local = threading.local()
+    self._active: Dict[int, RequestTrace] = {}
+    self._profiler: Optional[threading.Thread] = None
+    self.slow_requests: deque = deque(maxlen = config.METRICS_SLOW_REQUESTS_KEPT)
+    self.slow_request_hook: Optional[Callable[[Dict[str, Any]], None]] = None
+
+  @staticmethod
+  def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+  def inc(self, name: str, value: float = 1.0, **labels):
+    key = (name, self._labels(labels))
+    with self._lock:
+      self._counters[key] = self._counters.get(key, 0.0) + value
+
+  def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+    key = (name, self._labels(labels))
+    with self._lock:
+      histogram = self._histograms.get(key)
+      if histogram is None:
+        histogram = self._histograms[key] = Histogram(buckets)
+      histogram.observe(value)
+
+  @property
+  def current(self) -> Optional[RequestTrace]:
+    """Trace of the query running on this thread, if any"""
+    return getattr(self._local, 'trace', None)
+
+  @contextmanager
+  def stage(self, name: str) -> Iterator[None]:
+    """Time a pipeline stage into chatbot_stage_seconds and the current trace"""
+    if not config.METRICS_ENABLED:
+      yield
+      return
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      elapsed = time.perf_counter() - start
+      self.observe('chatbot_stage_seconds', elapsed, stage = name)
+      trace = self.current
+      if trace is not None:
+        trace.stages[name] += elapsed
+
+  @contextmanager
+  def track_request(self, query: str) -> Iterator[Dict[str, Any]]:
+    """Trace one query; the caller puts the pipeline result into the yielded dict under 'result'"""
+    if not config.METRICS_ENABLED:
+      yield {}
+      return
+    trace = RequestTrace(query)
+    outcome: Dict[str, Any] = {}
+    self._local.trace = trace
+    profiling = config.METRICS_SLOW_REQUEST_MS > 0
+    if profiling:
+      self._ensure_profiler()
+      with self._lock:
+        self._active[trace.thread_id] = trace
+    try:
+      yield outcome
+    finally:
+      self._local.trace = None
+      if profiling:
+        with self._lock:
+          self._active.pop(trace.thread_id, None)
+      self._finish(trace, outcome.get('result') or {})
+
+  def _finish(self, trace: RequestTrace, result: Dict[str, Any]):
+    elapsed = trace.elapsed
+    resolved_by = result.get('resolved_by') or 'none'
+    self.inc('chatbot_requests_total', resolved_by = resolved_by, success = bool(result.get('success')))
+    self.observe('chatbot_request_seconds', elapsed, resolved_by = resolved_by)
+
+    if config.METRICS_SLOW_REQUEST_MS <= 0 or elapsed * 1000 < config.METRICS_SLOW_REQUEST_MS:
+      return
+    self.inc('chatbot_slow_requests_total')
+    report = trace.report(elapsed, result)
+    self.slow_requests.append(report)
+    logger.warning(f"Slow query ({report['elapsed_ms']} ms): {trace.query} {report['stages_ms']}")
+    if self.slow_request_hook is not None:
+      try:
+        self.slow_request_hook(report)
+      except Exception as e:
+        logger.error(f"Slow request hook failed: {e}")
+
+  def record_llm_response(self, label: str, response: Dict[str, Any]):
+    """Token counts and Ollama-reported durations of a final (done) response"""
+    if not config.METRICS_ENABLED:
+      return
+    trace = self.current
+    for field, kind in _OLLAMA_TOKENS.items():
+      count = response.get(field)
+      if count is None:
+        continue
+      self.inc('chatbot_llm_tokens_total', count, label = label, kind = kind)
+      self.observe('chatbot_llm_tokens', count, TOKEN_BUCKETS, label = label, kind = kind)
+      if trace is not None:
+        trace.tokens[f"{label}_{kind}"] += count
+    for field, name in _OLLAMA_DURATIONS.items():
+      nanoseconds = response.get(field)
+      if nanoseconds is not None:
+        self.observe(name, nanoseconds / 1e9, label = label)
+
+  def _ensure_profiler(self):
+    if self._profiler is not None:
+      return
+    with self._lock:
+      if self._profiler is None:
+        self._profiler = threading.Thread(target = self._sample_loop, name = 'metrics-profiler', daemon = True)
+        self._profiler.start()
+
+  def _sample_loop(self):
+    """Sample the stacks of threads running a traced query"""
+    while True:
+      time.sleep(config.METRICS_PROFILE_INTERVAL_MS / 1000)
+      with self._lock:
+        active = dict(self._active)
+      if not active:
+        continue
+      frames = sys._current_frames()
+      for thread_id, trace in active.items():
+        frame = frames.get(thread_id)
+        if frame is not None:
+          trace.samples[self._collapse(frame)] += 1
+
+  @staticmethod
+  def _collapse(frame, max_depth: int = 64) -> str:
+    stack = []
+    while frame is not None and len(stack) < max_depth:
+      code = frame.f_code
+      stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+      frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+  def snapshot(self) -> Dict[str, Any]:
+    """JSON-friendly view of every counter and histogram"""
+    with self._lock:
+      counters = dict(self._counters)
+      histograms = {key: (h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99)) for key, h in self._histograms.items()}
+
+    result: Dict[str, Any] = {'counters': defaultdict(list), 'histograms': defaultdict(list)}
+    for (name, labels), value in sorted(counters.items()):
+      result['counters'][name].append({'labels': dict(labels), 'value': value})
+    for (name, labels), (count, total, p50, p95, p99) in sorted(histograms.items()):
+      result['histograms'][name].append({
+        'labels': dict(labels),
+        'count': count,
+        'sum': round(total, 6),
+        'mean': round(total / count, 6) if count else None,
+        'p50': p50,
+        'p95': p95,
+        'p99': p99,
+      })
+    return {'counters': dict(result['counters']), 'histograms': dict(result['histograms'])}
+
+  def prometheus(self) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    with self._lock:
+      counters = sorted(self._counters.items())
+      histograms = sorted((key, (h.buckets, list(h.counts), h.count, h.sum)) for key, h in self._histograms.items())
+
+    lines: List[str] = []
+    described = set()
+
+    def describe(name: str, kind: str):
+      if name in described:
+        return
+      described.add(name)
+      lines.append(f"# HELP {name} {_HELP.get(name, (kind, name))[1]}")
+      lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+      describe(name, 'counter')
+      lines.append(f"{name}{_format_labels(labels)} {int(value) if value.is_integer() else value}")
+    for (name, labels), (buckets, counts, count, total) in histograms:
+      describe(name, 'histogram')
+      cumulative = 0
+      for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+        cumulative += bucket_count
+        le = '+Inf' if bound == float('inf') else f"{bound:g}"
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+      lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+      lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+  def reset(self):
+    with self._lock:
+      self._counters.clear()
+      self._histograms.clear()
+    self.slow_requests.clear()
+
+def _format_labels(labels: LabelKey) -> str:
+  if not labels:
+    return ''
+  escaped = (f'{name}="{_escape(value)}"' for name, value in labels)
+  return '{' + ','.join(escaped) + '}'
+
+def _escape(value: str) -> str:
+  return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+metrics = MetricsRegistry()
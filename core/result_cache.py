@@ -0,0 +1,65 @@
+import copy
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import config
+from utils.cache import LRUCache, normalize_query
+from utils.date_utils import VietnamDateUtils
+
+class FunctionCallCache:
+  """Caches pipeline results per normalized query, pipeline mode, Vietnam calendar day and schema version.
+
+  Relative dates ("hôm nay", "quý tới") resolve differently every day, so the
+  whole cache is dropped when the date rolls over at UTC+7 midnight. The
+  schema version is the one the chatbot loaded at startup: its validator,
+  rules and prompts never change while it runs, so a schema edit takes
+  effect after a restart.
+  """
+
+  def __init__(self, schema_version: str, max_size: Optional[int] = None):
+    self._memory = LRUCache(max_size or config.RESULT_CACHE_SIZE)
+    self._lock = threading.Lock()
+    self._schema_version = schema_version
+    self._date = ''
+    self.invalidations = 0
+    self._refresh_generation()
+
+  def _refresh_generation(self) -> Tuple[str, str]:
+    """Return the current (date, schema version), clearing the cache when the date changed"""
+    date = VietnamDateUtils.get_current_data()
+    with self._lock:
+      if date != self._date:
+        self._date = date
+        if len(self._memory):
+          self._memory.clear()
+          self.invalidations += 1
+      return self._date, self._schema_version
+
+  def _key(self, vietnamese_query: str, mode: str) -> str:
+    date, schema_version = self._refresh_generation()
+    # The modes produce different results ('direct' has no English query), so they never share entries
+    return f"{date}|{schema_version}|{mode}|{normalize_query(vietnamese_query, keep_id_case = True)}"
+
+  def get(self, vietnamese_query: str, mode: str) -> Optional[Dict[str, Any]]:
+    result = self._memory.get(self._key(vietnamese_query, mode))
+    # Hand out copies so callers can never mutate a cached entry
+    return copy.deepcopy(result) if result is not None else None
+
+  def set(self, vietnamese_query: str, mode: str, result: Dict[str, Any]):
+    self._memory.set(self._key(vietnamese_query, mode), copy.deepcopy(result))
+
+  @property
+  def schema_version(self) -> str:
+    return self._schema_version
+
+  def clear(self):
+    self._memory.clear()
+
+  def stats(self) -> Dict[str, Any]:
+    stats = self._memory.stats()
+    stats.update({
+      'invalidations': self.invalidations,
+      'date': self._date,
+      'schema_version': self._schema_version,
+    })
+    return stats
@@ -0,0 +1,180 @@
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import config
+from utils.date_utils import VietnamDateUtils, date_engine
+
+# Vietnamese keyword tables, mirroring the mappings in SYSTEM_PROMPT
+FUNCTION_KEYWORDS = {
+  'add': ['thêm', 'tạo mới', 'tạo', 'đăng ký', 'bổ sung', 'nhập'],
+  'get': ['xem', 'tra cứu', 'lấy', 'kiểm tra', 'cho biết', 'cho tôi biết', 'cho mình biết', 'muốn biết', 'tình hình', 'hiển thị', 'tìm', 'liệt kê'],
+  'delete': ['xóa', 'xoá', 'hủy', 'huỷ', 'loại bỏ', 'gỡ bỏ'],
+  'compare': ['so sánh', 'đối chiếu', 'phân tích', 'khác biệt', 'chênh lệch'],
+  'predict': ['dự đoán', 'dự báo', 'ước tính'],
+}
+
+CONTENT_KEYWORDS = {
+  'cash_flow': ['thu chi', 'dòng tiền', 'doanh thu', 'chi phí', 'lợi nhuận'],
+  'report': ['báo cáo'],
+  'employee': ['nhân viên', 'nhân sự'],
+  'project': ['dự án'],
+  'task': ['nhiệm vụ', 'công việc'],
+  'performance': ['hiệu suất'],
+  'leave_request': ['nghỉ phép', 'đơn nghỉ'],
+  'invoice': ['hóa đơn', 'hoá đơn'],
+}
+
+DEPARTMENT_KEYWORDS = {
+  'accountant': ['kế toán'],
+  'finance': ['tài chính'],
+  'manager': ['quản lý'],
+  'hr': ['phòng nhân sự', 'ban nhân sự'],
+}
+
+def _keyword_pattern(keywords: List[str]) -> str:
+  # Longest keywords first so that e.g. 'tạo mới' wins over 'tạo'
+  alternatives = sorted(set(keywords), key=len, reverse=True)
+  return r'(?<!\w)(?:' + '|'.join(re.escape(k) for k in alternatives) + r')(?!\w)'
+
+def _compile_table(table: Dict[str, List[str]]) -> 're.Pattern':
+  groups = [f"(?P<{name}>{_keyword_pattern(keywords)})" for name, keywords in table.items()]
+  return re.compile('|'.join(groups))
+
+_FUNCTION_RE = _compile_table(FUNCTION_KEYWORDS)
+_CONTENT_RE = _compile_table(CONTENT_KEYWORDS)
+_DEPARTMENT_RE = _compile_table(DEPARTMENT_KEYWORDS)
+# Explicit record identifiers such as abc123 or RPT_001 (letters and digits)
+_ID_RE = re.compile(r'(?<![\w])(?=[A-Za-z0-9_]*\d)(?=[A-Za-z0-9_]*[A-Za-z])[A-Za-z0-9_]{3,}(?![\w])')
+
+def normalize_vietnamese(text: str) -> str:
+  """NFC-normalize, lowercase and collapse whitespace"""
+  return ' '.join(unicodedata.normalize('NFC', text).lower().split())
+
+@dataclass
+class IntentMatch:
+  function_call: Dict[str, Any]
+  confidence: float
+
+class RuleBasedIntentEngine:
+  """Deterministic keyword/pattern intent engine for common Vietnamese queries"""
+
+  def __init__(self, schema: List[Dict], default_department: Optional[str] = None):
+    self.function_schemas = {func['name']: func for func in schema}
+    self.default_department = default_department or config.RULE_ENGINE_DEFAULT_DEPARTMENT
+
+  def match(self, vietnamese_text: str) -> Optional[IntentMatch]:
+    """Map a Vietnamese query to a function call, or None if no function is recognized"""
+    text = normalize_vietnamese(vietnamese_text)
+
+    function_name, function_certain = self._match_function(text)
+    if function_name is None or function_name not in self.function_schemas:
+      return None
+
+    # Department names overlap content words ("phòng nhân sự" vs "nhân sự"), so they are masked first
+    content, content_certain = self._match_content(_DEPARTMENT_RE.sub(' | ', text))
+    type_of_time, specific_time, time_score = self._match_time(text)
+
+    department_match = _DEPARTMENT_RE.search(text)
+    department = department_match.lastgroup if department_match else self.default_department
+
+    confidence = (0.5 if function_certain else 0.2) + (0.3 if content_certain else 0.1 if content else 0.0) + time_score
+    if content is None:
+      return IntentMatch(function_call={'name': function_name, 'parameters': {}}, confidence=confidence)
+
+    candidates = {
+      'departments': department,
+      'content': content,
+      'id': self._extract_id(vietnamese_text, content),
+      'type_of_time': type_of_time,
+      'specific_time': specific_time,
+    }
+    func_schema = self.function_schemas[function_name]['parameters']
+    required = set(func_schema.get('required', []))
+
+    parameters = {}
+    for param_name in func_schema['properties']:
+      value = candidates.get(param_name)
+      # Optional ids are only emitted when the user actually named a record
+      if param_name == 'id' and param_name not in required and not self._has_explicit_id(vietnamese_text):
+        continue
+      if value is not None:
+        parameters[param_name] = value
+
+    return IntentMatch(
+      function_call={'name': function_name, 'parameters': parameters},
+      confidence=round(confidence, 2),
+    )
+
+  def resolve_time(self, vietnamese_text: str) -> Tuple[Optional[Tuple[str, str]], bool]:
+    """(type_of_time, specific_time) of the query's time expression, today if it names none.
+
+    Returns (None, False) when the query has time words that could not be resolved.
+    """
+    text = normalize_vietnamese(vietnamese_text)
+    type_of_time, specific_time, score = self._match_time(text)
+    if score == 0.0:
+      return None, False
+    return (type_of_time, specific_time), True
+
+  def extract_id(self, vietnamese_text: str) -> Optional[str]:
+    """Record id named in the query, if any"""
+    for m in _ID_RE.finditer(vietnamese_text):
+      if not re.fullmatch(r'[qQ][1-4]', m.group(0)):
+        return m.group(0)
+    return None
+
+  def _match_function(self, text: str) -> Tuple[Optional[str], bool]:
+    found = {m.lastgroup for m in _FUNCTION_RE.finditer(text)}
+    # Lookup verbs ("xem", "muốn biết") are generic, any other verb is more specific
+    specific = found - {'get'}
+    if len(specific) == 1:
+      return specific.pop(), True
+    if len(specific) > 1:
+      first = _FUNCTION_RE.search(text).lastgroup
+      return (first if first in specific else sorted(specific)[0]), False
+    if found:
+      return 'get', True
+    return None, False
+
+  def _match_content(self, text: str) -> Tuple[Optional[str], bool]:
+    found = []
+    for m in _CONTENT_RE.finditer(text):
+      if m.lastgroup not in found:
+        found.append(m.lastgroup)
+    if not found:
+      return None, False
+    # "báo cáo nhân viên" is a report about employees: the qualifier wins
+    if len(found) == 2 and 'report' in found:
+      found.remove('report')
+    return found[0], len(found) == 1
+
+  def _match_time(self, text: str) -> Tuple[str, str, float]:
+    """Resolve the first time expression; returns (type_of_time, specific_time, confidence share)"""
+    resolution = date_engine.resolve(text)
+    first = resolution.first
+    if first is None:
+      if resolution.unresolved:
+        return 'day', VietnamDateUtils.get_day(0), 0.0
+      # No time expression at all: default to today
+      return 'day', VietnamDateUtils.get_day(0), 0.15
+
+    # Comparisons name a second period ("tháng này với tháng trước"), anything else is unresolved
+    if resolution.unresolved and len(resolution.expressions) == 1:
+      return first.type_of_time, first.specific_time, 0.0
+    return first.type_of_time, first.specific_time, 0.2
+
+  @staticmethod
+  def _has_explicit_id(text: str) -> bool:
+    return any(not re.fullmatch(r'[qQ][1-4]', m.group(0)) for m in _ID_RE.finditer(text))
+
+  @staticmethod
+  def _extract_id(text: str, content: str) -> str:
+    for m in _ID_RE.finditer(text):
+      if not re.fullmatch(r'[qQ][1-4]', m.group(0)):
+        return m.group(0)
+    # Same convention the LLM is prompted with: {content_type}_{number}, stable per query
+    number = zlib.crc32(normalize_vietnamese(text).encode('utf-8')) % 1000
+    return f"{content}_{number:03d}"
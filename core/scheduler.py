@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from config.settings import config
+from core.circuit_breaker import CircuitOpenError
+from core.transport import LLMTransport, get_transport
+
+class _Backend:
+  def __init__(self, transport: LLMTransport, max_in_flight: int):
+    self.transport = transport
+    self.max_in_flight = max_in_flight
+    self.in_flight = 0
+    self.dispatched = 0
+
+  @property
+  def free(self) -> int:
+    return self.max_in_flight - self.in_flight
+
+class GenerationScheduler:
+  """Micro-batching front for one or more Ollama servers.
+
+  Generations submitted within `max_wait` of each other are collected into
+  one dispatch round of at most `max_batch_size` requests. Identical
+  payloads share a single in-flight generation (single-flight), and each
+  request goes to the backend with the fewest generations in flight.
+  Backends never get more than `max_in_flight` concurrent requests, so
+  excess load waits here instead of queueing inside Ollama, which keeps the
+  tail latency of admitted requests flat.
+
+  Exposes the `generate`/`stream_generate`/`stats` interface of
+  LLMTransport so it can be handed to Translator and LLMHandler as their
+  transport.
+  """
+
+  def __init__(
+    self,
+    base_urls: Optional[List[str]] = None,
+    max_batch_size: Optional[int] = None,
+    max_wait: Optional[float] = None,
+    max_in_flight: Optional[int] = None,
+  ):
+    base_urls = base_urls or config.LLM_BASE_URLS or [config.LLM_BASE_URL]
+    max_in_flight = max_in_flight or config.SCHEDULER_MAX_IN_FLIGHT
+    self.backends = [_Backend(get_transport(url), max_in_flight) for url in base_urls]
+    self.max_batch_size = max_batch_size or config.SCHEDULER_MAX_BATCH_SIZE
+    self.max_wait = config.SCHEDULER_MAX_WAIT_MS / 1000 if max_wait is None else max_wait
+
+    self._cond = threading.Condition()
+    self._queue: List[Tuple[str, Dict[str, Any], str, Future]] = []
+    self._in_flight: Dict[str, Future] = {}
+    self._closed = False
+    self._next_backend = 0
+    self.batches = 0
+    self.batched_requests = 0
+    self.deduplicated = 0
+
+    self._executor = ThreadPoolExecutor(
+      max_workers = max_in_flight * len(self.backends),
+      thread_name_prefix = 'llm-dispatch',
+    )
+    self._dispatcher = threading.Thread(target = self._dispatch_loop, name = 'llm-scheduler', daemon = True)
+    self._dispatcher.start()
+
+  @staticmethod
+  def _key(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, sort_keys = True, ensure_ascii = False)
+
+  @property
+  def available(self) -> bool:
+    """False while every backend's circuit is open"""
+    return any(backend.transport.available for backend in self.backends)
+
+  def _check_available(self):
+    """Fail fast rather than queueing a generation no backend would accept"""
+    if not self.available:
+      breakers = [backend.transport.breaker for backend in self.backends]
+      raise CircuitOpenError(', '.join(breaker.name for breaker in breakers), min(breaker.retry_in for breaker in breakers))
+
+  def generate(self, payload: Dict[str, Any], label: str = 'generate') -> Dict[str, Any]:
+    """Queue a generation and block until its result is available"""
+    self._check_available()
+    key = self._key(payload)
+    with self._cond:
+      if self._closed:
+        raise RuntimeError("GenerationScheduler is closed")
+      future = self._in_flight.get(key)
+      if future is not None:
+        self.deduplicated += 1
+      else:
+        future = Future()
+        self._in_flight[key] = future
+        self._queue.append((key, payload, label, future))
+        self._cond.notify()
+    return future.result()
+
+  def stream_generate(self, payload: Dict[str, Any], label: str = 'generate') -> Iterator[Dict[str, Any]]:
+    """Streams cannot be shared or batched; they only use least-loaded routing"""
+    self._check_available()
+    with self._cond:
+      backend = self._pick_backend(ignore_limit = True)
+      backend.in_flight += 1
+      backend.dispatched += 1
+    try:
+      yield from backend.transport.stream_generate(payload, label)
+    finally:
+      with self._cond:
+        backend.in_flight -= 1
+        self._cond.notify()
+
+  def _pick_backend(self, ignore_limit: bool = False) -> Optional[_Backend]:
+    """Least-loaded backend with free capacity; ties rotate between backends.
+
+    Backends with an open circuit are only picked when no other has room,
+    their transport then fails the call at once.
+    """
+    n = len(self.backends)
+    available = [backend.transport.available for backend in self.backends]
+    best = None
+    for healthy_only in (True, False):
+      for i in range(n):
+        index = (self._next_backend + i) % n
+        backend = self.backends[index]
+        if not ignore_limit and backend.free <= 0:
+          continue
+        if healthy_only and not available[index]:
+          continue
+        if best is None or backend.in_flight < best.in_flight:
+          best = backend
+      if best is not None:
+        self._next_backend = (self.backends.index(best) + 1) % n
+        return best
+    return None
+
+  def _capacity(self) -> int:
+    return sum(max(0, backend.free) for backend in self.backends)
+
+  def _dispatch_loop(self):
+    while True:
+      with self._cond:
+        # Wait for work and for a backend with room for it
+        while (not self._queue and not self._closed) or (self._queue and not self._capacity()):
+          self._cond.wait()
+        if not self._queue:
+          return
+
+        # Collect the batch: wait up to max_wait for more requests to arrive
+        deadline = time.monotonic() + self.max_wait
+        while len(self._queue) < min(self.max_batch_size, self._capacity()) and not self._closed:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            break
+          self._cond.wait(remaining)
+
+        take = min(self.max_batch_size, len(self._queue), self._capacity())
+        batch, self._queue = self._queue[:take], self._queue[take:]
+        assignments = []
+        for job in batch:
+          backend = self._pick_backend()
+          backend.in_flight += 1
+          backend.dispatched += 1
+          assignments.append((backend, job))
+        self.batches += 1
+        self.batched_requests += len(batch)
+
+      for backend, job in assignments:
+        self._executor.submit(self._run, backend, *job)
+
+  def _run(self, backend: _Backend, key: str, payload: Dict[str, Any], label: str, future: Future):
+    try:
+      future.set_result(backend.transport.generate(payload, label))
+    except BaseException as e:
+      future.set_exception(e)
+    finally:
+      with self._cond:
+        backend.in_flight -= 1
+        self._in_flight.pop(key, None)
+        self._cond.notify()
+
+  def stats(self) -> Dict[str, Any]:
+    """Per-label latency statistics of all backends plus scheduler counters"""
+    stats: Dict[str, Any] = {}
+    for backend in self.backends:
+      for label, snapshot in backend.transport.stats().items():
+        key = label if len(self.backends) == 1 else f"{label}@{backend.transport.base_url}"
+        stats[key] = snapshot
+    with self._cond:
+      stats['scheduler'] = {
+        'batches': self.batches,
+        'mean_batch_size': self.batched_requests / self.batches if self.batches else None,
+        'deduplicated': self.deduplicated,
+        'queued': len(self._queue),
+        'backends': {
+          backend.transport.base_url: {'in_flight': backend.in_flight, 'dispatched': backend.dispatched}
+          for backend in self.backends
+        },
+      }
+    return stats
+
+  def close(self):
+    """Finish queued generations and stop the dispatcher"""
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    self._dispatcher.join()
+    self._executor.shutdown(wait = True)
+
+_scheduler: Optional[GenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> GenerationScheduler:
+  """Return the process-wide scheduler, creating it on first use"""
+  global _scheduler
+  with _scheduler_lock:
+    if _scheduler is None:
+      _scheduler = GenerationScheduler()
+    return _scheduler
\ No newline at end of file
@@ -0,0 +1,265 @@
+import json
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import config
+from core.chatbot import BusinessAnalystChatbot, PIPELINE_MODES
+from core.circuit_breaker import breaker_stats
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Larger bodies of requests to unknown endpoints close the connection instead of being read
+_MAX_DISCARD_BYTES = 1 << 20
+
+class QueueFullError(Exception):
+  """Raised when the request queue has no room for the submitted queries"""
+
+class ChatbotWorkerPool:
+  """Fixed set of worker threads draining a bounded queue of queries.
+
+  Admission is all-or-nothing per HTTP request: a batch either fits into
+  the remaining queue capacity or is rejected, so a large batch can never
+  be half processed.
+  """
+
+  def __init__(self, bot: BusinessAnalystChatbot, workers: int, queue_size: int):
+    self.bot = bot
+    self.queue_size = queue_size
+    self._jobs: queue.Queue = queue.Queue()
+    self._lock = threading.Lock()
+    self._pending = 0
+    self.rejected = 0
+    self.completed = 0
+    self._threads = [
+      threading.Thread(target = self._work, name = f"chatbot-worker-{i}", daemon = True)
+      for i in range(workers)
+    ]
+    for thread in self._threads:
+      thread.start()
+
+  @property
+  def pending(self) -> int:
+    """Queries queued or being processed"""
+    return self._pending
+
+  def submit(self, queries: List[str], mode: Optional[str] = None) -> List[Future]:
+    with self._lock:
+      if self._pending + len(queries) > self.queue_size:
+        self.rejected += 1
+        raise QueueFullError(f"Queue full ({self._pending}/{self.queue_size} pending)")
+      self._pending += len(queries)
+
+    futures = []
+    for query in queries:
+      future = Future()
+      self._jobs.put((future, query, mode))
+      futures.append(future)
+    return futures
+
+  def _work(self):
+    while True:
+      job = self._jobs.get()
+      if job is None:
+        return
+      future, query, mode = job
+      try:
+        if future.set_running_or_notify_cancel():
+          future.set_result(self.bot.process_isolated(query, mode))
+      finally:
+        with self._lock:
+          self._pending -= 1
+          self.completed += 1
+
+  def stop(self):
+    for _ in self._threads:
+      self._jobs.put(None)
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+      'workers': len(self._threads),
+      'queue_size': self.queue_size,
+      'pending': self._pending,
+      'completed': self.completed,
+      'rejected': self.rejected,
+    }
+
+class ChatbotHTTPServer(ThreadingHTTPServer):
+  """HTTP front end: POST /query, POST /batch, GET /health, GET /stats, GET /metrics, GET /metrics/slow"""
+
+  daemon_threads = True
+
+  def __init__(
+    self,
+    address: Tuple[str, int],
+    bot: Optional[BusinessAnalystChatbot] = None,
+    workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+  ):
+    self.bot = bot or BusinessAnalystChatbot()
+    self.warm()
+    self.pool = ChatbotWorkerPool(self.bot, workers or config.SERVER_WORKERS, queue_size or config.SERVER_QUEUE_SIZE)
+    self.draining = False
+    self._active = 0
+    self._idle = threading.Condition()
+    super().__init__(address, ChatbotRequestHandler)
+
+  @contextmanager
+  def tracking(self):
+    """Count a request as in flight until its response has been written"""
+    with self._idle:
+      self._active += 1
+    try:
+      yield
+    finally:
+      with self._idle:
+        self._active -= 1
+        if not self._active:
+          self._idle.notify_all()
+
+  def warm(self):
+    """Build and render everything that is otherwise built lazily on the first request"""
+    self.bot.warmup()
+    logger.info("Server warmed up")
+
+  def graceful_shutdown(self, timeout: Optional[float] = None):
+    """Refuse new queries, finish the admitted ones, then stop serving"""
+    timeout = config.SERVER_SHUTDOWN_TIMEOUT if timeout is None else timeout
+    self.draining = True
+    logger.info(f"Draining {self._active} in-flight requests")
+    deadline = time.monotonic() + timeout
+    with self._idle:
+      while self._active and time.monotonic() < deadline:
+        self._idle.wait(deadline - time.monotonic())
+    if self._active:
+      logger.warning(f"Shutdown timeout reached with {self._active} requests in flight")
+    self.pool.stop()
+    self.shutdown()
+
+  @property
+  def base_url(self) -> str:
+    host, port = self.server_address[:2]
+    return f"http://{host}:{port}"
+
+class ChatbotRequestHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  disable_nagle_algorithm = True
+
+  def log_message(self, format, *args):
+    logger.debug(f"{self.address_string()} {format % args}")
+
+  def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+    data = json.dumps(body, ensure_ascii = False).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json; charset=utf-8')
+    self.send_header('Content-Length', str(len(data)))
+    for name, value in (headers or {}).items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(data)
+
+  def _send_text(self, status: int, text: str, content_type: str):
+    data = text.encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def _read_json(self) -> Dict[str, Any]:
+    length = int(self.headers.get('Content-Length', 0))
+    body = json.loads(self.rfile.read(length) or b'{}')
+    if not isinstance(body, dict):
+      raise ValueError("Request body must be a JSON object")
+    return body
+
+  def _discard_body(self) -> Dict[str, str]:
+    """Read an unused request body so that the next request on a keep-alive connection starts cleanly.
+
+    Returns the headers for the response: a body that is too large or of
+    unknown length is not read, and the connection is closed instead.
+    """
+    try:
+      length = int(self.headers.get('Content-Length', 0))
+    except ValueError:
+      length = -1
+    if 0 <= length <= _MAX_DISCARD_BYTES:
+      self.rfile.read(length)
+      return {}
+    return {'Connection': 'close'}
+
+  def do_GET(self):
+    server = self.server
+    if self.path == '/health':
+      status = 503 if server.draining else 200
+      self._send_json(status, {'status': 'draining' if server.draining else 'ok', **server.pool.stats()})
+    elif self.path == '/stats':
+      self._send_json(200, {
+        'server': server.pool.stats(),
+        'llm': server.bot.get_llm_stats(),
+        'cache': server.bot.get_cache_stats(),
+        'metrics': server.bot.get_metrics(),
+        'breakers': breaker_stats(),
+      })
+    elif self.path == '/metrics':
+      self._send_text(200, metrics.prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+    elif self.path == '/metrics/slow':
+      self._send_json(200, {'slow_requests': list(metrics.slow_requests)})
+    else:
+      self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+  def do_POST(self):
+    if self.path not in ('/query', '/batch'):
+      self._send_json(404, {'error': f"Unknown endpoint: {self.path}"}, self._discard_body())
+      return
+
+    with self.server.tracking():
+      self._handle_queries()
+
+  def _handle_queries(self):
+    try:
+      body = self._read_json()
+      mode = body.get('mode')
+      if mode is not None and mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode: {mode}")
+      if self.path == '/query':
+        queries = [body.get('query')]
+      else:
+        queries = body.get('queries')
+        if not isinstance(queries, list):
+          raise ValueError("'queries' must be a list of strings")
+      if not all(isinstance(query, str) and query.strip() for query in queries):
+        raise ValueError("Queries must be non-empty strings")
+    except ValueError as e:
+      self._send_json(400, {'error': str(e)})
+      return
+
+    if len(queries) > config.SERVER_MAX_BATCH_SIZE:
+      self._send_json(413, {'error': f"Batch too large: {len(queries)} > {config.SERVER_MAX_BATCH_SIZE}"})
+      return
+    if self.server.draining:
+      self._send_json(503, {'error': "Server is shutting down"})
+      return
+
+    try:
+      futures = self.server.pool.submit(queries, mode)
+    except QueueFullError as e:
+      self._send_json(429, {'error': str(e)}, {'Retry-After': '1'})
+      return
+
+    try:
+      results = [future.result(timeout = config.SERVER_REQUEST_TIMEOUT) for future in futures]
+    except FutureTimeoutError:
+      self._send_json(504, {'error': "Timed out waiting for the query to be processed"})
+      return
+
+    if self.path == '/query':
+      self._send_json(200, results[0])
+    else:
+      self._send_json(200, {'results': results})
\ No newline at end of file
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 1
+
+def load_compiled_schema(schema_path: Path, artifact_dir: Optional[str] = None) -> Tuple[List[Dict], Dict[str, Any], str]:
+  """Return (schema, compiled prompt parts, schema version) for a schema file.
+
+  The compiled form is cached on disk under the content hash of the schema
+  file and the fingerprint of the prompt templates, so a restart with an
+  unchanged schema and templates reads one JSON file and renders nothing.
+  Any edit to either changes the file name and recompiles.
+  """
+  # Imported here so that importing the chatbot does not pull in the LLM modules
+  from prompts.templates import PromptBuilder
+
+  data = schema_path.read_bytes()
+  version = hashlib.sha256(data).hexdigest()[:16]
+  artifact_dir = config.STARTUP_ARTIFACT_DIR if artifact_dir is None else artifact_dir
+  if not artifact_dir:
+    schema = json.loads(data)
+    return schema, PromptBuilder.compile(schema), version
+
+  path = Path(__file__).parent.parent / artifact_dir / f"schema-{version}-{PromptBuilder.compile_fingerprint()}.json"
+  try:
+    with open(path, 'r', encoding = 'utf-8') as f:
+      artifact = json.load(f)
+    if artifact.get('version') == ARTIFACT_VERSION:
+      return artifact['schema'], artifact['prompt'], version
+  except FileNotFoundError:
+    pass
+  except (OSError, ValueError, KeyError) as e:
+    logger.warning(f"Ignoring unreadable startup artifact {path}: {e}")
+
+  schema = json.loads(data)
+  compiled = PromptBuilder.compile(schema)
+  _write_artifact(path, {'version': ARTIFACT_VERSION, 'schema': schema, 'prompt': compiled})
+  return schema, compiled, version
+
+def _write_artifact(path: Path, artifact: Dict[str, Any]):
+  """Write atomically so that concurrently starting workers never read a partial file"""
+  try:
+    path.parent.mkdir(parents = True, exist_ok = True)
+    fd, tmp = tempfile.mkstemp(dir = path.parent, suffix = '.tmp')
+    with os.fdopen(fd, 'w', encoding = 'utf-8') as f:
+      json.dump(artifact, f, ensure_ascii = False)
+    os.replace(tmp, path)
+  except OSError as e:
+    # A read-only deployment still starts, it just compiles on every start
+    logger.warning(f"Could not write startup artifact {path}: {e}")
@@ -1,13 +1,49 @@
-import requests
+import logging
+from pathlib import Path
 from typing import Optional
 from config.settings import config
+from core.circuit_breaker import is_llm_unavailable
+from core.transport import LLMTransport, get_transport
+from utils.cache import LRUCache, SQLiteCacheStore, TieredCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY_VERSION = 2
+
+def build_translation_cache() -> 'Optional[TieredCache]':
+  """Build the translation cache described by config, or None when disabled"""
+  if not config.TRANSLATION_CACHE_ENABLED:
+    return None
+
+  memory = LRUCache(config.TRANSLATION_CACHE_SIZE, config.TRANSLATION_CACHE_TTL)
+  persistent = None
+  if config.TRANSLATION_CACHE_PATH:
+    cache_path = Path(__file__).parent.parent / config.TRANSLATION_CACHE_PATH
+    persistent = SQLiteCacheStore(str(cache_path), config.TRANSLATION_CACHE_TTL)
+  return TieredCache(memory, persistent)
 
 class Translator:
-  def __init__(self, base_url: 'Optional[str]' = None):
+  def __init__(
+    self,
+    base_url: 'Optional[str]' = None,
+    transport: 'Optional[LLMTransport]' = None,
+    cache: 'Optional[TieredCache]' = None,
+  ):
     self.base_url = base_url or config.LLM_BASE_URL
+    self.transport = transport or get_transport(self.base_url)
+    self.cache = cache if cache is not None else build_translation_cache()
 
-  def vietnamese_to_english(self, vietnamese_text: str) -> str:
+  def vietnamese_to_english(self, vietnamese_text: str, stream: Optional[bool] = None) -> str:
     """Translate Vietnamese to English for better LLM processing"""
+    # The model is part of the key so a model switch never serves stale translations.
+    # Ids keep their case because the translation embeds them; the version skips
+    # persistent entries written under the casefolded keys
+    cache_key = f"{_CACHE_KEY_VERSION}\x00{config.LLM_MODEL}\x00{normalize_query(vietnamese_text, keep_id_case = True)}"
+    if self.cache is not None:
+      cached = self.cache.get(cache_key)
+      if cached is not None:
+        return cached
+
     prompt = f"""<|im_start|>system
 You are a translation API. Your only job is to translate Vietnamese to English. 
 Return ONLY the English translation, no greetings, no explanations.
@@ -22,6 +58,7 @@ Return ONLY the English translation, no greetings, no explanations.
       "model": config.LLM_MODEL,
       "prompt": prompt,
       "stream": False,
+      "keep_alive": config.LLM_KEEP_ALIVE,
       "options": {
         "temperature": 0.1,
         "max_tokens": 50,
@@ -30,8 +67,35 @@ Return ONLY the English translation, no greetings, no explanations.
     }
 
     try:
-      response = requests.post(f"{self.base_url}/api/generate", json = payload)
-      result = response.json()
-      return result['response'].strip()
+      if config.LLM_STREAM if stream is None else stream:
+        english_text = self._translate_streaming(payload)
+      else:
+        result = self.transport.generate(payload, label = 'translate')
+        english_text = result['response'].strip()
     except Exception as e:
-      return vietnamese_text
\ No newline at end of file
+      if is_llm_unavailable(e):
+        # The function calling generation would fail the same way; let the pipeline fall back instead
+        raise
+      logger.warning(f"Translation failed, using the Vietnamese text: {e}")
+      return vietnamese_text
+
+    if self.cache is not None and english_text:
+      self.cache.set(cache_key, english_text)
+    return english_text
+
+  def _translate_streaming(self, payload: dict) -> str:
+    """Stream the translation and stop at the end of its first line"""
+    parts = []
+    chunks = self.transport.stream_generate(payload, label = 'translate')
+    try:
+      for chunk in chunks:
+        parts.append(chunk.get('response', ''))
+        # The translation is a single line; anything after it is the model rambling.
+        # Leading newlines come before the translation, so only a newline after text ends it
+        if '\n' in parts[-1] and '\n' in ''.join(parts).lstrip():
+          break
+    finally:
+      chunks.close()
+
+    text = ''.join(parts).strip()
+    return text.split('\n', 1)[0].strip()
@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import config
+from core.circuit_breaker import CircuitBreaker, get_breaker, is_llm_unavailable
+from core.metrics import metrics
+
+class LatencyStats:
+  """Thread-safe per-call latency recorder keeping a bounded window of samples"""
+
+  def __init__(self, window: int = 1000):
+    self._lock = threading.Lock()
+    self._samples = deque(maxlen = window)
+    self.calls = 0
+    self.errors = 0
+    self.total_seconds = 0.0
+
+  def record(self, seconds: float, error: bool = False):
+    with self._lock:
+      self.calls += 1
+      self.total_seconds += seconds
+      if error:
+        self.errors += 1
+      self._samples.append(seconds)
+
+  def snapshot(self) -> Dict[str, Any]:
+    with self._lock:
+      samples = sorted(self._samples)
+      calls, errors, total = self.calls, self.errors, self.total_seconds
+
+    def percentile_ms(p: float) -> Optional[float]:
+      if not samples:
+        return None
+      return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+    return {
+      'calls': calls,
+      'errors': errors,
+      'mean_ms': (total / calls * 1000) if calls else None,
+      'p50_ms': percentile_ms(0.50),
+      'p95_ms': percentile_ms(0.95),
+      'max_ms': percentile_ms(1.0),
+    }
+
+class LLMTransport:
+  """Pooled keep-alive HTTP client for the Ollama API"""
+
+  def __init__(
+    self,
+    base_url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    retry_backoff: Optional[float] = None,
+  ):
+    self.base_url = (base_url or config.LLM_BASE_URL).rstrip('/')
+    self.timeout = (
+      connect_timeout if connect_timeout is not None else config.LLM_CONNECT_TIMEOUT,
+      read_timeout if read_timeout is not None else config.LLM_READ_TIMEOUT,
+    )
+    max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+
+    # Retry refused connections and overloaded-server responses only; a read
+    # timeout means the model is stuck, and retrying it would multiply the wait
+    retry = Retry(
+      total = max_retries,
+      connect = max_retries,
+      read = 0,
+      status = max_retries,
+      backoff_factor = config.LLM_RETRY_BACKOFF if retry_backoff is None else retry_backoff,
+      status_forcelist = (429, 502, 503, 504),
+      allowed_methods = frozenset({'GET', 'POST'}),
+      raise_on_status = False,
+    )
+    adapter = HTTPAdapter(
+      pool_connections = 1,
+      pool_maxsize = pool_size or config.LLM_POOL_SIZE,
+      max_retries = retry,
+    )
+
+    self.session = requests.Session()
+    self.session.mount('http://', adapter)
+    self.session.mount('https://', adapter)
+
+    self._stats_lock = threading.Lock()
+    self._stats: Dict[str, LatencyStats] = {}
+    self.breaker: Optional[CircuitBreaker] = get_breaker(self.base_url) if config.BREAKER_ENABLED else None
+
+  def _stats_for(self, label: str) -> LatencyStats:
+    with self._stats_lock:
+      if label not in self._stats:
+        self._stats[label] = LatencyStats()
+      return self._stats[label]
+
+  @property
+  def available(self) -> bool:
+    """False while the circuit breaker rejects calls"""
+    return self.breaker is None or self.breaker.available
+
+  def _record(self, label: str, seconds: float, error: Optional[BaseException]):
+    self._stats_for(label).record(seconds, error is not None)
+    if self.breaker is not None:
+      # Only unavailability counts against the server; a bad request is not its fault
+      self.breaker.record(seconds, error is not None and is_llm_unavailable(error))
+
+  def post(self, path: str, payload: Dict[str, Any], label: str = 'default') -> Dict[str, Any]:
+    """POST a JSON payload and return the decoded JSON response.
+
+    Raises CircuitOpenError without a request while the server's circuit is open.
+    """
+    if self.breaker is not None:
+      self.breaker.before_call()
+    start = time.perf_counter()
+    error = None
+    try:
+      response = self.session.post(f"{self.base_url}{path}", json = payload, timeout = self.timeout)
+      response.raise_for_status()
+      result = response.json()
+      metrics.record_llm_response(label, result)
+      return result
+    except Exception as e:
+      error = e
+      raise
+    finally:
+      self._record(label, time.perf_counter() - start, error)
+
+  def generate(self, payload: Dict[str, Any], label: str = 'generate') -> Dict[str, Any]:
+    """Call Ollama's /api/generate endpoint"""
+    return self.post('/api/generate', payload, label)
+
+  def stream(self, path: str, payload: Dict[str, Any], label: str = 'default') -> Iterator[Dict[str, Any]]:
+    """POST a JSON payload and yield the decoded objects of an NDJSON response.
+
+    Closing the generator early closes the connection, which makes Ollama
+    stop generating.
+    """
+    if self.breaker is not None:
+      self.breaker.before_call()
+    start = time.perf_counter()
+    error = None
+    response = None
+    try:
+      response = self.session.post(f"{self.base_url}{path}", json = payload, timeout = self.timeout, stream = True)
+      response.raise_for_status()
+      for line in response.iter_lines():
+        if not line:
+          continue
+        chunk = json.loads(line)
+        if 'error' in chunk:
+          raise ValueError(f"LLM error: {chunk['error']}")
+        if chunk.get('done'):
+          metrics.record_llm_response(label, chunk)
+        yield chunk
+    except GeneratorExit:
+      # The caller stopped reading on purpose
+      raise
+    except Exception as e:
+      error = e
+      raise
+    finally:
+      if response is not None:
+        response.close()
+      self._record(label, time.perf_counter() - start, error)
+
+  def stream_generate(self, payload: Dict[str, Any], label: str = 'generate') -> Iterator[Dict[str, Any]]:
+    """Call Ollama's /api/generate endpoint in streaming mode"""
+    return self.stream('/api/generate', dict(payload, stream = True), label)
+
+  def stats(self) -> Dict[str, Dict[str, Any]]:
+    """Per-label latency statistics for calls made through this transport"""
+    with self._stats_lock:
+      labels = dict(self._stats)
+    return {label: stats.snapshot() for label, stats in labels.items()}
+
+  def close(self):
+    self.session.close()
+
+_transports: Dict[str, LLMTransport] = {}
+_transports_lock = threading.Lock()
+
+def get_transport(base_url: Optional[str] = None) -> LLMTransport:
+  """Return the process-wide transport for a base URL, creating it on first use"""
+  key = (base_url or config.LLM_BASE_URL).rstrip('/')
+  with _transports_lock:
+    if key not in _transports:
+      _transports[key] = LLMTransport(key)
+    return _transports[key]
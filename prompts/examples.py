@@ -0,0 +1,190 @@
+"""Few-shot example retrieval over the function calling dataset.
+
+Queries are embedded as hashed character n-gram TF-IDF vectors. The index is
+built offline and stored as a directory of .npy files that are memory-mapped
+at load time:
+
+  python -m prompts.examples --dataset data/function_calling_dataset_10k_natural_time.csv --out data/index/examples
+
+Search walks an inverted (feature -> rows) layout, so a query only touches
+the rows that share at least one n-gram with it.
+"""
+import argparse
+import csv
+import json
+import logging
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import config
+from utils.cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+NGRAM_RANGE = (2, 4)
+N_FEATURES = 1 << 18
+INDEX_VERSION = 1
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+  """Character n-grams of the normalized text, padded so word boundaries count"""
+  padded = f" {normalize_query(text)} "
+  lo, hi = ngram_range
+  return [padded[i:i + n] for n in range(lo, hi + 1) for i in range(len(padded) - n + 1)]
+
+def hash_features(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE, n_features: int = N_FEATURES) -> Dict[int, int]:
+  """Term counts of hashed n-grams; crc32 is stable across processes, unlike hash()"""
+  counts: Dict[int, int] = {}
+  for gram in char_ngrams(text, ngram_range):
+    feature = zlib.crc32(gram.encode('utf-8')) % n_features
+    counts[feature] = counts.get(feature, 0) + 1
+  return counts
+
+def build_index(dataset_path: str, out_dir: str, ngram_range: Tuple[int, int] = NGRAM_RANGE, n_features: int = N_FEATURES) -> int:
+  """Build the on-disk index from a query,function_call CSV; returns the number of examples"""
+  dataset = Path(dataset_path)
+  queries: List[str] = []
+  calls: List[str] = []
+  seen = set()
+  with open(dataset, 'r', encoding = 'utf-8') as f:
+    for row in csv.DictReader(f):
+      # The dataset repeats queries with different labels; the first one wins
+      key = normalize_query(row['query'])
+      if key in seen:
+        continue
+      seen.add(key)
+      queries.append(row['query'])
+      calls.append(row['function_call'])
+
+  rows, features, counts = [], [], []
+  for row, query in enumerate(queries):
+    for feature, count in hash_features(query, ngram_range, n_features).items():
+      rows.append(row)
+      features.append(feature)
+      counts.append(count)
+  rows = np.asarray(rows, dtype = np.int32)
+  features = np.asarray(features, dtype = np.int32)
+  tf = np.asarray(counts, dtype = np.float32)
+
+  # Smoothed idf, then l2-normalize every row
+  df = np.bincount(features, minlength = n_features).astype(np.float32)
+  idf = (np.log((1 + len(queries)) / (1 + df)) + 1).astype(np.float32)
+  weights = tf * idf[features]
+  norms = np.sqrt(np.bincount(rows, weights = weights * weights, minlength = len(queries)))
+  weights = (weights / norms[rows]).astype(np.float32)
+
+  # Column-major (feature -> rows) layout for the inverted-index search
+  order = np.lexsort((rows, features))
+  indptr = np.zeros(n_features + 1, dtype = np.int64)
+  np.cumsum(np.bincount(features, minlength = n_features), out = indptr[1:])
+
+  out = Path(out_dir)
+  out.mkdir(parents = True, exist_ok = True)
+  np.save(out / 'indptr.npy', indptr)
+  np.save(out / 'rows.npy', rows[order])
+  np.save(out / 'weights.npy', weights[order])
+  np.save(out / 'idf.npy', idf)
+  with open(out / 'examples.json', 'w', encoding = 'utf-8') as f:
+    json.dump({'queries': queries, 'function_calls': calls}, f, ensure_ascii = False)
+  with open(out / 'meta.json', 'w', encoding = 'utf-8') as f:
+    json.dump({
+      'version': INDEX_VERSION,
+      'ngram_range': list(ngram_range),
+      'n_features': n_features,
+      'examples': len(queries),
+    }, f)
+  return len(queries)
+
+class ExampleIndex:
+  """Memory-mapped TF-IDF index answering top-k nearest dataset examples"""
+
+  def __init__(self, index_dir: str):
+    path = Path(index_dir)
+    with open(path / 'meta.json', 'r', encoding = 'utf-8') as f:
+      self.meta = json.load(f)
+    if self.meta.get('version') != INDEX_VERSION:
+      raise ValueError(f"Unsupported example index version: {self.meta.get('version')}")
+    with open(path / 'examples.json', 'r', encoding = 'utf-8') as f:
+      examples = json.load(f)
+    self.queries: List[str] = examples['queries']
+    self.function_calls: List[str] = examples['function_calls']
+    self.ngram_range = tuple(self.meta['ngram_range'])
+    self.n_features = self.meta['n_features']
+
+    self.indptr = np.load(path / 'indptr.npy', mmap_mode = 'r')
+    self.rows = np.load(path / 'rows.npy', mmap_mode = 'r')
+    self.weights = np.load(path / 'weights.npy', mmap_mode = 'r')
+    self.idf = np.load(path / 'idf.npy', mmap_mode = 'r')
+
+  def __len__(self) -> int:
+    return len(self.queries)
+
+  def search(self, text: str, k: int = 3) -> List[Tuple[float, int]]:
+    """Top-k (cosine similarity, example row) pairs, best first"""
+    counts = hash_features(text, self.ngram_range, self.n_features)
+    if not counts or k <= 0:
+      return []
+    features = np.fromiter(counts.keys(), dtype = np.int64, count = len(counts))
+    query = np.fromiter(counts.values(), dtype = np.float32, count = len(counts)) * self.idf[features]
+    norm = np.linalg.norm(query)
+    if not norm:
+      return []
+    query /= norm
+
+    # Gather the postings of every query feature and scatter-add into the scores
+    starts, ends = self.indptr[features], self.indptr[features + 1]
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+      return []
+    # Concatenated ranges [start, end) without a Python loop
+    postings = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    scores = np.bincount(
+      self.rows[postings],
+      weights = self.weights[postings] * np.repeat(query, lengths),
+      minlength = len(self.queries),
+    )
+
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(float(scores[i]), int(i)) for i in top if scores[i] > 0]
+
+  def nearest_examples(self, text: str, k: int = 3) -> List[Tuple[str, str]]:
+    """Top-k (query, function call) examples"""
+    return [(self.queries[row], self.function_calls[row]) for _, row in self.search(text, k)]
+
+_index: Optional[ExampleIndex] = None
+_index_lock = threading.Lock()
+_index_missing = False
+
+def get_example_index() -> Optional[ExampleIndex]:
+  """Load the configured index once; None when it has not been built"""
+  global _index, _index_missing
+  if _index is not None or _index_missing:
+    return _index
+  with _index_lock:
+    if _index is None and not _index_missing:
+      path = Path(__file__).parent.parent / config.FEW_SHOT_INDEX_PATH
+      if (path / 'meta.json').exists():
+        _index = ExampleIndex(str(path))
+        logger.info(f"Loaded {len(_index)} few-shot examples from {path}")
+      else:
+        _index_missing = True
+        logger.warning(f"Few-shot index not found at {path}, build it with `python -m prompts.examples`")
+    return _index
+
+def main():
+  parser = argparse.ArgumentParser(description = 'Build the few-shot example index')
+  parser.add_argument('--dataset', default = 'data/function_calling_dataset_10k_natural_time.csv')
+  parser.add_argument('--out', default = config.FEW_SHOT_INDEX_PATH)
+  args = parser.parse_args()
+
+  count = build_index(args.dataset, args.out)
+  print(f"Indexed {count} examples into {args.out}")
+
+if __name__ == "__main__":
+  main()
\ No newline at end of file
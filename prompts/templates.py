@@ -1,11 +1,14 @@
-from typing import List, Dict
+import hashlib
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple
 from config.settings import config
+from utils.cache import LRUCache
 from utils.date_utils import VietnamDateUtils
 
 # SYSTEM_PROMPT = """
 # You are a business analytics function calling assistant. Convert natural language queries into precise function calls.
 
-SYSTEM_PROMPT = """You are a business analytics function calling API. Your ONLY job is to convert queries into function calls.
+SYSTEM_RULES = """You are a business analytics function calling API. Your ONLY job is to convert queries into function calls.
 
 RULES:
 - Return ONLY the function call syntax
@@ -55,7 +58,9 @@ CRITICAL CONTENT MAPPING (MUST USE EXACT VALUES):
 - "hiệu suất/performance" → content='performance'
 - "nghỉ phép/leave" → content='leave_request'
 - "hóa đơn/invoice/bill" → content='invoice'
+"""
 
+FIXED_EXAMPLES = """
 FUNCTION CALL EXAMPLES:
 Input: "Show financial report RPT123 tomorrow"
 Output: get(departments='finance', content='report', id='RPT123', type_of_time='day', specific_time='2025-06-12')
@@ -67,51 +72,212 @@ Input: "Get employee data from last quarter"
 Output: get(departments='finance', content='employee', id='employee_789', type_of_time='range', specific_time='2025-03-01 to 2025-05-31')
 """
 
-def create_function_calling_prompt(english_query: str, schema: List[Dict], current_date: str = config.CURRENT_DATE) -> str:
-  """Create optimized prompt for function calling"""
-
-  current_date = config.CURRENT_DATE
-  tomorrow = VietnamDateUtils.get_tomorrow()
-  yesterday = VietnamDateUtils.get_yesterday()
-  next_week_range = VietnamDateUtils.get_next_week_range()
-  this_month_start = VietnamDateUtils.get_this_month_start()
+SYSTEM_PROMPT = SYSTEM_RULES + FIXED_EXAMPLES
 
-  current_quarter = VietnamDateUtils.get_current_quarter_range()
-  next_quarter = VietnamDateUtils.get_next_quarter_range()
-  previous_quarter = VietnamDateUtils.get_previous_quarter_range()
+class PromptBuilder:
+  """Builds function calling prompts from a static prefix, a per-day date block and the query.
 
-  # Extract function info from schema
-  functions_info = []
-  for func in schema:
-    params = []
-    for param_name, param_info in func['parameters']['properties'].items():
-      if 'enum' in param_info:
-        params.append(f"{param_name}: {param_info['enum']}")
-      else:
-        params.append(f"{param_name}: {param_info['type']}")
+  The prefix (system prompt + function signatures) depends only on the schema
+  and is rendered once. The date block is re-rendered when the Vietnam
+  calendar day changes. Keeping everything before the user query identical
+  across requests lets Ollama reuse its KV cache for the shared prefix.
 
-    functions_info.append(f"{func['name']}({', '.join(params)})")
+  With few-shot retrieval the fixed examples are replaced by the dataset
+  examples nearest to the query, placed after the shared prefix.
+  """
 
-  schema_info = "\n".join(functions_info)
+  def __init__(self, schema: List[Dict], compiled: Optional[Dict[str, Any]] = None):
+    """`compiled` is the output of compile(schema), e.g. loaded from a startup artifact"""
+    self.schema = schema
+    compiled = compiled or self.compile(schema)
+    self.static_prefix = compiled['static_prefix']
+    self.rules_prefix = compiled['rules_prefix']
+    self.output_format = compiled['output_format']
+    self._date_block = ('', '')
 
-  return f"""
+  @classmethod
+  def compile(cls, schema: List[Dict]) -> Dict[str, Any]:
+    """Every part of the prompt that depends only on the schema, JSON-serializable"""
+    schema_info = cls._render_schema_info(schema)
+    return {
+      'static_prefix': f"""
 {SYSTEM_PROMPT}
 
+AVAILABLE FUNCTIONS SIGNATURES:
+{schema_info}
+""",
+      'rules_prefix': f"""
+{SYSTEM_RULES}
+AVAILABLE FUNCTIONS SIGNATURES:
+{schema_info}
+""",
+      'output_format': cls._render_output_format(schema),
+    }
+
+  @classmethod
+  def compile_fingerprint(cls) -> str:
+    """Hash of every compile() input other than the schema: the prompt texts and this module's rendering code"""
+    digest = hashlib.sha256()
+    for part in (SYSTEM_PROMPT, SYSTEM_RULES):
+      digest.update(part.encode('utf-8'))
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+  @staticmethod
+  def _render_schema_info(schema: List[Dict]) -> str:
+    # Extract function info from schema
+    functions_info = []
+    for func in schema:
+      params = []
+      for param_name, param_info in func['parameters']['properties'].items():
+        if 'enum' in param_info:
+          params.append(f"{param_name}: {param_info['enum']}")
+        else:
+          params.append(f"{param_name}: {param_info['type']}")
+
+      functions_info.append(f"{func['name']}({', '.join(params)})")
+
+    return "\n".join(functions_info)
+
+  @staticmethod
+  def _render_output_format(schema: List[Dict]) -> Dict[str, Any]:
+    """JSON schema of a `{name, parameters}` object, for Ollama's `format` option"""
+    variants = []
+    for func in schema:
+      properties = {}
+      for param_name, param_info in func['parameters']['properties'].items():
+        prop = {'type': param_info['type']}
+        for key in ('enum', 'pattern'):
+          if key in param_info:
+            prop[key] = param_info[key]
+        properties[param_name] = prop
+
+      variants.append({
+        'type': 'object',
+        'properties': {
+          'name': {'type': 'string', 'enum': [func['name']]},
+          'parameters': {
+            'type': 'object',
+            'properties': properties,
+            'required': func['parameters'].get('required', []),
+            'additionalProperties': False,
+          },
+        },
+        'required': ['name', 'parameters'],
+        'additionalProperties': False,
+      })
+    return {'anyOf': variants}
+
+  @staticmethod
+  def _render_date_block(current_date: str) -> str:
+    tomorrow = VietnamDateUtils.get_tomorrow()
+    yesterday = VietnamDateUtils.get_yesterday()
+    next_week_range = VietnamDateUtils.get_next_week_range()
+    this_month_start = VietnamDateUtils.get_this_month_start()
+
+    current_quarter = VietnamDateUtils.get_current_quarter_range()
+    next_quarter = VietnamDateUtils.get_next_quarter_range()
+    previous_quarter = VietnamDateUtils.get_previous_quarter_range()
+
+    return f"""
+TIME MAPPING FOR CURRENT DATE:
 - "tomorrow" → type_of_time='day', specific_time='{tomorrow}'
 - "today/hôm nay" → type_of_time='day', specific_time='{current_date}'
 - "yesterday/hôm qua" → type_of_time='day', specific_time='{yesterday}'
 - "next week/tuần tới" → type_of_time='range', specific_time='{next_week_range}'
-- "this month/tháng này" → type_of_time='month', specific_time='{this_month_start}
+- "this month/tháng này" → type_of_time='month', specific_time='{this_month_start}'
 - "current quarter/quý này" → type_of_time='quarter', specific_time='{current_quarter}'
 - "next quarter/quý tới" → type_of_time='quarter', specific_time='{next_quarter}'
 - "previous quarter/quý trước" → type_of_time='quarter', specific_time='{previous_quarter}'
 
 CURRENT DATE: {current_date}
+"""
 
-AVAILABLE FUNCTIONS SIGNATURES:
-{schema_info}
+  def date_block(self) -> str:
+    """Date mapping block for the current Vietnam day, rendered once per day"""
+    current_date = VietnamDateUtils.get_current_data()
+    cached_date, block = self._date_block
+    if cached_date != current_date:
+      block = self._render_date_block(current_date)
+      # Single tuple assignment so concurrent readers never see a mixed state
+      self._date_block = (current_date, block)
+    return block
+
+  def prefix(self, examples: Optional[List[Tuple[str, str]]] = None) -> str:
+    """Everything that precedes the user query"""
+    if not examples:
+      return self.static_prefix + self.date_block()
+    rendered = "\n\n".join(f'Input: "{query}"\nOutput: {call}' for query, call in examples)
+    return f"""{self.rules_prefix}{self.date_block()}
+SIMILAR EXAMPLES (their dates are illustrative, use the time mapping above):
+{rendered}
+"""
+
+  @staticmethod
+  def nearest_examples(query: Optional[str]) -> Optional[List[Tuple[str, str]]]:
+    """Dataset examples closest to `query`, or None to use the fixed examples"""
+    if not query or config.FEW_SHOT_EXAMPLES <= 0:
+      return None
+    # Imported on first use, it pulls in numpy
+    from prompts.examples import get_example_index
+    index = get_example_index()
+    if index is None:
+      return None
+    return index.nearest_examples(query, config.FEW_SHOT_EXAMPLES) or None
+
+  @staticmethod
+  def _answer_cue(structured: bool) -> str:
+    if structured:
+      # Same prefix as the text prompt, so both modes share Ollama's KV cache
+      return """Answer with the function call as a JSON object: {"name": function_name, "parameters": {param1: value1, ...}}
 
+FUNCTION CALL (JSON):
+"""
+    return """FUNCTION CALL:
+  """
+
+  def build(self, english_query: str, structured: bool = False, examples_query: Optional[str] = None) -> str:
+    """`examples_query` selects the few-shot examples; the dataset is in Vietnamese, so pass the original query"""
+    return f"""{self.prefix(self.nearest_examples(examples_query))}
 USER QUERY: {english_query}
 
-FUNCTION CALL:
-  """
\ No newline at end of file
+{self._answer_cue(structured)}"""
+
+  def build_direct(self, vietnamese_query: str, with_translation: bool = False, structured: bool = False) -> str:
+    """Prompt that maps a Vietnamese query straight to a function call, skipping translation.
+
+    Structured output cannot carry the translation, so `with_translation`
+    is ignored when `structured` is set.
+    """
+    prefix = self.prefix(self.nearest_examples(vietnamese_query))
+    if with_translation and not structured:
+      return f"""{prefix}
+The user query is in Vietnamese. Use the Vietnamese keywords in the mappings above.
+First write its English translation on one line, then the function call on the next line.
+
+USER QUERY (Vietnamese): {vietnamese_query}
+
+ENGLISH TRANSLATION:"""
+
+    return f"""{prefix}
+The user query is in Vietnamese. Use the Vietnamese keywords in the mappings above.
+
+USER QUERY (Vietnamese): {vietnamese_query}
+
+{self._answer_cue(structured)}"""
+
+# Bounded: every chatbot loads its own schema list. A cached builder keeps
+# its schema alive, so an id cannot be reused while its entry exists.
+_builders = LRUCache(max_size = 8)
+
+def get_prompt_builder(schema: List[Dict], compiled: Optional[Dict[str, Any]] = None) -> PromptBuilder:
+  """Return the shared PromptBuilder for a loaded schema"""
+  builder = _builders.get(id(schema))
+  if builder is None or builder.schema is not schema:
+    builder = PromptBuilder(schema, compiled)
+    _builders.set(id(schema), builder)
+  return builder
+
+def create_function_calling_prompt(english_query: str, schema: List[Dict], vietnamese_query: Optional[str] = None) -> str:
+  """Create optimized prompt for function calling"""
+  return get_prompt_builder(schema).build(english_query, examples_query = vietnamese_query or english_query)
@@ -1,14 +1,19 @@
-import sys
+import argparse
 import json
+import os
+import sys
+import time
+from collections import deque
 from pathlib import Path
+from typing import Dict, Any, Iterator, TextIO, Tuple
 
 sys.path.append(str(Path(__file__).parent))
 
-from core.chatbot import BusinessAnalystChatbot
+from core.chatbot import BusinessAnalystChatbot, PIPELINE_MODES
 from config.settings import config
 
-def main():
-  """Main application entry point"""
+def interactive():
+  """Interactive REPL"""
   print("Vietnamese Business Analytics Chatbot")
   print("=" * 50)
 
@@ -45,9 +50,16 @@ def main():
 
         print(f"Bot: {display_msg}")
 
+        if bot.executor is not None:
+          try:
+            print(f"     {bot.execute_function_call(function_call)['message']}")
+          except (ValueError, TypeError) as e:
+            print(f"Execution error: {e}")
+
         if config.DEBUG:
           print(f"Vietnamese Query: {result['vietnamese_query']}")
           print(f"English Query: {result['english_query']}")
+          print(f"Resolved By: {result['resolved_by']}")
           print(f"Function Call: {json.dumps(result['function_call'], indent=2)}")
       else:
         print(f"Error: {result['error']}")
@@ -58,5 +70,130 @@ def main():
     except Exception as e:
       print(f"Unexpected error: {e}")
 
+def read_queries(lines: Iterator[str], offset: int, skipped: Dict[str, int]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+  """(line number, record) per input line after `offset`.
+
+  A line is a JSON object with a "query" (and optionally an "id"), a JSON
+  string, or plain text. Blank and unusable lines are skipped.
+  """
+  for number, line in enumerate(lines, 1):
+    if number <= offset:
+      continue
+    line = line.strip()
+    if not line:
+      continue
+    try:
+      record = json.loads(line) if line[0] in '{"' else line
+    except ValueError:
+      record = None
+    if isinstance(record, str):
+      record = {'query': record}
+    if not isinstance(record, dict) or not isinstance(record.get('query'), str) or not record['query'].strip():
+      skipped['count'] += 1
+      print(f"Skipping line {number}: no query", file = sys.stderr)
+      continue
+    yield number, record
+
+def count_lines(path: str) -> int:
+  with open(path, 'rb') as f:
+    return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+
+def resume_offset(path: str) -> int:
+  """Input lines already answered in an earlier run's output; drops a partially written last line"""
+  if not os.path.exists(path):
+    return 0
+  with open(path, 'rb+') as f:
+    size = f.seek(0, os.SEEK_END)
+    block = 1 << 16
+    while True:
+      start = max(0, size - block)
+      f.seek(start)
+      tail = f.read(size - start)
+      end = tail.rfind(b'\n')
+      if end == -1 and start > 0:
+        block *= 2
+        continue
+      # Everything after the last newline is a write cut short by the crash
+      f.truncate(start + end + 1)
+      if end == -1:
+        return 0
+      begin = tail.rfind(b'\n', 0, end) + 1
+      if begin == 0 and start > 0:
+        block *= 2
+        continue
+      return json.loads(tail[begin:end])['line']
+
+def run_batch(args):
+  """Stream queries from a JSONL file or stdin and write one JSON result per line"""
+  config.LOG_LEVEL = args.log_level
+  if args.resume and args.out == '-':
+    sys.exit("--resume needs --out FILE")
+  offset = resume_offset(args.out) if args.resume else args.offset
+  total = count_lines(args.batch) - offset if args.batch != '-' and args.progress > 0 else None
+
+  bot = BusinessAnalystChatbot(lazy = True)
+  source: TextIO = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding = 'utf-8')
+  out: TextIO = sys.stdout if args.out == '-' else open(args.out, 'a' if args.resume else 'w', encoding = 'utf-8')
+  if offset:
+    print(f"Resuming after input line {offset}", file = sys.stderr)
+
+  skipped = {'count': 0}
+  # Line numbers and ids of the queries in flight, in the order their results come back
+  in_flight = deque()
+
+  def queries() -> Iterator[str]:
+    for number, record in read_queries(source, offset, skipped):
+      in_flight.append((number, record.get('id')))
+      yield record['query']
+
+  done = successes = 0
+  start = last_report = time.perf_counter()
+
+  def report(final: bool = False):
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0.0
+    line = f"{done} queries, {successes} succeeded, {skipped['count']} skipped, {rate:.1f} queries/s"
+    if total and not final:
+      remaining = max(0, total - done - skipped['count'])
+      line += f", {(done + skipped['count']) / total:.1%}, ETA {remaining / rate:.0f}s" if rate else ''
+    print(("Done: " if final else "") + line, file = sys.stderr)
+
+  try:
+    for result in bot.process_stream(queries(), concurrency = args.workers, mode = args.mode):
+      number, record_id = in_flight.popleft()
+      entry = {'line': number, **({'id': record_id} if record_id is not None else {}), **result}
+      out.write(json.dumps(entry, ensure_ascii = False) + '\n')
+      done += 1
+      successes += bool(result['success'])
+      if args.progress > 0 and time.perf_counter() - last_report >= args.progress:
+        out.flush()
+        report()
+        last_report = time.perf_counter()
+  finally:
+    out.flush()
+    if source is not sys.stdin:
+      source.close()
+    if out is not sys.stdout:
+      out.close()
+  report(final = True)
+
+def main():
+  """Main application entry point"""
+  parser = argparse.ArgumentParser(description = 'Vietnamese Business Analytics Chatbot')
+  parser.add_argument('--batch', metavar = 'IN', help = 'Process queries from a JSONL file, - for stdin, instead of the interactive prompt')
+  parser.add_argument('--out', default = '-', help = 'JSONL results file, - for stdout (default: -)')
+  parser.add_argument('--workers', type = int, default = config.BATCH_CONCURRENCY, help = 'Queries processed concurrently')
+  parser.add_argument('--mode', choices = PIPELINE_MODES, default = None, help = 'LLM pipeline (default: PIPELINE_MODE)')
+  parser.add_argument('--offset', type = int, default = 0, help = 'Skip the first N input lines')
+  parser.add_argument('--resume', action = 'store_true', help = 'Append to --out, continuing after the last input line it answers')
+  parser.add_argument('--progress', type = float, default = 10.0, help = 'Seconds between throughput lines on stderr, 0 disables')
+  parser.add_argument('--log-level', default = 'WARNING', type = str.upper, choices = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], help = 'Log level in batch mode')
+  args = parser.parse_args()
+
+  if args.batch:
+    run_batch(args)
+  else:
+    interactive()
+
 if __name__ == "__main__":
   main()
\ No newline at end of file
@@ -0,0 +1,40 @@
+import argparse
+import logging
+import signal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import config
+from core.server import ChatbotHTTPServer
+
+def main():
+  """HTTP server entry point"""
+  parser = argparse.ArgumentParser(description = 'Serve the chatbot over HTTP')
+  parser.add_argument('--host', default = config.SERVER_HOST)
+  parser.add_argument('--port', type = int, default = config.SERVER_PORT)
+  parser.add_argument('--workers', type = int, default = config.SERVER_WORKERS, help = 'Queries processed concurrently')
+  parser.add_argument('--queue-size', type = int, default = config.SERVER_QUEUE_SIZE, help = 'Queries admitted before answering 429')
+  args = parser.parse_args()
+
+  server = ChatbotHTTPServer((args.host, args.port), workers = args.workers, queue_size = args.queue_size)
+  logger = logging.getLogger(__name__)
+
+  def stop(signum, frame):
+    # shutdown() blocks until serve_forever returns, so it cannot run on the serving thread
+    threading.Thread(target = server.graceful_shutdown, name = 'chatbot-shutdown').start()
+
+  signal.signal(signal.SIGTERM, stop)
+  signal.signal(signal.SIGINT, stop)
+
+  logger.info(f"Serving on {server.base_url} with {args.workers} workers")
+  try:
+    server.serve_forever()
+  finally:
+    server.server_close()
+    logger.info("Server stopped")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,147 @@
+import pytest
+import requests
+
+from core import circuit_breaker
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_llm_unavailable
+
+class FakeClock:
+  def __init__(self):
+    self.now = 1000.0
+
+  def monotonic(self) -> float:
+    return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = FakeClock()
+  monkeypatch.setattr(circuit_breaker, 'time', clock)
+  return clock
+
+def make_breaker(**overrides):
+  options = dict(
+    window = 10,
+    min_calls = 4,
+    failure_rate = 0.5,
+    slow_call_seconds = 1.0,
+    slow_call_rate = 0.5,
+    open_seconds = 5.0,
+    max_open_seconds = 20.0,
+    half_open_probes = 2,
+  )
+  options.update(overrides)
+  return CircuitBreaker('test', **options)
+
+def call(breaker, seconds = 0.1, error = False):
+  breaker.before_call()
+  breaker.record(seconds, error)
+
+def trip(breaker):
+  for _ in range(breaker.min_calls):
+    call(breaker, error = True)
+  assert breaker.state == OPEN
+
+def test_stays_closed_below_min_calls(clock):
+  breaker = make_breaker()
+  for _ in range(3):
+    call(breaker, error = True)
+  assert breaker.state == CLOSED
+
+def test_opens_on_failure_rate(clock):
+  breaker = make_breaker()
+  call(breaker)
+  call(breaker)
+  call(breaker, error = True)
+  assert breaker.state == CLOSED
+  call(breaker, error = True)
+  assert breaker.state == OPEN
+  assert breaker.stats()['opened'] == 1
+
+def test_opens_on_slow_call_rate(clock):
+  breaker = make_breaker()
+  for seconds in (0.1, 0.1, 2.0, 3.0):
+    call(breaker, seconds = seconds)
+  assert breaker.state == OPEN
+
+def test_open_circuit_rejects_without_calling(clock):
+  breaker = make_breaker()
+  trip(breaker)
+  clock.now += 2.0
+  with pytest.raises(CircuitOpenError) as raised:
+    breaker.before_call()
+  assert raised.value.retry_in == pytest.approx(3.0)
+  assert not breaker.available
+  assert breaker.stats()['rejected'] == 1
+
+def test_half_open_admits_limited_probes(clock):
+  breaker = make_breaker()
+  trip(breaker)
+  clock.now += 5.0
+  assert breaker.state == HALF_OPEN
+  assert breaker.available
+  breaker.before_call()
+  breaker.before_call()
+  assert not breaker.available
+  with pytest.raises(CircuitOpenError):
+    breaker.before_call()
+
+def test_successful_probes_close_with_fresh_window(clock):
+  breaker = make_breaker()
+  trip(breaker)
+  clock.now += 5.0
+  call(breaker)
+  assert breaker.state == HALF_OPEN
+  call(breaker)
+  assert breaker.state == CLOSED
+  assert breaker.stats()['calls'] == 0
+
+def test_failed_probe_doubles_open_time_up_to_max(clock):
+  breaker = make_breaker()
+  trip(breaker)
+  for expected in (10.0, 20.0, 20.0):
+    clock.now += breaker.stats()['open_seconds']
+    assert breaker.state == HALF_OPEN
+    call(breaker, error = True)
+    assert breaker.state == OPEN
+    assert breaker.stats()['open_seconds'] == expected
+
+  # Closing again resets the backoff
+  clock.now += 20.0
+  call(breaker)
+  call(breaker)
+  assert breaker.state == CLOSED
+  assert breaker.stats()['open_seconds'] == 5.0
+
+def test_calls_admitted_before_opening_are_ignored(clock):
+  breaker = make_breaker()
+  breaker.before_call()
+  trip(breaker)
+  breaker.record(0.1, False)
+  assert breaker.state == OPEN
+
+def test_reset_closes(clock):
+  breaker = make_breaker()
+  trip(breaker)
+  breaker.reset()
+  assert breaker.state == CLOSED
+  breaker.before_call()
+
+def http_error(status: int) -> requests.HTTPError:
+  response = requests.Response()
+  response.status_code = status
+  return requests.HTTPError(f"{status} error", response = response)
+
+@pytest.mark.parametrize('error, expected', [
+  (CircuitOpenError('test', 1.0), True),
+  (requests.ConnectionError('refused'), True),
+  (requests.ConnectTimeout('connect timeout'), True),
+  (requests.ReadTimeout('read timeout'), True),
+  (http_error(500), True),
+  (http_error(503), True),
+  (http_error(429), True),
+  (http_error(404), False),
+  (http_error(400), False),
+  (requests.exceptions.JSONDecodeError('bad json', '', 0), False),
+  (ValueError('LLM error: model not found'), False),
+])
+def test_is_llm_unavailable(error, expected):
+  assert is_llm_unavailable(error) is expected
@@ -0,0 +1,116 @@
+from datetime import date
+
+import pytest
+
+from utils.date_utils import DateExpressionEngine, period_bounds, periods_back_to_elapsed, shift_period
+
+# A Wednesday in the middle of Q2
+TODAY = date(2025, 6, 11)
+
+@pytest.fixture
+def engine():
+  return DateExpressionEngine()
+
+def resolve_first(engine, text):
+  first = engine.resolve(text, today = TODAY).first
+  return (first.type_of_time, first.specific_time) if first else None
+
+@pytest.mark.parametrize('text, expected', [
+  ('xem báo cáo hôm nay', ('day', '2025-06-11')),
+  ('xem báo cáo hôm qua', ('day', '2025-06-10')),
+  ('thêm báo cáo ngày mai', ('day', '2025-06-12')),
+  ('báo cáo tuần trước', ('week', '2025-06-02')),
+  ('báo cáo tuần này', ('week', '2025-06-09')),
+  ('báo cáo tháng trước', ('month', '2025-05-01')),
+  ('báo cáo tháng sau', ('month', '2025-07-01')),
+  ('báo cáo quý này', ('range', '2025-04-01 to 2025-06-30')),
+  ('báo cáo quý trước', ('range', '2025-01-01 to 2025-03-31')),
+  ('báo cáo năm ngoái', ('year', '2024-01-01')),
+  ('report for next quarter', ('range', '2025-07-01 to 2025-09-30')),
+])
+def test_relative_phrases(engine, text, expected):
+  assert resolve_first(engine, text) == expected
+
+@pytest.mark.parametrize('text, expected', [
+  ('báo cáo ngày 5 tháng 3 năm 2024', ('day', '2024-03-05')),
+  ('báo cáo ngày 5/3', ('day', '2025-03-05')),
+  ('báo cáo 2024-02-29', ('day', '2024-02-29')),
+  ('báo cáo quý 2 năm 2024', ('range', '2024-04-01 to 2024-06-30')),
+  ('báo cáo q4 năm ngoái', ('range', '2024-10-01 to 2024-12-31')),
+  ('báo cáo tháng 2 năm 2024', ('month', '2024-02-01')),
+  ('báo cáo năm 2023', ('year', '2023-01-01')),
+  ('từ ngày 1 đến ngày 15 tháng 6', ('range', '2025-06-01 to 2025-06-15')),
+  ('từ ngày 1/6 đến ngày 15/7/2025', ('range', '2025-06-01 to 2025-07-15')),
+  ('từ 2025-01-01 đến 2025-01-31', ('range', '2025-01-01 to 2025-01-31')),
+  ('hai tuần qua', ('range', '2025-05-28 to 2025-06-11')),
+  ('3 ngày trước', ('day', '2025-06-08')),
+  ('2 tuần nữa', ('range', '2025-06-12 to 2025-06-25')),
+  ('từ đầu tháng đến nay', ('range', '2025-06-01 to 2025-06-11')),
+])
+def test_explicit_expressions(engine, text, expected):
+  assert resolve_first(engine, text) == expected
+
+def test_invalid_dates_are_not_resolved(engine):
+  resolution = engine.resolve('báo cáo ngày 31/2', today = TODAY)
+  assert resolution.first is None
+  assert resolution.unresolved
+
+def test_no_time_expression(engine):
+  resolution = engine.resolve('xem báo cáo tài chính', today = TODAY)
+  assert resolution.first is None
+  assert not resolution.unresolved
+
+def test_unresolved_time_words(engine):
+  assert engine.resolve('báo cáo tuần đầu tiên', today = TODAY).unresolved
+
+def test_comparison_names_two_periods(engine):
+  resolution = engine.resolve('so sánh tháng này với tháng trước', today = TODAY)
+  assert [e.specific_time for e in resolution.expressions] == ['2025-06-01', '2025-05-01']
+  assert not resolution.unresolved
+
+def test_resolve_batch_matches_resolve(engine):
+  texts = ['báo cáo hôm nay', 'Báo cáo  hôm nay', 'quý trước', 'không có thời gian']
+  assert engine.resolve_batch(texts, today = TODAY) == [engine.resolve(text, today = TODAY) for text in texts]
+
+@pytest.mark.parametrize('type_of_time, specific_time, expected', [
+  ('day', '2025-06-11', (date(2025, 6, 11), date(2025, 6, 11))),
+  ('week', '2025-06-09', (date(2025, 6, 9), date(2025, 6, 15))),
+  ('month', '2024-02-01', (date(2024, 2, 1), date(2024, 2, 29))),
+  ('quarter', '2025-04-01', (date(2025, 4, 1), date(2025, 6, 30))),
+  ('year', '2025-01-01', (date(2025, 1, 1), date(2025, 12, 31))),
+  ('range', '2025-06-01 to 2025-06-15', (date(2025, 6, 1), date(2025, 6, 15))),
+])
+def test_period_bounds(type_of_time, specific_time, expected):
+  assert period_bounds(type_of_time, specific_time) == expected
+
+def test_period_bounds_rejects_empty_range():
+  with pytest.raises(ValueError):
+    period_bounds('range', '2025-06-15 to 2025-06-01')
+
+@pytest.mark.parametrize('start, end, periods, expected', [
+  # Calendar months stay aligned whatever their length
+  (date(2025, 3, 1), date(2025, 3, 31), -1, (date(2025, 2, 1), date(2025, 2, 28))),
+  (date(2024, 1, 1), date(2024, 3, 31), 1, (date(2024, 4, 1), date(2024, 6, 30))),
+  (date(2025, 1, 1), date(2025, 12, 31), -2, (date(2023, 1, 1), date(2023, 12, 31))),
+  # Other periods move by their length in days
+  (date(2025, 6, 11), date(2025, 6, 11), -1, (date(2025, 6, 10), date(2025, 6, 10))),
+  (date(2025, 6, 9), date(2025, 6, 15), 2, (date(2025, 6, 23), date(2025, 6, 29))),
+  (date(2025, 6, 5), date(2025, 6, 14), -1, (date(2025, 5, 26), date(2025, 6, 4))),
+])
+def test_shift_period(start, end, periods, expected):
+  assert shift_period(start, end, periods) == expected
+
+@pytest.mark.parametrize('start, end', [
+  (date(2025, 6, 11), date(2025, 6, 11)),
+  (date(2030, 1, 1), date(2030, 1, 1)),
+  (date(2025, 6, 1), date(2025, 6, 30)),
+  (date(2025, 10, 1), date(2025, 12, 31)),
+  (date(2027, 1, 1), date(2027, 12, 31)),
+  (date(2024, 1, 1), date(2024, 12, 31)),
+  (date(2025, 6, 9), date(2025, 6, 20)),
+])
+def test_periods_back_to_elapsed_matches_walking_back(start, end):
+  gap = 1
+  while shift_period(start, end, -gap)[1] >= TODAY:
+    gap += 1
+  assert periods_back_to_elapsed(start, end, TODAY) == gap
@@ -0,0 +1,81 @@
+import pytest
+
+from utils.parsers import FunctionCallParser, IncrementalCallParser
+
+@pytest.fixture
+def parser():
+  return FunctionCallParser()
+
+def stream(parser, text, chunk_size = 3, accept = None):
+  """Feed `text` in chunks; returns (call, stopped early)"""
+  incremental = IncrementalCallParser(parser, accept = accept)
+  for i in range(0, len(text), chunk_size):
+    call = incremental.feed(text[i:i + chunk_size])
+    if call is not None:
+      return call, True
+  return parser.find(incremental.text), False
+
+def test_parse_quoted_arguments(parser):
+  call = parser.parse("get(departments='finance', content=\"report\", id='RPT123')")
+  assert call == {'name': 'get', 'parameters': {'departments': 'finance', 'content': 'report', 'id': 'RPT123'}}
+
+def test_parse_bare_and_nested_values(parser):
+  call = parser.parse("Output: ADD(type_of_time=day, specific_time=max(1, 2))")
+  assert call == {'name': 'add', 'parameters': {'type_of_time': 'day', 'specific_time': 'max(1, 2)'}}
+
+def test_parse_escaped_quote(parser):
+  assert parser.parse(r"get(id='it\'s')")['parameters'] == {'id': "it's"}
+
+def test_parse_without_call_raises(parser):
+  with pytest.raises(ValueError):
+    parser.parse('I cannot answer that')
+
+def test_malformed_candidate_is_skipped(parser):
+  assert parser.find("get(oops get(id='1')")['parameters'] == {'id': '1'}
+
+def test_fenced_call_is_preferred_after_opened_block(parser):
+  text = "```\nno call\n```\nExample: get(id='1')\n```\nadd(id='2')\n```"
+  assert parser.find(text)['name'] == 'add'
+
+def test_bare_call_before_any_block_wins(parser):
+  text = "get(id='1')\n```\nadd(id='2')\n```"
+  assert parser.find(text)['name'] == 'get'
+
+def test_parse_json(parser):
+  call = parser.parse_json('{"name": "GET", "parameters": {"id": "1", "n": 2}}')
+  assert call == {'name': 'get', 'parameters': {'id': '1', 'n': '2'}}
+
+@pytest.mark.parametrize('text', [
+  "Example: get(id='1')\n```\nadd(id='2')\n```\nmore text",
+  "```\nadd(id='2')\n```",
+  "```\nadd(id='2')",
+  "get(id='1')\nthen some rambling",
+  "```\nno call\n```\nget(id='1')",
+  "```\nno call\n```\nget(id='1')\n```\nadd(id='2')\n```",
+  "get(id='1') ```\nadd(id='2')",
+  "get(id='1')\n```\nadd(id='2')\n```",
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 7])
+def test_streaming_matches_find(parser, text, chunk_size):
+  assert stream(parser, text, chunk_size)[0] == parser.find(text)
+
+def test_streaming_stops_at_closed_fence(parser):
+  text = "```\nadd(id='2')\n```\n" + 'rambling ' * 50
+  call, early = stream(parser, text)
+  assert early and call['name'] == 'add'
+
+def test_streaming_stops_at_bare_call(parser):
+  text = "get(departments='finance', content='report')\n\nExplanation: " + 'rambling ' * 50
+  call, early = stream(parser, text, chunk_size = 7)
+  assert early and call == parser.find(text)
+
+def test_streaming_waits_for_incomplete_earlier_candidate(parser):
+  # The outer call is still open, so the nested one is not the answer yet
+  incremental = IncrementalCallParser(parser)
+  assert incremental.feed("get(id=add(x='1')") is None
+  assert incremental.feed(", content='report')")['name'] == 'get'
+
+def test_streaming_respects_accept(parser):
+  text = "```\nadd(id='2')\n```\nmore"
+  call, early = stream(parser, text, accept = lambda call: call['name'] == 'get')
+  assert not early and call['name'] == 'add'
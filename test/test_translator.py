@@ -0,0 +1,42 @@
+import pytest
+
+from config.settings import config
+from core.translator import Translator
+
+class FakeTransport:
+  """Streams canned response chunks and records how many were read"""
+
+  def __init__(self, chunks):
+    self.chunks = chunks
+    self.read = 0
+
+  def stream_generate(self, payload, label = 'generate'):
+    for chunk in self.chunks:
+      self.read += 1
+      yield {'response': chunk}
+
+@pytest.fixture(autouse = True)
+def no_translation_cache(monkeypatch):
+  monkeypatch.setattr(config, 'TRANSLATION_CACHE_ENABLED', False)
+
+def translate(chunks):
+  transport = FakeTransport(chunks)
+  translator = Translator(transport = transport)
+  return translator.vietnamese_to_english('Thêm báo cáo tài chính', stream = True), transport.read
+
+def test_stops_after_first_line():
+  english, read = translate(['Add a ', 'financial report', '\nNote: ', 'rambling', ' more'])
+  assert english == 'Add a financial report'
+  assert read == 3
+
+def test_leading_newline_chunk_does_not_end_translation():
+  english, read = translate(['\nAdd', ' a financial', ' report\n', 'Explanation'])
+  assert english == 'Add a financial report'
+  assert read == 3
+
+@pytest.mark.parametrize('chunks', [
+  ['\n', '\n  Add a financial report'],
+  ['  \n\nAdd a financial report'],
+])
+def test_whitespace_before_translation_is_skipped(chunks):
+  assert translate(chunks)[0] == 'Add a financial report'
@@ -0,0 +1,177 @@
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_TRAILING_PUNCTUATION = '.,!?;:…'
+
+# Tokens containing a digit, such as record ids (RPT123)
+_ID_TOKEN_RE = re.compile(r'\w*\d\w*')
+
+def normalize_query(text: str, keep_id_case: bool = False) -> str:
+  """Normalize a query for cache lookups (NFC, collapsed whitespace, casefold, no trailing punctuation).
+
+  With `keep_id_case`, tokens containing a digit keep their case: record ids
+  are matched case-sensitively, so 'RPT123' and 'rpt123' must not share a
+  cached answer.
+  """
+  text = ' '.join(unicodedata.normalize('NFC', text).split())
+  if keep_id_case:
+    parts = []
+    pos = 0
+    for m in _ID_TOKEN_RE.finditer(text):
+      parts.append(text[pos:m.start()].casefold())
+      parts.append(m.group())
+      pos = m.end()
+    parts.append(text[pos:].casefold())
+    text = ''.join(parts)
+  else:
+    text = text.casefold()
+  return text.rstrip(_TRAILING_PUNCTUATION + ' ')
+
+class LRUCache:
+  """Thread-safe in-memory LRU cache with per-entry TTL"""
+
+  def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+    self.max_size = max_size
+    self.ttl = ttl
+    self._data: 'OrderedDict[str, tuple]' = OrderedDict()
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def get(self, key: str) -> Optional[Any]:
+    with self._lock:
+      entry = self._data.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+
+      value, expires_at = entry
+      if expires_at is not None and expires_at <= time.monotonic():
+        del self._data[key]
+        self.expirations += 1
+        self.misses += 1
+        return None
+
+      self._data.move_to_end(key)
+      self.hits += 1
+      return value
+
+  def set(self, key: str, value: Any, ttl: Optional[float] = None):
+    ttl = self.ttl if ttl is None else ttl
+    expires_at = time.monotonic() + ttl if ttl is not None else None
+    with self._lock:
+      self._data[key] = (value, expires_at)
+      self._data.move_to_end(key)
+      while len(self._data) > self.max_size:
+        self._data.popitem(last = False)
+        self.evictions += 1
+
+  def clear(self):
+    with self._lock:
+      self._data.clear()
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        'size': len(self._data),
+        'max_size': self.max_size,
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'expirations': self.expirations,
+        'hit_rate': self.hits / lookups if lookups else 0.0,
+      }
+
+class SQLiteCacheStore:
+  """Persistent key/value tier backed by SQLite, shared by all threads of a process"""
+
+  def __init__(self, path: str, ttl: Optional[float] = None):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents = True, exist_ok = True)
+    self.ttl = ttl
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(str(self.path), check_same_thread = False)
+    self._conn.execute('PRAGMA journal_mode=WAL')
+    self._conn.execute('PRAGMA synchronous=NORMAL')
+    self._conn.execute(
+      'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+    )
+    self._conn.commit()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key: str) -> Optional[str]:
+    with self._lock:
+      row = self._conn.execute('SELECT value, created_at FROM cache WHERE key = ?', (key,)).fetchone()
+      if row is None or (self.ttl is not None and row[1] + self.ttl <= time.time()):
+        self.misses += 1
+        return None
+      self.hits += 1
+      return row[0]
+
+  def set(self, key: str, value: str):
+    with self._lock:
+      self._conn.execute(
+        'INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)',
+        (key, value, time.time()),
+      )
+      self._conn.commit()
+
+  def purge_expired(self) -> int:
+    """Delete expired rows, returns the number of rows removed"""
+    if self.ttl is None:
+      return 0
+    with self._lock:
+      cursor = self._conn.execute('DELETE FROM cache WHERE created_at + ? <= ?', (self.ttl, time.time()))
+      self._conn.commit()
+      return cursor.rowcount
+
+  def close(self):
+    with self._lock:
+      self._conn.close()
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      size = self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+      return {'size': size, 'hits': self.hits, 'misses': self.misses, 'path': str(self.path)}
+
+class TieredCache:
+  """In-memory LRU in front of an optional persistent store"""
+
+  def __init__(self, memory: LRUCache, persistent: Optional[SQLiteCacheStore] = None):
+    self.memory = memory
+    self.persistent = persistent
+
+  def get(self, key: str) -> Optional[Any]:
+    value = self.memory.get(key)
+    if value is not None or self.persistent is None:
+      return value
+
+    value = self.persistent.get(key)
+    if value is not None:
+      # Promote warm entries so later lookups stay in memory
+      self.memory.set(key, value)
+    return value
+
+  def set(self, key: str, value: Any):
+    self.memory.set(key, value)
+    if self.persistent is not None:
+      self.persistent.set(key, value)
+
+  def stats(self) -> Dict[str, Any]:
+    stats = {'memory': self.memory.stats()}
+    if self.persistent is not None:
+      stats['persistent'] = self.persistent.stats()
+    return stats
@@ -1,79 +1,163 @@
-from datetime import datetime, timedelta
 import re
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.cache import normalize_query
+
+VIETNAM_TZ = timezone(timedelta(hours=7))
+
+class _TodayAnchor:
+  """Vietnam calendar day, recomputed only once UTC+7 midnight has passed"""
+
+  def __init__(self):
+    # (day, unix time of the next Vietnam midnight), swapped as one tuple for readers
+    self._state: Tuple[Optional[date], float] = (None, 0.0)
+    self._lock = threading.Lock()
+
+  def get(self) -> date:
+    today, expires_at = self._state
+    now = time.time()
+    if now < expires_at:
+      return today
+    with self._lock:
+      today = datetime.fromtimestamp(now, VIETNAM_TZ).date()
+      midnight = datetime.combine(today + timedelta(days=1), dtime(), VIETNAM_TZ)
+      self._state = (today, midnight.timestamp())
+    return today
+
+_today_anchor = _TodayAnchor()
+
+def _iso(day: date) -> str:
+  return day.strftime('%Y-%m-%d')
+
+def _add_months(day: date, months: int) -> date:
+  """Shift by whole months, clamping the day to the end of the target month"""
+  year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+  month += 1
+  next_month = date(year + month // 12, month % 12 + 1, 1)
+  return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
+def _week_start(today: date, week_offset: int) -> date:
+  return today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
+
+def _month_start(today: date, month_offset: int) -> date:
+  return _add_months(today.replace(day=1), month_offset)
+
+def _quarter_bounds(year: int, quarter: int) -> Tuple[date, date]:
+  start = date(year, 3 * quarter - 2, 1)
+  return start, _add_months(start, 3) - timedelta(days=1)
+
+def _quarter_range(today: date, quarter_offset: int) -> str:
+  year, index = divmod(today.year * 4 + (today.month - 1) // 3 + quarter_offset, 4)
+  start, end = _quarter_bounds(year, index + 1)
+  return f"{_iso(start)} to {_iso(end)}"
+
+def period_bounds(type_of_time: str, specific_time: str) -> Tuple[date, date]:
+  """First and last day covered by a (type_of_time, specific_time) pair"""
+  if ' to ' in specific_time:
+    start_text, end_text = specific_time.split(' to ', 1)
+    start, end = date.fromisoformat(start_text.strip()), date.fromisoformat(end_text.strip())
+  else:
+    start = date.fromisoformat(specific_time.strip())
+    months = {'month': 1, 'quarter': 3, 'year': 12}.get(type_of_time)
+    if type_of_time == 'week':
+      end = start + timedelta(days=6)
+    elif months:
+      end = _add_months(start, months) - timedelta(days=1)
+    else:
+      end = start
+  if start > end:
+    raise ValueError(f"Empty period: {specific_time}")
+  return start, end
+
+def shift_period(start: date, end: date, periods: int) -> Tuple[date, date]:
+  """Move a period by whole periods; whole calendar months/quarters/years stay calendar aligned"""
+  if start.day == 1 and (end + timedelta(days=1)).day == 1:
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    shifted = _add_months(start, months * periods)
+    return shifted, _add_months(shifted, months) - timedelta(days=1)
+  length = end - start + timedelta(days=1)
+  return start + length * periods, end + length * periods
+
+def periods_back_to_elapsed(start: date, end: date, day: date) -> int:
+  """Smallest n >= 1 such that shift_period(start, end, -n) ends before `day`"""
+  if start.day == 1 and (end + timedelta(days=1)).day == 1:
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    # The shifted period ends before `day` once the period after it starts in or before day's month
+    ahead = (start.year - day.year) * 12 + start.month - day.month
+    return max(1, -(-ahead // months) + 1)
+  length = (end - start).days + 1
+  return max(1, (end - day).days // length + 1)
 
 class VietnamDateUtils:
   @staticmethod
   def get_vietnam_date() -> datetime:
-    """Get current date in Vietnam timezone (UTC+7)"""
-    utc_now = datetime.utcnow()
-    return utc_now + timedelta(hours=7)
-  
+    """Get current date and time in Vietnam timezone (UTC+7)"""
+    return datetime.now(VIETNAM_TZ).replace(tzinfo=None)
+
+  @staticmethod
+  def today() -> date:
+    """Current Vietnam calendar day, cached until the next UTC+7 midnight"""
+    return _today_anchor.get()
+
   @staticmethod
   def get_current_data() -> str:
     """Get current date in Vietnam timezone (YYYY-MM-DD)"""
-    return VietnamDateUtils.get_vietnam_date().strftime('%Y-%m-%d')
-  
+    return _iso(VietnamDateUtils.today())
+
   @staticmethod
   def get_tomorrow() -> str:
     """Get tomorrow's date in Vietnam timezone (YYYY-MM-DD)"""
-    tomorrow = VietnamDateUtils.get_vietnam_date() + timedelta(days=1)
-    return tomorrow.strftime('%Y-%m-%d')
-  
+    return VietnamDateUtils.get_day(1)
+
   @staticmethod
   def get_yesterday() -> str:
     """Get yesterday's date in Vietnam timezone (YYYY-MM-DD)"""
-    yesterday = VietnamDateUtils.get_vietnam_date() - timedelta(days=1)
-    return yesterday.strftime('%Y-%m-%d')
-  
+    return VietnamDateUtils.get_day(-1)
+
   @staticmethod
   def get_next_week_range() -> str:
     """Get next week date rang (7 days from now for 1 week)"""
-    vietnam_now = VietnamDateUtils.get_vietnam_date()
-    next_week_start = vietnam_now + timedelta(days=7)
+    next_week_start = VietnamDateUtils.today() + timedelta(days=7)
     next_week_end = next_week_start + timedelta(days=6)
-    return f"{next_week_start.strftime('%Y-%m-%d')} to {next_week_end.strftime('%Y-%m-%d')}"
-  
+    return f"{_iso(next_week_start)} to {_iso(next_week_end)}"
+
   @staticmethod
   def get_this_month_start() -> str:
-      """Get first day of current month"""
-      vietnam_now = VietnamDateUtils.get_vietnam_date()
-      return vietnam_now.replace(day=1).strftime("%Y-%m-%d")
-  
+    """Get first day of current month"""
+    return VietnamDateUtils.get_month_start(0)
+
+  @staticmethod
+  def get_day(day_offset: int = 0) -> str:
+    """Get the date `day_offset` days from today (YYYY-MM-DD)"""
+    return _iso(VietnamDateUtils.today() + timedelta(days=day_offset))
+
+  @staticmethod
+  def get_week_start(week_offset: int = 0) -> str:
+    """Get the Monday of the week `week_offset` weeks from this one"""
+    return _iso(_week_start(VietnamDateUtils.today(), week_offset))
+
+  @staticmethod
+  def get_month_start(month_offset: int = 0) -> str:
+    """Get the first day of the month `month_offset` months from this one"""
+    return _iso(_month_start(VietnamDateUtils.today(), month_offset))
+
+  @staticmethod
+  def get_year_start(year_offset: int = 0) -> str:
+    """Get the first day of the year `year_offset` years from this one"""
+    return _iso(date(VietnamDateUtils.today().year + year_offset, 1, 1))
+
   @staticmethod
   def get_quarter_range(quarter_offset: int = 1, year: Optional[int] = None) -> str:
-    current = VietnamDateUtils.get_vietnam_date()
-    
-    if year is None:
-      year = current.year
-    
-    # Determine current quarter (1-4)
-    current_quarter = (current.month - 1) // 3 + 1
-    
-    # Calculate target quarter
-    target_quarter = current_quarter + quarter_offset
-    
-    # Handle year rollover
-    while target_quarter > 4:
-      target_quarter -= 4
-      year += 1
-    while target_quarter < 1:
-      target_quarter += 4
-      year -= 1
-    
-    # Get quarter date range
-    quarter_ranges = {
-      1: (1, 3, 31),   # Q1: Jan-Mar
-      2: (4, 6, 30),   # Q2: Apr-Jun  
-      3: (7, 9, 30),   # Q3: Jul-Sep
-      4: (10, 12, 31)  # Q4: Oct-Dec
-    }
-    
-    start_month, end_month, end_day = quarter_ranges[target_quarter]
-    start_date = datetime(year, start_month, 1)
-    end_date = datetime(year, end_month, end_day)
-    
-    return f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+    """Date range of the quarter `quarter_offset` quarters from this one, optionally moved to `year`"""
+    today = VietnamDateUtils.today()
+    if year is not None:
+      today = today.replace(year=year, day=1)
+    return _quarter_range(today, quarter_offset)
 
   @staticmethod
   def get_next_quarter_range() -> str:
@@ -91,42 +175,299 @@ class VietnamDateUtils:
     return VietnamDateUtils.get_quarter_range(-1)
 
   @staticmethod
-  def parse_quarter_from_text(text: str) -> str:
-    text = text.lower()
-    
-    # Handle specific quarter and year patterns
-    q_pattern = r'q([1-4])\s*(\d{4})?'
-    quarter_pattern = r'quý\s*([1-4])\s*(?:năm\s*)?(\d{4})?'
-    
-    q_match = re.search(q_pattern, text)
-    quarter_match = re.search(quarter_pattern, text)
-    
-    if q_match:
-      quarter_num = int(q_match.group(1))
-      year = int(q_match.group(2)) if q_match.group(2) else None
-      current_quarter = (VietnamDateUtils.get_vietnam_date().month - 1) // 3 + 1
-      offset = quarter_num - current_quarter
-      return VietnamDateUtils.get_quarter_range(offset, year)
-    
-    if quarter_match:
-      quarter_num = int(quarter_match.group(1))
-      year = int(quarter_match.group(2)) if quarter_match.group(2) else None
-      current_quarter = (VietnamDateUtils.get_vietnam_date().month - 1) // 3 + 1
-      offset = quarter_num - current_quarter
-      return VietnamDateUtils.get_quarter_range(offset, year)
-    
-    # Handle relative quarter terms
-    if any(term in text for term in ['quý tới', 'quý sau', 'next quarter']):
-      return VietnamDateUtils.get_next_quarter_range()
-    elif any(term in text for term in ['quý này', 'current quarter', 'this quarter']):
-      return VietnamDateUtils.get_current_quarter_range()
-    elif any(term in text for term in ['quý trước', 'quý trước đó', 'previous quarter', 'last quarter']):
-      return VietnamDateUtils.get_previous_quarter_range()
-    
-    # Default to next quarter
-    return VietnamDateUtils.get_next_quarter_range()
+  def parse_quarter_from_text(text: str) -> Optional[str]:
+    """Date range of the first quarter expression in `text`, or None if it names no quarter"""
+    for expression in date_engine.resolve(text).expressions:
+      if expression.kind == 'quarter':
+        return expression.specific_time
+    return None
 
   @staticmethod
   def get_current_time_string() -> str:
     """Get current time string for logging"""
-    return VietnamDateUtils.get_vietnam_date().strftime('%Y-%m-%d %H:%M:%S')
\ No newline at end of file
+    return VietnamDateUtils.get_vietnam_date().strftime('%Y-%m-%d %H:%M:%S')
+
+# Relative phrases -> (unit, offset); resolved once per day into a lookup table
+RELATIVE_PHRASES = {
+  'hôm kia': ('day', -2),
+  'hôm qua': ('day', -1),
+  'hôm nay': ('day', 0),
+  'ngày mai': ('day', 1),
+  'ngày kia': ('day', 2),
+  'tuần trước': ('week', -1),
+  'tuần này': ('week', 0),
+  'tuần tới': ('week', 1),
+  'tuần sau': ('week', 1),
+  'tháng trước': ('month', -1),
+  'tháng này': ('month', 0),
+  'tháng tới': ('month', 1),
+  'tháng sau': ('month', 1),
+  'quý trước': ('quarter', -1),
+  'quý này': ('quarter', 0),
+  'quý tới': ('quarter', 1),
+  'quý sau': ('quarter', 1),
+  'năm ngoái': ('year', -1),
+  'năm trước': ('year', -1),
+  'năm nay': ('year', 0),
+  'năm tới': ('year', 1),
+  'năm sau': ('year', 1),
+  'từ đầu tuần đến nay': ('week_to_date', 0),
+  'từ đầu tháng đến nay': ('month_to_date', 0),
+  'từ đầu quý đến nay': ('quarter_to_date', 0),
+  'từ đầu năm đến nay': ('year_to_date', 0),
+  'day before yesterday': ('day', -2),
+  'yesterday': ('day', -1),
+  'today': ('day', 0),
+  'tomorrow': ('day', 1),
+  'day after tomorrow': ('day', 2),
+  'last week': ('week', -1),
+  'previous week': ('week', -1),
+  'this week': ('week', 0),
+  'next week': ('week', 1),
+  'last month': ('month', -1),
+  'previous month': ('month', -1),
+  'this month': ('month', 0),
+  'next month': ('month', 1),
+  'last quarter': ('quarter', -1),
+  'previous quarter': ('quarter', -1),
+  'this quarter': ('quarter', 0),
+  'current quarter': ('quarter', 0),
+  'next quarter': ('quarter', 1),
+  'last year': ('year', -1),
+  'previous year': ('year', -1),
+  'this year': ('year', 0),
+  'next year': ('year', 1),
+  'month to date': ('month_to_date', 0),
+  'year to date': ('year_to_date', 0),
+}
+
+YEAR_OFFSETS = {'nay': 0, 'ngoái': -1, 'trước': -1, 'tới': 1, 'sau': 1}
+
+NUMBER_WORDS = {
+  'một': 1, 'hai': 2, 'ba': 3, 'bốn': 4, 'năm': 5, 'sáu': 6, 'bảy': 7, 'tám': 8, 'chín': 9, 'mười': 10,
+  'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+UNIT_WORDS = {
+  'ngày': 'day', 'tuần': 'week', 'tháng': 'month', 'quý': 'quarter', 'năm': 'year',
+  'day': 'day', 'days': 'day', 'week': 'week', 'weeks': 'week', 'month': 'month', 'months': 'month',
+  'quarter': 'quarter', 'quarters': 'quarter', 'year': 'year', 'years': 'year',
+}
+
+# Vague qualifiers ("trong thời gian tới tháng 6") only count as unresolved when nothing else resolves
+_VAGUE_TIME = ['trong thời gian tới', 'thời gian tới', 'thời gian qua', 'thời gian gần đây', 'gần đây', 'sắp tới', 'vừa qua']
+
+def _alternation(words: Iterable[str]) -> str:
+  # Longest first so that e.g. 'từ đầu tháng đến nay' wins over shorter overlaps
+  return '|'.join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+def _date_pattern(prefix: str) -> str:
+  """Day and month, optionally a year: '5 tháng 6 năm 2024', '5/6', '5/6/2024', '5 tháng 6 năm ngoái'"""
+  return (
+    rf"(?P<{prefix}d>\d{{1,2}})(?: tháng |/)(?P<{prefix}m>\d{{1,2}})"
+    + _year_suffix(f"{prefix}y")
+  )
+
+_NUMBER = rf"\d{{1,2}}|{_alternation(NUMBER_WORDS)}"
+_UNIT = _alternation(UNIT_WORDS)
+_YEAR_WORDS = _alternation(YEAR_OFFSETS)
+
+def _year_suffix(name: str) -> str:
+  """Optional ' năm 2024' / ' năm ngoái' / '/2024' captured as `name`"""
+  return rf"(?:(?: năm |/)(?P<{name}>\d{{4}}|{_YEAR_WORDS}))?"
+
+# One alternation for every expression kind; at a given position the first
+# (most specific) alternative that matches wins
+_DATE_EXPRESSION_RE = re.compile(r'(?<!\w)(?:' + '|'.join([
+  # từ ngày 1/6 đến ngày 15/6/2024
+  rf"(?P<full_range>(?:từ|from) (?:ngày )?{_date_pattern('fa')} (?:đến|tới|to) (?:ngày )?{_date_pattern('fb')})",
+  # từ ngày 1 đến ngày 15 (tháng 6 (năm nay))
+  rf"(?P<day_range>(?:từ )?ngày (?P<rd1>\d{{1,2}}) (?:đến|tới) (?:ngày )?(?P<rd2>\d{{1,2}})(?: tháng (?P<rm>\d{{1,2}}))?{_year_suffix('ry')})",
+  rf"(?P<iso_range>(?:từ |from )?(?P<ia>\d{{4}}-\d{{2}}-\d{{2}}) (?:đến|tới|to) (?P<ib>\d{{4}}-\d{{2}}-\d{{2}}))",
+  # hai tuần qua, 3 tháng gần đây, past two weeks
+  rf"(?P<last_n>(?:(?P<ln>{_NUMBER}) )?(?P<lu>{_UNIT}) (?:qua|gần đây|vừa qua|trở lại đây))",
+  rf"(?P<last_n_en>(?:last|past) (?P<en>{_NUMBER}) (?P<eu>{_UNIT}))",
+  # ba ngày trước, 2 tuần nữa
+  rf"(?P<n_away>(?P<an>{_NUMBER}) (?P<au>{_UNIT}) (?:trước|nữa|tới|sau))",
+  rf"(?P<relative>{_alternation(RELATIVE_PHRASES)})",
+  rf"(?P<day>(?:ngày )?{_date_pattern('d')})",
+  rf"(?P<iso>\d{{4}}-\d{{2}}-\d{{2}})",
+  rf"(?P<quarter>(?:quý|quarter|q)\s*(?P<qn>[1-4])(?:\s*(?:năm\s*)?(?P<qy>\d{{4}}|{_YEAR_WORDS}))?)",
+  rf"(?P<month>tháng (?P<mn>\d{{1,2}}){_year_suffix('my')})",
+  rf"(?P<year>(?:năm|year) (?P<yn>\d{{4}}))",
+]) + r')(?!\w)')
+
+# Time words left over after resolution mean an expression we could not resolve
+_TIME_WORDS_RE = re.compile(r'(?<!\w)(?:ngày|tuần|tháng|quý|năm|hôm|thời gian)(?!\w)')
+_VAGUE_TIME_RE = re.compile(r'(?<!\w)(?:' + _alternation(_VAGUE_TIME) + r')(?!\w)')
+
+@dataclass(frozen=True)
+class DateExpression:
+  kind: str
+  type_of_time: str
+  specific_time: str
+  span: Tuple[int, int]
+
+@dataclass(frozen=True)
+class DateResolution:
+  expressions: Tuple[DateExpression, ...]
+  # Time words remain outside every resolved expression
+  unresolved: bool
+
+  @property
+  def first(self) -> Optional[DateExpression]:
+    return self.expressions[0] if self.expressions else None
+
+@lru_cache(maxsize=8)
+def _relative_table(today: date) -> Dict[str, Tuple[str, str]]:
+  """RELATIVE_PHRASES resolved against one day"""
+  return {phrase: _resolve_unit(today, unit, offset) for phrase, (unit, offset) in RELATIVE_PHRASES.items()}
+
+def _resolve_unit(today: date, unit: str, offset: int) -> Tuple[str, str]:
+  if unit == 'day':
+    return 'day', _iso(today + timedelta(days=offset))
+  if unit == 'week':
+    return 'week', _iso(_week_start(today, offset))
+  if unit == 'month':
+    return 'month', _iso(_month_start(today, offset))
+  if unit == 'quarter':
+    return 'range', _quarter_range(today, offset)
+  if unit == 'year':
+    return 'year', _iso(date(today.year + offset, 1, 1))
+  # *_to_date: start of the current period until today
+  start = {
+    'week_to_date': lambda: _week_start(today, 0),
+    'month_to_date': lambda: today.replace(day=1),
+    'quarter_to_date': lambda: _quarter_bounds(today.year, (today.month - 1) // 3 + 1)[0],
+    'year_to_date': lambda: date(today.year, 1, 1),
+  }[unit]()
+  return 'range', f"{_iso(start)} to {_iso(today)}"
+
+def _shift(today: date, unit: str, amount: int) -> date:
+  if unit == 'day':
+    return today + timedelta(days=amount)
+  if unit == 'week':
+    return today + timedelta(weeks=amount)
+  return _add_months(today, amount * {'month': 1, 'quarter': 3, 'year': 12}[unit])
+
+def _number(text: Optional[str]) -> int:
+  if not text:
+    return 1
+  return int(text) if text.isdigit() else NUMBER_WORDS[text]
+
+def _year(text: Optional[str], today: date) -> int:
+  if not text:
+    return today.year
+  if text.isdigit():
+    return int(text)
+  return today.year + YEAR_OFFSETS[text]
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+  try:
+    return date(year, month, day)
+  except ValueError:
+    return None
+
+def _parse_iso(text: str) -> Optional[date]:
+  try:
+    return datetime.strptime(text, '%Y-%m-%d').date()
+  except ValueError:
+    return None
+
+def _as_range(start: Optional[date], end: Optional[date]) -> Optional[Tuple[str, str]]:
+  if start is None or end is None or start > end:
+    return None
+  return 'range', f"{_iso(start)} to {_iso(end)}"
+
+def _resolve_match(m: 're.Match', today: date) -> Optional[Tuple[str, str, str]]:
+  """(unit, type_of_time, specific_time) for one match, None when it names no valid date"""
+  kind = m.lastgroup
+  g = m.group
+
+  if kind == 'relative':
+    unit = RELATIVE_PHRASES[g(kind)][0]
+    return (unit,) + _relative_table(today)[g(kind)]
+
+  if kind == 'full_range':
+    start_year = _year(g('fay'), today)
+    start = _safe_date(start_year, int(g('fam')), int(g('fad')))
+    end = _safe_date(_year(g('fby'), today) if g('fby') else start_year, int(g('fbm')), int(g('fbd')))
+    resolved = _as_range(start, end)
+  elif kind == 'day_range':
+    year, month = _year(g('ry'), today), int(g('rm')) if g('rm') else today.month
+    resolved = _as_range(_safe_date(year, month, int(g('rd1'))), _safe_date(year, month, int(g('rd2'))))
+  elif kind == 'iso_range':
+    resolved = _as_range(_parse_iso(g('ia')), _parse_iso(g('ib')))
+  elif kind in ('last_n', 'last_n_en'):
+    number, unit = (g('ln'), g('lu')) if kind == 'last_n' else (g('en'), g('eu'))
+    resolved = _as_range(_shift(today, UNIT_WORDS[unit], -_number(number)), today)
+  elif kind == 'n_away':
+    unit, amount = UNIT_WORDS[g('au')], _number(g('an'))
+    if g(kind).endswith('trước'):
+      return (unit,) + _resolve_unit(today, unit, -amount)
+    resolved = _as_range(today + timedelta(days=1), _shift(today, unit, amount))
+  elif kind == 'day':
+    day = _safe_date(_year(g('dy'), today), int(g('dm')), int(g('dd')))
+    resolved = ('day', _iso(day)) if day else None
+  elif kind == 'iso':
+    day = _parse_iso(g(kind))
+    resolved = ('day', _iso(day)) if day else None
+  elif kind == 'quarter':
+    start, end = _quarter_bounds(_year(g('qy'), today), int(g('qn')))
+    return 'quarter', 'range', f"{_iso(start)} to {_iso(end)}"
+  elif kind == 'month':
+    month_start = _safe_date(_year(g('my'), today), int(g('mn')), 1)
+    resolved = ('month', _iso(month_start)) if month_start else None
+  else:
+    resolved = ('year', f"{g('yn')}-01-01")
+
+  return (kind,) + resolved if resolved else None
+
+@lru_cache(maxsize=4096)
+def _resolve_normalized(text: str, today: date) -> DateResolution:
+  expressions = []
+  remainder = text
+  for m in _DATE_EXPRESSION_RE.finditer(text):
+    resolved = _resolve_match(m, today)
+    if resolved is None:
+      continue
+    expressions.append(DateExpression(*resolved, span=m.span()))
+    start, end = m.span()
+    remainder = remainder[:start] + ' ' * (end - start) + remainder[end:]
+
+  if expressions:
+    remainder = _VAGUE_TIME_RE.sub(' ', remainder)
+    unresolved = _TIME_WORDS_RE.search(remainder) is not None
+  else:
+    unresolved = _TIME_WORDS_RE.search(remainder) is not None or _VAGUE_TIME_RE.search(remainder) is not None
+  return DateResolution(tuple(expressions), unresolved)
+
+class DateExpressionEngine:
+  """Resolves Vietnamese/English time expressions against the Vietnam calendar day.
+
+  Every expression kind (relative phrases, "quý 2 năm 2024", "từ ngày 1 đến
+  ngày 15", "hai tuần qua", ...) is one alternative of a single precompiled
+  regex, so a query is scanned once. Spans refer to the normalized query.
+  """
+
+  def resolve(self, text: str, today: Optional[date] = None) -> DateResolution:
+    """All time expressions in `text`, in order of appearance"""
+    return _resolve_normalized(normalize_query(text), today or _today_anchor.get())
+
+  def resolve_batch(self, texts: Iterable[str], today: Optional[date] = None) -> List[DateResolution]:
+    """Resolve many queries against one anchor day; repeated queries are resolved once.
+
+    Pass `today` to replay a dataset against the day its labels were generated.
+    """
+    today = today or _today_anchor.get()
+    resolved: Dict[str, DateResolution] = {}
+    results = []
+    for text in texts:
+      key = normalize_query(text)
+      resolution = resolved.get(key)
+      if resolution is None:
+        resolution = resolved[key] = _resolve_normalized(key, today)
+      results.append(resolution)
+    return results
+
+date_engine = DateExpressionEngine()
@@ -0,0 +1,216 @@
+import json
+import re
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+DEFAULT_FUNCTION_NAMES = ('add', 'get', 'delete', 'compare', 'predict')
+
+# One token per match; whitespace is skipped by the leading \s*
+_TOKEN_RE = re.compile(
+  r"""\s*(?:
+    (?P<squote>'(?:[^'\\]|\\.)*')
+  | (?P<dquote>"(?:[^"\\]|\\.)*")
+  | (?P<punct>[=,()])
+  | (?P<word>[^\s=,()'"]+)
+  )""",
+  re.VERBOSE | re.DOTALL,
+)
+_VALUE = r"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|([^\s,()'"]+)"""
+# Flat argument lists (the common case) are matched in one go by the regex engine
+_FLAT_ARGS_RE = re.compile(r'\s*((?:\w+\s*=\s*(?:' + _VALUE + r')\s*(?:,\s*|(?=\))))*)\)', re.DOTALL)
+_FLAT_PAIR_RE = re.compile(r'(\w+)\s*=\s*(?:' + _VALUE + r')', re.DOTALL)
+_KEY_RE = re.compile(r'\w+')
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_FENCE = '```'
+
+def _unquote(token: str) -> str:
+  inner = token[1:-1]
+  return _ESCAPE_RE.sub(r'\1', inner) if '\\' in inner else inner
+
+class FunctionCallParser:
+  """Single-pass tokenizer for `name(key='value', ...)` calls embedded in LLM output"""
+
+  def __init__(self, function_names: Iterable[str] = DEFAULT_FUNCTION_NAMES):
+    names = sorted(set(function_names), key = len, reverse = True)
+    self._call_start_re = re.compile(
+      r'(?<!\w)(' + '|'.join(re.escape(n) for n in names) + r')\s*\(',
+      re.IGNORECASE,
+    )
+
+  def parse(self, text: str) -> Dict[str, Any]:
+    """Return the best function call in `text`, raising ValueError if there is none"""
+    call = self.find(text)
+    if call is None:
+      raise ValueError(f"Could not parse function call: {text.strip()}")
+    return call
+
+  @staticmethod
+  def parse_json(text: str) -> Dict[str, Any]:
+    """Parse a `{"name": ..., "parameters": {...}}` object produced by structured output"""
+    try:
+      data = json.loads(text)
+    except ValueError:
+      raise ValueError(f"Could not parse function call: {text.strip()}")
+    if not isinstance(data, dict) or not isinstance(data.get('name'), str) or not isinstance(data.get('parameters', {}), dict):
+      raise ValueError(f"Could not parse function call: {text.strip()}")
+    parameters = {key: value if isinstance(value, str) else json.dumps(value) for key, value in data.get('parameters', {}).items()}
+    return {'name': data['name'].lower(), 'parameters': parameters}
+
+  def find(self, text: str) -> Optional[Dict[str, Any]]:
+    """Like parse() but returns None when no complete call is present"""
+    calls = self.parse_all(text)
+    if not calls:
+      return None
+    if _FENCE in text[:calls[0][0]]:
+      # The model opened a code block before answering: the call inside a block is the answer
+      fenced = self._fenced_ranges(text)
+      for start, call in calls:
+        if any(lo <= start < hi for lo, hi in fenced):
+          return call
+    return calls[0][1]
+
+  def parse_all(self, text: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """All complete calls in `text` as (offset, call) pairs, in order of appearance"""
+    calls = []
+    pos = 0
+    while True:
+      match = self._call_start_re.search(text, pos)
+      if match is None:
+        return calls
+      parsed = self._parse_arguments(text, match.end())
+      if parsed is None:
+        # Malformed candidate: keep scanning right after its name
+        pos = match.start() + 1
+        continue
+      parameters, end = parsed
+      calls.append((match.start(), {'name': match.group(1).lower(), 'parameters': parameters}))
+      pos = end
+
+  @staticmethod
+  def _parse_arguments(text: str, pos: int) -> Optional[Tuple[Dict[str, str], int]]:
+    """Parse `key=value, ...)` starting after the opening parenthesis"""
+    flat = _FLAT_ARGS_RE.match(text, pos)
+    if flat is not None:
+      parameters = {}
+      for key, squoted, dquoted, bare in _FLAT_PAIR_RE.findall(flat.group(1)):
+        value = squoted or dquoted or bare
+        parameters[key] = _ESCAPE_RE.sub(r'\1', value) if '\\' in value else value
+      return parameters, flat.end()
+    return FunctionCallParser._tokenize_arguments(text, pos)
+
+  @staticmethod
+  def _tokenize_arguments(text: str, pos: int) -> Optional[Tuple[Dict[str, str], int]]:
+    """Token-by-token parse for arguments with nested parentheses or unusual spacing"""
+    parameters = {}
+    token_re = _TOKEN_RE
+
+    while True:
+      match = token_re.match(text, pos)
+      if match is None:
+        return None
+      pos = match.end()
+      if match.group('punct') == ')':
+        # Empty argument list or a trailing comma
+        return parameters, pos
+
+      # Key
+      key = match.group('word')
+      if key is None or not _KEY_RE.fullmatch(key):
+        return None
+      match = token_re.match(text, pos)
+      if match is None or match.group('punct') != '=':
+        return None
+      pos = match.end()
+
+      # Value: a single quoted string, or raw text up to the next top-level ',' or ')'
+      value_start = None
+      value_end = pos
+      quoted = None
+      depth = 0
+      while True:
+        match = token_re.match(text, pos)
+        if match is None:
+          return None
+        punct = match.group('punct')
+        if depth == 0 and punct in (',', ')'):
+          break
+        if punct == '(':
+          depth += 1
+        elif punct == ')':
+          depth -= 1
+        if value_start is None:
+          value_start = match.start(match.lastgroup)
+          quoted = match.group('squote') or match.group('dquote')
+        else:
+          quoted = None
+        value_end = pos = match.end()
+
+      if quoted is not None:
+        parameters[key] = _unquote(quoted)
+      else:
+        parameters[key] = text[value_start:value_end].strip() if value_start is not None else ''
+
+      pos = match.end()
+      if punct == ')':
+        return parameters, pos
+
+  @staticmethod
+  def _fenced_ranges(text: str) -> List[Tuple[int, int]]:
+    ranges = []
+    start = text.find(_FENCE)
+    while start != -1:
+      end = text.find(_FENCE, start + len(_FENCE))
+      if end == -1:
+        break
+      ranges.append((start, end))
+      start = text.find(_FENCE, end + len(_FENCE))
+    return ranges
+
+class IncrementalCallParser:
+  """Feeds streamed LLM output into a FunctionCallParser and reports a call once it is final.
+
+  A call is final when FunctionCallParser.find() would pick it whatever the
+  rest of the stream is. A bare call with no code block opened before it
+  is final as soon as it closes. After a code block has been opened, the
+  first call inside a block is final once the block closes, or the first
+  call of the output inside a still open block.
+  """
+
+  def __init__(self, parser: FunctionCallParser, accept: Optional[Callable[[Dict[str, Any]], bool]] = None):
+    self.parser = parser
+    self.accept = accept
+    self._chunks: List[str] = []
+
+  @property
+  def text(self) -> str:
+    return ''.join(self._chunks)
+
+  def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+    """Add a chunk; returns a call once one is final (and accepted), else None"""
+    self._chunks.append(chunk)
+    # A call can only have become final if this chunk closed a parenthesis or a code block
+    if ')' not in chunk and '`' not in chunk:
+      return None
+
+    call = self._final_call(self.text)
+    if call is not None and (self.accept is None or self.accept(call)):
+      return call
+    return None
+
+  def _final_call(self, text: str) -> Optional[Dict[str, Any]]:
+    calls = self.parser.parse_all(text)
+    if not calls:
+      return None
+    first_start, first = calls[0]
+    # An earlier candidate that does not parse yet may still complete and come first
+    if self.parser._call_start_re.search(text).start() < first_start:
+      return None
+    if _FENCE not in text[:first_start]:
+      return first
+    fenced = FunctionCallParser._fenced_ranges(text)
+    for start, call in calls:
+      if any(lo <= start < hi for lo, hi in fenced):
+        return call
+    # The open block's call wins if the block closes, and is the first call if it never does
+    if text.count(_FENCE) % 2 == 1 and first_start > text.rfind(_FENCE):
+      return first
+    return None
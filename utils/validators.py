@@ -1,41 +1,206 @@
-from typing import Dict, Any, List
+import difflib
 import re
+from typing import Dict, Any, FrozenSet, List, Optional, Pattern, Tuple
+
+# Near-miss values the LLM tends to produce, mapped onto the schema enums
+ENUM_ALIASES: Dict[str, Dict[str, str]] = {
+  'departments': {
+    'accounting': 'accountant',
+    'accountants': 'accountant',
+    'accounts': 'accountant',
+    'financial': 'finance',
+    'finances': 'finance',
+    'management': 'manager',
+    'managers': 'manager',
+    'employees': 'employee',
+    'staff': 'employee',
+    'human_resources': 'hr',
+    'human_resource': 'hr',
+    'personnel': 'hr',
+  },
+  'content': {
+    'revenue': 'cash_flow',
+    'revenues': 'cash_flow',
+    'expense': 'cash_flow',
+    'expenses': 'cash_flow',
+    'income': 'cash_flow',
+    'sales': 'cash_flow',
+    'cost': 'cash_flow',
+    'costs': 'cash_flow',
+    'profit': 'cash_flow',
+    'cashflow': 'cash_flow',
+    'reports': 'report',
+    'employees': 'employee',
+    'staff': 'employee',
+    'tasks': 'task',
+    'projects': 'project',
+    'invoices': 'invoice',
+    'bill': 'invoice',
+    'bills': 'invoice',
+    'leave': 'leave_request',
+    'leaves': 'leave_request',
+    'leave_requests': 'leave_request',
+  },
+  'type_of_time': {
+    'date': 'day',
+    'daily': 'day',
+    'today': 'day',
+    'weekly': 'week',
+    'monthly': 'month',
+    'quarterly': 'quarter',
+    'yearly': 'year',
+    'annual': 'year',
+    'annually': 'year',
+    'period': 'range',
+  },
+}
+
+# Parameter names the LLM tends to misspell
+PARAMETER_ALIASES: Dict[str, str] = {
+  'department': 'departments',
+  'dept': 'departments',
+  'type': 'type_of_time',
+  'time_type': 'type_of_time',
+  'time': 'specific_time',
+  'date': 'specific_time',
+}
+
+FUZZY_CUTOFF = 0.8
+
+_SEPARATOR_RE = re.compile(r'[\s\-]+')
+_INVALID_ID_CHARS_RE = re.compile(r'\W+')
+
+def _canonical(value: str) -> str:
+  return _SEPARATOR_RE.sub('_', value.strip().lower())
+
+class ParameterValidator:
+  """One schema property compiled for fast checks"""
+
+  def __init__(self, name: str, schema: Dict):
+    self.name = name
+    self.options: Optional[List[str]] = schema.get('enum')
+    self.enum: Optional[FrozenSet[str]] = frozenset(self.options) if self.options is not None else None
+    self.pattern: Optional[Pattern] = re.compile(schema['pattern']) if 'pattern' in schema else None
+    self.aliases = ENUM_ALIASES.get(name, {})
+
+  def validate(self, value: str):
+    if self.enum is not None and value not in self.enum:
+      raise ValueError(f"Invalid value for {self.name}: {value}. Must be on of {self.options}")
+
+    if self.pattern is not None and not (isinstance(value, str) and self.pattern.match(value)):
+      raise ValueError(f"Invalid format for {self.name}: {value}")
+
+  def repair(self, value: Any) -> Any:
+    """Closest valid value for a near miss, or `value` unchanged if there is none"""
+    if not isinstance(value, str):
+      return value
+
+    if self.enum is not None:
+      if value in self.enum:
+        return value
+      canonical = _canonical(value)
+      if canonical in self.enum:
+        return canonical
+      if canonical in self.aliases:
+        return self.aliases[canonical]
+      close = difflib.get_close_matches(canonical, self.options, n = 1, cutoff = FUZZY_CUTOFF)
+      return close[0] if close else value
+
+    if self.pattern is not None and not self.pattern.match(value):
+      candidate = _INVALID_ID_CHARS_RE.sub('_', value.strip()).strip('_')
+      if candidate and self.pattern.match(candidate):
+        return candidate
+    return value
+
+class FunctionValidator:
+  """One schema function compiled into a required set and per-parameter validators"""
+
+  def __init__(self, schema: Dict):
+    self.name = schema['name']
+    self.required: FrozenSet[str] = frozenset(schema['parameters'].get('required', []))
+    # Keep the schema order so missing parameters are reported deterministically
+    self._required_order = tuple(schema['parameters'].get('required', []))
+    self.parameters: Dict[str, ParameterValidator] = {
+      name: ParameterValidator(name, prop)
+      for name, prop in schema['parameters']['properties'].items()
+    }
+
+  def validate(self, parameters: Dict[str, Any]):
+    # Check required parameters
+    if not self.required.issubset(parameters):
+      for param in self._required_order:
+        if param not in parameters:
+          raise ValueError(f"Missing required parameter: {param}")
+
+    # Validate parameter values
+    for param_name, param_value in parameters.items():
+      validator = self.parameters.get(param_name)
+      if validator is not None:
+        validator.validate(param_value)
+
+  def repair(self, parameters: Dict[str, Any], repairs: List[str]) -> Dict[str, Any]:
+    repaired = {}
+    for param_name, param_value in parameters.items():
+      name = param_name
+      if name not in self.parameters:
+        name = PARAMETER_ALIASES.get(_canonical(name), _canonical(name))
+        if name not in self.parameters or name in parameters:
+          name = param_name
+      if name != param_name:
+        repairs.append(f"parameter {param_name} -> {name}")
+
+      validator = self.parameters.get(name)
+      value = validator.repair(param_value) if validator is not None else param_value
+      if value != param_value:
+        repairs.append(f"{name}: {param_value} -> {value}")
+      repaired[name] = value
+    return repaired
 
 class SchemaValidator:
   def __init__(self, schema: List[Dict]):
     self.schema = schema
     self.function_schemas = {func['name']: func for func in schema}
+    self.functions: Dict[str, FunctionValidator] = {func['name']: FunctionValidator(func) for func in schema}
+    self._function_names = list(self.functions)
 
   def validate_function_call(self, function_call: Dict[str, Any]) -> bool:
     """Validate function call against schema"""
     function_name = function_call.get('name')
     parameters = function_call.get('parameters', {})
 
-    if function_name not in self.function_schemas:
+    validator = self.functions.get(function_name)
+    if validator is None:
       raise ValueError(f"Unknown function: {function_name}")
-    
-    func_schema = self.function_schemas[function_name]
-    required_params = func_schema['parameters'].get('required', [])
-    properties = func_schema['parameters']['properties']
 
-    # Check required parameters
-    for param in required_params:
-      if param not in parameters:
-        raise ValueError(f"Missing required parameter: {param}")
-      
-    # Validate parameter values
-    for param_name, param_value in parameters.items():
-      if param_name in properties:
-        self._validate_parameter(param_name, param_value, properties[param_name])
-  
+    validator.validate(parameters)
     return True
-  
-  def _validate_parameter(self, name: str, value: str, schema: Dict):
-    """Validate individual parameter"""
-    if 'enum' in schema:
-      if value not in schema['enum']:
-        raise ValueError(f"Invalid value for {name}: {value}. Must be on of {schema['enum']}")
-    
-    if 'pattern' in schema:
-      if not re.match(schema['pattern'], value):
-        raise ValueError(f"Invalid format for {name}: {value}")
\ No newline at end of file
+
+  def is_valid(self, function_call: Dict[str, Any]) -> bool:
+    """Like validate_function_call but returns False instead of raising"""
+    try:
+      return self.validate_function_call(function_call)
+    except ValueError:
+      return False
+
+  def repair_function_call(self, function_call: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Map near-miss names and values onto the schema.
+
+    Returns a repaired copy of the call and a description of each change;
+    values that cannot be repaired are left as they are for validation to
+    reject.
+    """
+    repairs: List[str] = []
+    name = function_call.get('name')
+    if isinstance(name, str) and name not in self.functions:
+      canonical = _canonical(name)
+      close = difflib.get_close_matches(canonical, self._function_names, n = 1, cutoff = FUZZY_CUTOFF)
+      if canonical in self.functions or close:
+        repaired_name = canonical if canonical in self.functions else close[0]
+        repairs.append(f"function {name} -> {repaired_name}")
+        name = repaired_name
+
+    parameters = function_call.get('parameters', {})
+    validator = self.functions.get(name)
+    if validator is not None and isinstance(parameters, dict):
+      parameters = validator.repair(parameters, repairs)
+    return {'name': name, 'parameters': parameters}, repairs
\ No newline at end of file